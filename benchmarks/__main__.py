@@ -0,0 +1,79 @@
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+import typing as t
+
+from pudding.codec import JSON
+
+from . import bench_etf, bench_gateway, bench_http, bench_import, bench_models, bench_state, corpus
+
+
+def _commit() -> t.Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return out.stdout.strip()
+
+
+def run(args: argparse.Namespace) -> t.Dict[str, t.Any]:
+    payloads = corpus.load(args.corpus, args.count)
+    suites: t.Dict[str, t.Callable[[], t.Dict[str, t.Dict[str, float]]]] = {
+        "gateway": lambda: bench_gateway.run(payloads, args.rounds),
+        "codec": lambda: bench_etf.run(payloads, args.rounds),
+        "http": lambda: bench_http.run(args.requests),
+        "models": lambda: bench_models.run(args.count * 10),
+        "state": lambda: bench_state.run(payloads),
+        "import": lambda: bench_import.run(args.rounds),
+    }
+
+    results = {}
+
+    for name, suite in suites.items():
+        if args.only and name not in args.only:
+            continue
+
+        print(f"running {name}", file=sys.stderr)
+        results[name] = suite()
+
+    return {
+        "meta": {
+            "time": time.time(),
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "json": JSON.name,
+            "corpus": args.corpus,
+            "count": len(payloads),
+            "rounds": args.rounds,
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Runs every benchmark and prints the results as JSON")
+    parser.add_argument("--corpus", help="JSON lines file of recorded payloads")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--only", nargs="*", help="names of the suites to run")
+    parser.add_argument("--output", help="file to write the results to, instead of stdout")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args), indent=2, sort_keys=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fp:
+            fp.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
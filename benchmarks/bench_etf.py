@@ -0,0 +1,64 @@
+import time
+import argparse
+import typing as t
+
+from pudding import etf
+from pudding.codec import JSONCodec
+
+from . import corpus
+
+
+def _measure(func: t.Callable[[t.Any], t.Any], items: t.List[t.Any], rounds: int) -> float:
+    start = time.perf_counter()
+
+    for _ in range(rounds):
+        for item in items:
+            func(item)
+
+    return time.perf_counter() - start
+
+
+def run(payloads: t.List[t.Any], rounds: int = 5) -> t.Dict[str, t.Dict[str, float]]:
+    json_codec = JSONCodec()
+    codecs = {
+        "json-" + json_codec.name: (json_codec.dumps, json_codec.loads),
+        "etf-python": (etf.encode, etf.decode),
+    }
+
+    try:
+        erlpack = etf.ETFCodec("erlpack")
+    except ImportError:
+        pass
+    else:
+        codecs["etf-erlpack"] = (erlpack.dumps, erlpack.loads)
+
+    results = {}
+    count = len(payloads) * rounds
+
+    for name, (dumps, loads) in codecs.items():
+        frames = [dumps(payload) for payload in payloads]
+        elapsed = _measure(loads, frames, rounds)
+
+        results[name] = {
+            "payloads_per_sec": count / elapsed,
+            "bytes": sum(len(frame) for frame in frames),
+        }
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ETF vs JSON decoding")
+    parser.add_argument("--corpus", help="JSON lines file of recorded payloads")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    payloads = corpus.load(args.corpus, args.count)
+
+    for name, result in run(payloads, args.rounds).items():
+        print(f"{name:<16} {result['payloads_per_sec']:>12,.0f} payloads/s {result['bytes']:>12,} bytes")
+
+
+if __name__ == "__main__":
+    main()
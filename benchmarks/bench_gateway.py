@@ -0,0 +1,107 @@
+import zlib
+import time
+import asyncio
+import argparse
+import typing as t
+
+from pudding import DiscordWebSocket, Dispatcher
+from pudding.codec import JSON
+
+from . import corpus
+
+
+def compress(payloads: t.List[t.Any]) -> t.List[bytes]:
+    """Encodes the payloads as the frames of one zlib stream."""
+    deflater = zlib.compressobj()
+
+    return [
+        deflater.compress(JSON.dumps(payload).encode("utf-8")) + deflater.flush(zlib.Z_SYNC_FLUSH)
+        for payload in payloads
+    ]
+
+
+def _websocket(dispatcher: t.Any = None, **kwargs: t.Any) -> DiscordWebSocket:
+    return DiscordWebSocket("token", 0, {"url": "ws://localhost"}, dispatcher or (lambda t, d: None), **kwargs)
+
+
+async def _parse(frames: t.List[bytes], rounds: int, **kwargs: t.Any) -> t.Dict[str, float]:
+    elapsed = 0.0
+    inflated = 0
+
+    for _ in range(rounds):
+        ws = _websocket(**kwargs)
+
+        start = time.perf_counter()
+        for frame in frames:
+            await ws.parse_raw_message(frame)
+        elapsed += time.perf_counter() - start
+
+        inflated += ws.inflater.bytes_out
+
+    count = len(frames) * rounds
+    size = sum(len(frame) for frame in frames) * rounds
+
+    return {
+        "frames_per_sec": count / elapsed,
+        "compressed_mb_per_sec": size / elapsed / 1e6,
+        "inflated_mb_per_sec": inflated / elapsed / 1e6,
+    }
+
+
+async def _dispatch(payloads: t.List[t.Any], rounds: int) -> t.Dict[str, float]:
+    dispatcher = Dispatcher(maxsize=len(payloads) or 1)
+
+    async def handler(payload: t.Any) -> None:
+        pass
+
+    for name in {payload['t'] for payload in payloads}:
+        dispatcher.add_handler(name, handler)
+
+    ws = _websocket(dispatcher)
+    elapsed = 0.0
+
+    for _ in range(rounds):
+        start = time.perf_counter()
+
+        for payload in payloads:
+            await ws.handle_payload(payload)
+
+        for name in dispatcher._handlers:
+            queue = dispatcher.queue(name)
+            if queue is not None:
+                await queue.join()
+
+        elapsed += time.perf_counter() - start
+
+    dispatcher.close()
+
+    return {"events_per_sec": len(payloads) * rounds / elapsed}
+
+
+async def _run(payloads: t.List[t.Any], rounds: int) -> t.Dict[str, t.Dict[str, float]]:
+    frames = compress(payloads)
+
+    return {
+        "parse": await _parse(frames, rounds),
+        "parse-filtered": await _parse(frames, rounds, event_filter=lambda name: name == "GUILD_CREATE"),
+        "dispatch": await _dispatch(payloads, rounds),
+    }
+
+
+def run(payloads: t.List[t.Any], rounds: int = 5) -> t.Dict[str, t.Dict[str, float]]:
+    return asyncio.run(_run(payloads, rounds))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Gateway frame decoding and dispatch")
+    parser.add_argument("--corpus", help="JSON lines file of recorded payloads")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, result in run(corpus.load(args.corpus, args.count), args.rounds).items():
+        print(f"{name:<16} " + " ".join(f"{v:>14,.1f} {k}" for k, v in result.items()))
+
+
+if __name__ == "__main__":
+    main()
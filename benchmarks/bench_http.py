@@ -0,0 +1,68 @@
+import time
+import asyncio
+import argparse
+import typing as t
+
+from pudding import DiscordHTTPClient
+from pudding.http import Route
+from pudding.testing import FakeDiscord
+
+
+def _routes(count: int) -> t.Dict[str, float]:
+    start = time.perf_counter()
+
+    for i in range(count):
+        Route("GET", "/guilds/{guild_id}/emojis/{emoji_id}", guild_id=i, emoji_id=i).url
+
+    elapsed = time.perf_counter() - start
+    return {"routes_per_sec": count / elapsed, "us_per_route": elapsed / count * 1e6}
+
+
+async def _requests(count: int) -> t.Dict[str, float]:
+    async with FakeDiscord(rate_limit=10 ** 9) as fake:
+        http = DiscordHTTPClient(fake.token)
+        route = Route("GET", "/voice/regions")
+        headers = {"Authorization": "Bot " + fake.token}
+
+        try:
+            await http.get_voice_regions()
+
+            # the same calls made with the bare session, without pudding
+            start = time.perf_counter()
+            for _ in range(count):
+                async with http.session.get(route.url, headers=headers) as response:
+                    await response.json()
+            raw = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for _ in range(count):
+                await http.request(route)
+            client = time.perf_counter() - start
+        finally:
+            await http.close()
+
+    return {
+        "requests_per_sec": count / client,
+        "us_per_request": client / count * 1e6,
+        "us_overhead_per_request": (client - raw) / count * 1e6,
+    }
+
+
+def run(count: int = 2000) -> t.Dict[str, t.Dict[str, float]]:
+    return {
+        "route": _routes(count * 50),
+        "request": asyncio.run(_requests(count)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Route construction and request overhead")
+    parser.add_argument("--count", type=int, default=2000)
+    args = parser.parse_args()
+
+    for name, result in run(args.count).items():
+        print(f"{name:<10} " + " ".join(f"{v:>12,.1f} {k}" for k, v in result.items()))
+
+
+if __name__ == "__main__":
+    main()
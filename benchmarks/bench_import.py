@@ -0,0 +1,83 @@
+import re
+import sys
+import argparse
+import statistics
+import subprocess
+import typing as t
+
+# what short-lived workers and tools import
+STATEMENTS = {
+    "pudding": "import pudding",
+    "types": "from pudding import types; types.Guild",
+    "metrics": "from pudding import Metrics",
+    "bot": "from pudding import Bot",
+}
+
+# import time: self [us] | cumulative | imported package
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def importtime(statement: str) -> t.Dict[str, t.Tuple[int, int]]:
+    """Runs `statement` in a fresh interpreter with `-X importtime`.
+
+    Returns the self and cumulative microseconds of each module imported.
+    """
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True, text=True, check=True,
+    )
+
+    modules = {}
+
+    for line in out.stderr.splitlines():
+        match = _LINE.match(line)
+        if match is not None:
+            modules[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+
+    return modules
+
+
+def _total(modules: t.Dict[str, t.Tuple[int, int]]) -> int:
+    return sum(self for self, _ in modules.values())
+
+
+def run(rounds: int) -> t.Dict[str, t.Dict[str, float]]:
+    """Measures the import time of each statement, the median of `rounds`."""
+    results = {}
+
+    for name, statement in STATEMENTS.items():
+        runs = [importtime(statement) for _ in range(rounds)]
+        last = runs[-1]
+
+        results[name] = {
+            "total_ms": statistics.median(_total(modules) for modules in runs) / 1000,
+            "pudding_ms": statistics.median(
+                sum(self for module, (self, _) in modules.items() if module.startswith("pudding"))
+                for modules in runs
+            ) / 1000,
+            "modules": float(len(last)),
+            "aiohttp": float("aiohttp" in last),
+        }
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import time of pudding, from `python -X importtime`")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--top", type=int, default=0, help="also show the slowest modules imported by `Bot`")
+    args = parser.parse_args()
+
+    for name, result in run(args.rounds).items():
+        print(f"{name:<8} {result['total_ms']:>8.1f} ms {result['pudding_ms']:>8.1f} ms in pudding"
+              f" {result['modules']:>6.0f} modules aiohttp={bool(result['aiohttp'])}")
+
+    if args.top:
+        modules = importtime(STATEMENTS["bot"])
+
+        for module, (self, cumulative) in sorted(modules.items(), key=lambda i: -i[1][0])[:args.top]:
+            print(f"{self:>10,} us {cumulative:>10,} us  {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import gc
+import time
+import random
+import argparse
+import tracemalloc
+import typing as t
+
+from pudding import models
+from pudding.codec import JSON
+
+from . import corpus
+
+
+def _payloads(count: int) -> t.List[bytes]:
+    rng = random.Random(0)
+    return [JSON.dumps(corpus._user(rng)).encode("utf-8") for _ in range(count)]
+
+
+def _measure(build: t.Callable[[bytes], t.Any], frames: t.List[bytes]) -> t.Dict[str, float]:
+    gc.collect()
+    tracemalloc.start()
+
+    start = time.perf_counter()
+    objects = [build(frame) for frame in frames]
+    elapsed = time.perf_counter() - start
+
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del objects
+    return {
+        "bytes_per_entity": size / len(frames),
+        "entities_per_sec": len(frames) / elapsed,
+    }
+
+
+def _accessed(frame: bytes) -> models.User:
+    user = models.User(JSON.loads(frame))
+    user.username, user.discriminator, user.avatar, user.public_flags
+    return user
+
+
+def run(count: int = 100_000) -> t.Dict[str, t.Dict[str, float]]:
+    frames = _payloads(count)
+
+    return {
+        "dict": _measure(JSON.loads, frames),
+        "model": _measure(lambda frame: models.User(JSON.loads(frame)), frames),
+        "model-accessed": _measure(_accessed, frames),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Memory of cached users, dicts vs models")
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+
+    for name, result in run(args.count).items():
+        print(f"{name:<16} {result['bytes_per_entity']:>8.0f} bytes/user {result['entities_per_sec']:>12,.0f} users/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import gc
+import time
+import argparse
+import tracemalloc
+import typing as t
+
+from pudding import State
+from pudding.codec import JSON
+
+from . import corpus
+
+
+def _measure(frames: t.List[t.Tuple[str, str]], models: bool) -> t.Dict[str, float]:
+    gc.collect()
+    tracemalloc.start()
+
+    state = State(models=models)
+    start = time.perf_counter()
+
+    for name, frame in frames:
+        state(name, JSON.loads(frame))
+
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    cached = {kind: len(getattr(state, kind)) for kind in ("guilds", "channels", "users")}
+    total = sum(cached.values()) or 1
+
+    return {
+        "events_per_sec": len(frames) / elapsed,
+        "bytes": size,
+        "bytes_per_entity": size / total,
+        **{f"cached_{kind}": float(count) for kind, count in cached.items()},
+    }
+
+
+def run(payloads: t.List[t.Any]) -> t.Dict[str, t.Dict[str, float]]:
+    """Feeds the payloads to a `State`, caching payloads and then models,
+    and measures what it keeps."""
+    frames = [(payload['t'], JSON.dumps(payload['d'])) for payload in payloads]
+
+    return {
+        "state": _measure(frames, False),
+        "state_models": _measure(frames, True),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Memory of the payloads cached by State")
+    parser.add_argument("--corpus", help="JSON lines file of recorded payloads")
+    parser.add_argument("--count", type=int, default=1000)
+    args = parser.parse_args()
+
+    for name, result in run(corpus.load(args.corpus, args.count)).items():
+        print(f"{name:<12} " + " ".join(f"{v:>14,.0f} {k}" for k, v in result.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import json
+import random
+import typing as t
+
+__all__ = (
+    "load",
+    "generate",
+)
+
+_EPOCH_ID = 800_000_000_000_000_000
+
+
+def _snowflake(rng: random.Random) -> str:
+    return str(_EPOCH_ID + rng.randrange(1 << 40))
+
+
+def _user(rng: random.Random) -> t.Dict[str, t.Any]:
+    return {
+        "id": _snowflake(rng),
+        "username": "user%d" % rng.randrange(10_000),
+        "discriminator": "%04d" % rng.randrange(10_000),
+        "avatar": "%032x" % rng.getrandbits(128),
+        "public_flags": rng.choice((0, 64, 128, 256)),
+    }
+
+
+def _message_create(rng: random.Random, seq: int) -> t.Dict[str, t.Any]:
+    return {
+        "t": "MESSAGE_CREATE",
+        "s": seq,
+        "op": 0,
+        "d": {
+            "id": _snowflake(rng),
+            "channel_id": _snowflake(rng),
+            "guild_id": _snowflake(rng),
+            "author": _user(rng),
+            "content": "pudding " * rng.randrange(1, 30),
+            "timestamp": "2021-08-20T12:00:00.000000+00:00",
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": [],
+            "pinned": False,
+            "type": 0,
+        },
+    }
+
+
+def _presence_update(rng: random.Random, seq: int) -> t.Dict[str, t.Any]:
+    return {
+        "t": "PRESENCE_UPDATE",
+        "s": seq,
+        "op": 0,
+        "d": {
+            "user": {"id": _snowflake(rng)},
+            "guild_id": _snowflake(rng),
+            "status": rng.choice(("online", "idle", "dnd", "offline")),
+            "activities": [{"name": "pudding", "type": 0, "created_at": 1629460800000}],
+            "client_status": {"desktop": "online"},
+        },
+    }
+
+
+def _guild_create(rng: random.Random, seq: int) -> t.Dict[str, t.Any]:
+    guild_id = _snowflake(rng)
+    members = [
+        {"user": _user(rng), "roles": [], "joined_at": "2021-08-20T12:00:00.000000+00:00", "deaf": False, "mute": False}
+        for _ in range(rng.randrange(50, 250))
+    ]
+    channels = [
+        {"id": _snowflake(rng), "type": 0, "name": "channel-%d" % i, "position": i, "permission_overwrites": []}
+        for i in range(rng.randrange(5, 40))
+    ]
+
+    return {
+        "t": "GUILD_CREATE",
+        "s": seq,
+        "op": 0,
+        "d": {
+            "id": guild_id,
+            "name": "guild %s" % guild_id,
+            "icon": None,
+            "owner_id": members[0]["user"]["id"],
+            "member_count": len(members),
+            "members": members,
+            "channels": channels,
+            "roles": [{"id": guild_id, "name": "@everyone", "permissions": "104324673", "position": 0}],
+            "emojis": [],
+            "stickers": [],
+            "large": False,
+        },
+    }
+
+
+_KINDS = (
+    (_message_create, 60),
+    (_presence_update, 38),
+    (_guild_create, 2),
+)
+
+
+def generate(count: int = 1000, *, seed: int = 0) -> t.List[t.Dict[str, t.Any]]:
+    """Returns `count` deterministic dispatch payloads shaped like real traffic."""
+    rng = random.Random(seed)
+    kinds, weights = zip(*_KINDS)
+
+    return [
+        rng.choices(kinds, weights)[0](rng, seq)
+        for seq in range(1, count + 1)
+    ]
+
+
+def load(path: t.Optional[str] = None, count: int = 1000) -> t.List[t.Dict[str, t.Any]]:
+    """Loads recorded payloads from a JSON lines file, or generates them."""
+    if path is None:
+        return generate(count)
+
+    with open(path, encoding="utf-8") as fp:
+        return [json.loads(line) for line in fp if line.strip()]
@@ -1,12 +1,56 @@
-from .bot import Bot
-from . import types, errors
-from .http import DiscordHTTPClient
-from .gateway import DiscordWebSocket
-
-__all__ = (
-    "Bot",
-    "types",
-    "errors",
-    "DiscordHTTPClient",
-    "DiscordWebSocket",
-)
+import importlib
+import typing as t
+
+# Where each public name lives. Submodules, and aiohttp with them, are
+# only imported when one of their names is first used.
+_EXPORTS = {
+    "Bot": "bot",
+    "Dispatcher": "dispatcher",
+    "types": "types",
+    "errors": "errors",
+    "File": "file",
+    "DiscordHTTPClient": "http",
+    "DiscordWebSocket": "gateway",
+    "ShardManager": "shard",
+    "State": "state",
+    "Metrics": "metrics",
+    "ResponseCache": "httpcache",
+    "RetryPolicy": "retry",
+    "SpanRecorder": "tracing",
+    "Tracer": "tracing",
+    "Transport": "transport",
+}
+
+__all__ = tuple(_EXPORTS)
+
+if t.TYPE_CHECKING:
+    from .bot import Bot
+    from .dispatcher import Dispatcher
+    from . import types, errors
+    from .file import File
+    from .http import DiscordHTTPClient
+    from .httpcache import ResponseCache
+    from .metrics import Metrics
+    from .retry import RetryPolicy
+    from .gateway import DiscordWebSocket
+    from .shard import ShardManager
+    from .state import State
+    from .tracing import SpanRecorder, Tracer
+    from .transport import Transport
+
+
+def __getattr__(name: str) -> t.Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = importlib.import_module("." + module, __name__)
+    if module != name:
+        value = getattr(value, name)
+
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> t.List[str]:
+    return sorted({*globals(), *_EXPORTS})
@@ -2,8 +2,14 @@ import asyncio
 import typing as t
 
 from .http import DiscordHTTPClient
+from .dispatcher import Dispatcher, Handler
 from .gateway import DiscordWebSocket
-from . import errors, utils
+from .metrics import Metrics
+from .shard import ShardManager
+from .state import State
+from .tracing import Tracer
+from .transport import Transport
+from . import utils
 
 
 class Bot:
@@ -12,27 +18,74 @@ class Bot:
 
         "loop",
         "http",
-        "gtws",
+        "dispatcher",
+        "state",
+        "shards",
+        "shard_ids",
+        "shard_count",
+        "skip_unhandled_events",
+        "record",
+        "metrics",
+        "tracer",
+        "session_file",
         "token",
 
         "_extensions",
         "_closed",
     )
 
-    def __init__(self, intents: t.Optional[int] = None) -> None:
+    def __init__(
+        self,
+        intents: t.Optional[int] = None,
+        *,
+        shard_ids: t.Optional[t.Iterable[int]] = None,
+        shard_count: t.Optional[int] = None,
+        transport: t.Optional[Transport] = None,
+        dispatcher: t.Optional[Dispatcher] = None,
+        state: t.Optional[State] = None,
+        skip_unhandled_events: bool = False,
+        record: t.Optional[str] = None,
+        metrics: t.Optional[Metrics] = None,
+        tracer: t.Optional[Tracer] = None,
+        session_file: t.Optional[str] = None,
+    ) -> None:
         self.intents = intents
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.skip_unhandled_events = skip_unhandled_events
+        self.record = record
+        self.metrics = metrics
+        self.tracer = tracer
+        self.session_file = session_file
 
         self.loop = asyncio.get_event_loop()
-        self.http: DiscordHTTPClient = DiscordHTTPClient()
-        self.gtws: t.Optional[DiscordWebSocket] = None
+        self.state = state or State()
+        self.http: DiscordHTTPClient = DiscordHTTPClient(
+            transport=transport,
+            state=self.state,
+            metrics=metrics,
+            tracer=tracer,
+        )
+        self.dispatcher = dispatcher or Dispatcher(tracer=tracer)
+        self.shards: t.Optional[ShardManager] = None
         self.token: t.Optional[str] = None
 
         self._extensions = {}
         self._closed = False
 
+    @property
+    def gtws(self) -> t.Optional[DiscordWebSocket]:
+        """The websocket of the first shard."""
+        if self.shards:
+            return next(iter(self.shards), None)
+
     def is_closed(self) -> bool:
         return self._closed
 
+    def listen(self, name: t.Optional[str] = None) -> t.Callable[[Handler], Handler]:
+        """Registers the decorated coroutine function as an event handler."""
+        return self.dispatcher.listen(name)
+
     def load_extension(self, extension: str, /) -> None:
         pass
 
@@ -63,39 +116,49 @@ class Bot:
             return future.result()
 
     async def start(self) -> None:
-        """Creates a `DiscordHTTPClient` session."""
-        self.http = DiscordHTTPClient(self.token)
-
-    async def connect(self) -> t.NoReturn:
-        """Creates a `DiscordWebSocket` connection."""
-        gateway = await self.http.get_bot_gateway()
-
-        self.gtws = DiscordWebSocket(
-            token=self.token,
-            intents=self.intents,
-            gateway=gateway,
-            dispatcher=self._dispatcher,
+        """Authenticates the `DiscordHTTPClient` and warms up its session."""
+        self.http.token = self.token
+        await self.http.warm_up()
+
+    async def connect(self) -> None:
+        """Connects every shard of the bot to the Gateway."""
+        assert self.token
+
+        self.shards = ShardManager(
+            self.http,
+            self.token,
+            self.intents,  # type: ignore
+            self.dispatch,
+            shard_ids=self.shard_ids,
+            shard_count=self.shard_count,
+            event_filter=self.handles if self.skip_unhandled_events else None,
+            record=self.record,
+            metrics=self.metrics,
+            tracer=self.tracer,
+            session_file=self.session_file,
         )
 
-        await self.gtws.connect()
+        await self.shards.run()
 
-        while True:
-            try:
-                await self.gtws.poll_event()
-            except errors.ReconnectWebSocket:
-                await self.gtws.connect(resume=True)
+    def handles(self, name: str) -> bool:
+        """Whether an event is used by the `State` or by a handler."""
+        return self.state.handles(name) or self.dispatcher.has_handlers(name)
 
-    def _dispatcher(self, name: str, payload: dict) -> None:
-        print(name, len(payload))
+    def dispatch(self, name: str, payload: t.Any) -> t.Optional[t.Awaitable[None]]:
+        """Updates the `State` with an event, then dispatches it."""
+        self.state(name, payload)
+        return self.dispatcher(name, payload)
 
     async def close(self) -> None:
         if self._closed:
             return
 
+        if self.shards:
+            await self.shards.close()
+
+        self.dispatcher.close()
+
         with utils.suppress_all():
             await self.http.close()
 
-        if self.gtws:
-            await self.gtws.close()
-
         self._closed = True
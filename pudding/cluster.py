@@ -0,0 +1,488 @@
+import os
+import struct
+import asyncio
+import tempfile
+import multiprocessing
+import typing as t
+
+from . import errors, utils
+from .codec import JSON
+from .http import DiscordHTTPClient, Route
+from .shard import IdentifyScheduler, ShardManager
+from .transport import Transport
+from .types import GatewayBotPayload
+
+if t.TYPE_CHECKING:
+    from .bot import Bot
+
+__all__ = (
+    "Cluster",
+    "ClusterClient",
+    "RemoteHTTPClient",
+)
+
+_HEADER = struct.Struct(">I")
+
+# Seconds the workers get to close their shards and save their sessions.
+_SHUTDOWN_TIMEOUT = 10.0
+
+
+class IPCChannel:
+    """Length prefixed JSON messages over a stream."""
+
+    __slots__ = ("reader", "writer")
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    async def send(self, message: t.Dict[str, t.Any]) -> None:
+        data = JSON.dumps(message).encode("utf-8")
+
+        self.writer.write(_HEADER.pack(len(data)) + data)
+        await self.writer.drain()
+
+    async def receive(self) -> t.Dict[str, t.Any]:
+        (size,) = _HEADER.unpack(await self.reader.readexactly(_HEADER.size))
+        return JSON.loads(await self.reader.readexactly(size))
+
+    async def close(self) -> None:
+        self.writer.close()
+
+        with utils.suppress_all(ConnectionError):
+            await self.writer.wait_closed()
+
+
+class ClusterClient:
+    """The worker side of the IPC channel with the `Cluster` process."""
+
+    __slots__ = ("channel", "on_shutdown", "_waiters", "_next_id", "_reader")
+
+    def __init__(self, channel: IPCChannel) -> None:
+        self.channel = channel
+        self.on_shutdown: t.Optional[t.Callable[[], t.Any]] = None
+
+        self._waiters: t.Dict[int, asyncio.Future] = {}
+        self._next_id = 0
+        self._reader = asyncio.ensure_future(self._read_loop())
+
+    @classmethod
+    async def connect(cls, path: str) -> "ClusterClient":
+        reader, writer = await asyncio.open_unix_connection(path)
+        return cls(IPCChannel(reader, writer))
+
+    async def call(self, op: str, **fields: t.Any) -> t.Any:
+        """Sends a request to the cluster process and waits for its reply."""
+        self._next_id += 1
+        id_ = self._next_id
+
+        future = self._waiters[id_] = asyncio.get_running_loop().create_future()
+
+        try:
+            await self.channel.send({"op": op, "id": id_, **fields})
+            return await future
+        finally:
+            self._waiters.pop(id_, None)
+
+    async def send_event(self, name: str, data: t.Any) -> None:
+        await self.channel.send({"op": "event", 't': name, 'd': data})
+
+    async def identify(self, shard_id: int) -> None:
+        await self.call("identify", shard_id=shard_id)
+
+    async def _read_loop(self) -> None:
+        while True:
+            try:
+                message = await self.channel.receive()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+
+            if message.get("op") == "shutdown":
+                if self.on_shutdown is not None:
+                    self.on_shutdown()
+                continue
+
+            future = self._waiters.get(message.get("id"))  # type: ignore
+            if future is None or future.done():
+                continue
+
+            error = message.get("error")
+            if error is None:
+                future.set_result(message.get("result"))
+                continue
+
+            exc_type = getattr(errors, error, None)
+            if not (isinstance(exc_type, type) and issubclass(exc_type, errors.PuddingError)):
+                exc_type = errors.PuddingError
+
+            if issubclass(exc_type, errors.HTTPException):
+                exc = exc_type(
+                    message.get("message"),
+                    status=message.get("status"),
+                    code=message.get("code"),
+                    body=message.get("body"),
+                    retry_after=message.get("retry_after"),
+                )
+            else:
+                exc = exc_type(message.get("message"))
+
+            future.set_exception(exc)
+
+        for future in self._waiters.values():
+            if not future.done():
+                future.set_exception(ConnectionError("cluster connection lost"))
+
+    async def close(self) -> None:
+        self._reader.cancel()
+        await self.channel.close()
+
+
+class RemoteIdentifyScheduler:
+    """Asks the `Cluster` process for permission to IDENTIFY."""
+
+    __slots__ = ("client",)
+
+    def __init__(self, client: ClusterClient) -> None:
+        self.client = client
+
+    async def acquire(self, shard_id: int) -> None:
+        await self.client.identify(shard_id)
+
+
+class RemoteHTTPClient(DiscordHTTPClient):
+    """Forwards every request to the `Cluster` process.
+
+    All workers share the rate limits of the cluster process this way.
+    Only JSON serializable request arguments can be forwarded, uploads
+    are sent by the worker.
+    """
+
+    __slots__ = ("client",)
+
+    def __init__(self, client: ClusterClient, token: t.Optional[str] = None, **kwargs: t.Any) -> None:
+        super().__init__(token, **kwargs)
+        self.client = client
+
+    async def _request(
+        self,
+        route: Route,
+        *,
+        reason: t.Optional[str] = None,
+        **kwargs: t.Any,
+    ) -> t.Any:
+        if "files" in kwargs or "data" in kwargs:
+            # uploads can't be forwarded, the worker sends them itself
+            return await super()._request(route, reason=reason, **kwargs)
+
+        return await self.client.call(
+            "request",
+            method=route.method,
+            path=route.template,
+            params=route.params,
+            auth=route.auth,
+            reason=reason,
+            kwargs=kwargs,
+        )
+
+
+class Cluster:
+    """Spreads the shards of a bot across worker processes.
+
+    The cluster process owns the `DiscordHTTPClient` and the
+    `IdentifyScheduler`. Every worker builds its `Bot` with `factory`,
+    which must be picklable, and runs a contiguous range of shards. The
+    workers ask the cluster for their IDENTIFY turns over a unix socket,
+    forward their REST requests and the `forward_events` to it.
+    """
+
+    __slots__ = (
+        "factory",
+        "token",
+        "processes",
+        "shard_count",
+        "forward_events",
+        "forward_requests",
+        "on_event",
+
+        "http",
+        "scheduler",
+        "_path",
+        "_workers",
+        "_channels",
+        "_tasks",
+    )
+
+    def __init__(
+        self,
+        factory: t.Callable[[], "Bot"],
+        token: str,
+        *,
+        processes: t.Optional[int] = None,
+        shard_count: t.Optional[int] = None,
+        forward_events: t.Iterable[str] = (),
+        forward_requests: bool = True,
+        on_event: t.Optional[t.Callable[[str, t.Any], t.Any]] = None,
+        transport: t.Optional[Transport] = None,
+    ) -> None:
+        self.factory = factory
+        self.token = token
+        self.processes = processes or os.cpu_count() or 1
+        self.shard_count = shard_count
+        self.forward_events = frozenset(forward_events)
+        self.forward_requests = forward_requests
+        self.on_event = on_event
+
+        self.http = DiscordHTTPClient(token, transport=transport)
+        self.scheduler: t.Optional[IdentifyScheduler] = None
+        self._path: t.Optional[str] = None
+        self._workers: t.List[multiprocessing.process.BaseProcess] = []
+        self._channels: t.Set[IPCChannel] = set()
+        # the loop only keeps weak references to tasks
+        self._tasks: t.Set[asyncio.Future] = set()
+
+    def shard_ranges(self, shard_count: int) -> t.List[range]:
+        """Splits the shards in at most `processes` contiguous ranges."""
+        size, extra = divmod(shard_count, self.processes)
+        ranges = []
+        start = 0
+
+        for i in range(self.processes):
+            stop = start + size + (i < extra)
+            if stop > start:
+                ranges.append(range(start, stop))
+            start = stop
+
+        return ranges
+
+    def run(self) -> None:
+        loop = asyncio.get_event_loop()
+
+        try:
+            loop.run_until_complete(self.start())
+        finally:
+            loop.run_until_complete(self.close())
+
+    async def start(self) -> None:
+        gateway = await self.http.get_bot_gateway()
+
+        if self.shard_count is None:
+            self.shard_count = gateway["shards"]
+
+        self.scheduler = IdentifyScheduler(gateway["session_start_limit"])
+        self._path = os.path.join(tempfile.mkdtemp(prefix="pudding-"), "cluster.sock")
+
+        server = await asyncio.start_unix_server(self._handle_worker, self._path)
+        context = multiprocessing.get_context("spawn")
+
+        for shard_ids in self.shard_ranges(self.shard_count):
+            worker = context.Process(
+                target=_run_worker,
+                args=(
+                    self.factory,
+                    self._path,
+                    self.token,
+                    list(shard_ids),
+                    self.shard_count,
+                    gateway,
+                    tuple(self.forward_events),
+                    self.forward_requests,
+                ),
+                daemon=True,
+            )
+
+            worker.start()
+            self._workers.append(worker)
+
+        loop = asyncio.get_running_loop()
+
+        try:
+            await asyncio.gather(*(
+                loop.run_in_executor(None, worker.join) for worker in self._workers
+            ))
+        finally:
+            server.close()
+
+    async def close(self, *, timeout: float = _SHUTDOWN_TIMEOUT) -> None:
+        """Asks the workers to close their bots, so their sessions are
+        saved, and terminates the ones still running after `timeout`.
+        """
+        for channel in list(self._channels):
+            with utils.suppress_all(ConnectionError):
+                await channel.send({"op": "shutdown"})
+
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(None, worker.join, timeout) for worker in self._workers
+        ))
+
+        for worker in self._workers:
+            if worker.is_alive():
+                worker.terminate()
+
+        await self.http.close()
+
+        if self._path:
+            with utils.suppress_all(OSError):
+                os.unlink(self._path)
+                os.rmdir(os.path.dirname(self._path))
+
+            self._path = None
+
+    async def _handle_worker(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        channel = IPCChannel(reader, writer)
+        self._channels.add(channel)
+
+        while True:
+            try:
+                message = await channel.receive()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+
+            if message["op"] == "event":
+                if self.on_event:
+                    self.on_event(message['t'], message['d'])
+                continue
+
+            task = asyncio.ensure_future(self._reply(channel, message))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        self._channels.discard(channel)
+        await channel.close()
+
+    async def _reply(self, channel: IPCChannel, message: t.Dict[str, t.Any]) -> None:
+        op = message["op"]
+        reply: t.Dict[str, t.Any] = {"op": "reply", "id": message["id"]}
+
+        try:
+            if op == "identify":
+                assert self.scheduler
+                await self.scheduler.acquire(message["shard_id"])
+                result = None
+
+            elif op == "request":
+                route = Route(
+                    message["method"],
+                    message["path"],
+                    auth=message["auth"],
+                    **message["params"],
+                )
+                result = await self.http.request(
+                    route,
+                    reason=message["reason"],
+                    **message["kwargs"],
+                )
+
+            else:
+                raise errors.PuddingError(f"unknown cluster operation {op!r}")
+
+        except Exception as e:
+            # the worker waits for a reply, whatever went wrong
+            reply["error"] = type(e).__name__ if isinstance(e, errors.PuddingError) else "PuddingError"
+            reply["message"] = str(e)
+
+            if isinstance(e, errors.HTTPException):
+                reply["status"] = e.status
+                reply["code"] = e.code
+                reply["body"] = e.body
+                reply["retry_after"] = e.retry_after
+        else:
+            reply["result"] = result
+
+        with utils.suppress_all(ConnectionError):
+            await channel.send(reply)
+
+
+def _run_worker(
+    factory: t.Callable[[], "Bot"],
+    path: str,
+    token: str,
+    shard_ids: t.List[int],
+    shard_count: int,
+    gateway: GatewayBotPayload,
+    forward_events: t.Tuple[str, ...],
+    forward_requests: bool,
+) -> None:
+    bot = factory()
+    bot.token = token
+
+    bot.loop.run_until_complete(_worker_main(
+        bot, path, shard_ids, shard_count, gateway, frozenset(forward_events), forward_requests,
+    ))
+
+
+async def _worker_main(
+    bot: "Bot",
+    path: str,
+    shard_ids: t.List[int],
+    shard_count: int,
+    gateway: GatewayBotPayload,
+    forward_events: t.FrozenSet[str],
+    forward_requests: bool,
+) -> None:
+    client = await ClusterClient.connect(path)
+
+    if forward_requests:
+        http = bot.http
+        bot.http = RemoteHTTPClient(
+            client,
+            bot.token,
+            transport=http.transport,
+            state=bot.state,
+            metrics=bot.metrics,
+            tracer=bot.tracer,
+        )
+
+        # the remote client closes the transport in place of the old one
+        bot.http._owns_transport = http._owns_transport
+        http._owns_transport = False
+        await http.close()
+    else:
+        bot.http.token = bot.token
+
+    dispatcher = bot.dispatch
+
+    if forward_events:
+        local = dispatcher
+
+        sending: t.Set[asyncio.Future] = set()
+
+        def dispatcher(name: str, payload: t.Any) -> t.Any:
+            if name in forward_events:
+                task = asyncio.ensure_future(client.send_event(name, payload))
+                sending.add(task)
+                task.add_done_callback(sending.discard)
+
+            return local(name, payload)
+
+    bot.shards = ShardManager(
+        bot.http,
+        bot.token,  # type: ignore
+        bot.intents,  # type: ignore
+        dispatcher,
+        shard_ids=shard_ids,
+        shard_count=shard_count,
+        event_filter=(
+            (lambda name: name in forward_events or bot.handles(name))
+            if bot.skip_unhandled_events else None
+        ),
+        record=bot.record,
+        metrics=bot.metrics,
+        tracer=bot.tracer,
+        session_file=bot.session_file,
+    )
+    bot.shards.scheduler = RemoteIdentifyScheduler(client)  # type: ignore
+    bot.shards.create_shards(gateway)
+
+    run = asyncio.ensure_future(bot.shards.run())
+    client.on_shutdown = run.cancel
+
+    try:
+        await run
+    except asyncio.CancelledError:
+        # asked by the cluster, the bot closes normally
+        if not run.cancelled():
+            raise
+    finally:
+        await bot.close()
+        await client.close()
@@ -0,0 +1,104 @@
+import json
+import typing as t
+
+__all__ = (
+    "JSONCodec",
+    "JSON",
+    "get_codec",
+)
+
+# Ordered by preference.
+_JSON_BACKENDS = ("orjson", "ujson", "json")
+
+
+def _orjson() -> t.Tuple[t.Callable[[t.Any], t.Any], t.Callable[[t.Any], str]]:
+    import orjson
+
+    def dumps(obj: t.Any) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+
+    return orjson.loads, dumps
+
+
+def _ujson() -> t.Tuple[t.Callable[[t.Any], t.Any], t.Callable[[t.Any], str]]:
+    import ujson
+
+    def loads(data: t.Any) -> t.Any:
+        if type(data) is memoryview:
+            data = data.tobytes()
+
+        return ujson.loads(data)
+
+    def dumps(obj: t.Any) -> str:
+        return ujson.dumps(obj, ensure_ascii=False)
+
+    return loads, dumps
+
+
+def _json() -> t.Tuple[t.Callable[[t.Any], t.Any], t.Callable[[t.Any], str]]:
+    def loads(data: t.Any) -> t.Any:
+        if type(data) is memoryview:
+            data = data.tobytes()
+
+        return json.loads(data)
+
+    def dumps(obj: t.Any) -> str:
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+
+    return loads, dumps
+
+
+_LOADERS = {
+    "orjson": _orjson,
+    "ujson": _ujson,
+    "json": _json,
+}
+
+
+class JSONCodec:
+    """Encodes and decodes JSON with the fastest installed backend.
+
+    `loads` accepts `bytes`, `bytearray`, `memoryview` and `str`, so
+    payloads never need to be decoded to text before being parsed.
+    """
+
+    __slots__ = ("name", "loads", "dumps")
+
+    encoding: t.ClassVar[str] = "json"
+    binary: t.ClassVar[bool] = False
+
+    def __init__(self, backend: t.Optional[str] = None) -> None:
+        if backend is not None:
+            if backend not in _LOADERS:
+                raise ValueError(f"unknown JSON backend {backend!r}")
+
+            self.name = backend
+            self.loads, self.dumps = _LOADERS[backend]()
+            return
+
+        for name in _JSON_BACKENDS:
+            try:
+                self.loads, self.dumps = _LOADERS[name]()
+            except ImportError:
+                continue
+
+            self.name = name
+            break
+
+    def __repr__(self) -> str:
+        return f"<JSONCodec backend={self.name!r}>"
+
+
+JSON = JSONCodec()
+
+
+def get_codec(encoding: str) -> t.Any:
+    """Returns the default codec of a Gateway `encoding`."""
+    if encoding == "json":
+        return JSON
+
+    if encoding == "etf":
+        from .etf import ETF
+        return ETF
+
+    raise ValueError(f"unknown encoding {encoding!r}")
@@ -0,0 +1,352 @@
+import time
+import asyncio
+import traceback
+import collections
+import typing as t
+
+from .tracing import Tracer, current_trace_id
+
+__all__ = (
+    "Dispatcher",
+    "EventQueue",
+    "Handler",
+)
+
+Handler = t.Callable[[t.Any], t.Awaitable[t.Any]]
+
+POLICIES = ("drop", "block", "spill")
+
+_DEFAULT_MAXSIZE = 1000
+_DEFAULT_CONCURRENCY = 8
+
+
+class EventQueue:
+    """A bounded queue of payloads of one event, drained by worker tasks.
+
+    When the queue is full, `policy` decides what happens to new payloads:
+    `"drop"` discards them, `"block"` makes the caller of `put` wait
+    for room and `"spill"` keeps them in an unbounded overflow that is
+    moved back to the queue as it drains. Callers still waiting when the
+    queue is closed are woken up and their payloads counted as dropped.
+
+    With a `tracer`, payloads are queued with the trace id of their frame
+    and `Tracer.handler_finished` is called once their handlers are done.
+    """
+
+    __slots__ = (
+        "name",
+        "handlers",
+        "policy",
+        "concurrency",
+        "tracer",
+
+        "dropped",
+        "spilled",
+        "_queue",
+        "_spill",
+        "_blocked",
+        "_workers",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        handlers: t.List[Handler],
+        *,
+        maxsize: int = _DEFAULT_MAXSIZE,
+        policy: str = "block",
+        concurrency: int = _DEFAULT_CONCURRENCY,
+        tracer: t.Optional[Tracer] = None,
+    ) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"unknown backpressure policy {policy!r}")
+
+        self.name = name
+        self.handlers = handlers
+        self.policy = policy
+        self.concurrency = concurrency
+        self.tracer = tracer
+
+        self.dropped = 0
+        self.spilled = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._spill: t.Deque[t.Any] = collections.deque()
+        self._blocked: t.Deque[t.Tuple[asyncio.Future, t.Any]] = collections.deque()
+        self._workers: t.List[asyncio.Task] = []
+
+    def __len__(self) -> int:
+        return self._queue.qsize() + len(self._spill)
+
+    def put(self, payload: t.Any) -> t.Optional[t.Awaitable[None]]:
+        """Queues `payload`, returns an awaitable if the caller must wait."""
+        if not self._workers:
+            self._start()
+
+        if self.tracer is not None:
+            payload = (current_trace_id.get(), payload)
+
+        if self._spill:
+            self._spill.append(payload)
+            self.spilled += 1
+            return None
+
+        # behind the callers already waiting
+        if self._blocked:
+            return self._block(payload)
+
+        try:
+            self._queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            if self.policy == "block":
+                return self._block(payload)
+
+            if self.policy == "drop":
+                self.dropped += 1
+            else:
+                self._spill.append(payload)
+                self.spilled += 1
+
+        return None
+
+    def _block(self, payload: t.Any) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._blocked.append((future, payload))
+        return future
+
+    def _refill(self) -> None:
+        if self._spill:
+            self._queue.put_nowait(self._spill.popleft())
+            return
+
+        while self._blocked:
+            future, payload = self._blocked.popleft()
+
+            # like `asyncio.Queue.put`, a cancelled caller doesn't queue
+            if not future.done():
+                self._queue.put_nowait(payload)
+                future.set_result(None)
+                return
+
+    def _start(self) -> None:
+        self._workers = [
+            asyncio.ensure_future(self._work()) for _ in range(self.concurrency)
+        ]
+
+    async def _work(self) -> None:
+        while True:
+            payload = await self._queue.get()
+            self._refill()
+
+            try:
+                if self.tracer is None:
+                    await self._run_handlers(payload)
+                else:
+                    await self._run_traced(*payload)
+            finally:
+                self._queue.task_done()
+
+    async def _run_handlers(self, payload: t.Any) -> t.Optional[Exception]:
+        if len(self.handlers) == 1:
+            coros = [self.handlers[0](payload)]
+        else:
+            coros = [handler(payload) for handler in self.handlers]
+
+        error = None
+
+        for result in await asyncio.gather(*coros, return_exceptions=True):
+            if isinstance(result, Exception):
+                traceback.print_exception(type(result), result, result.__traceback__)
+                error = error or result
+
+        return error
+
+    async def _run_traced(self, trace_id: t.Optional[int], payload: t.Any) -> None:
+        error = await self._run_handlers(payload)
+        self.tracer.handler_finished(trace_id, self.name, time.perf_counter(), error)  # type: ignore
+
+    async def join(self) -> None:
+        """Waits until every queued payload was handled."""
+        await self._queue.join()
+
+    async def drain(self) -> None:
+        """Handles the payloads left, the ones of waiting callers too,
+        then closes the queue."""
+        # the spill and the waiting callers refill the queue as it is
+        # drained, so they are empty once it is
+        await self._queue.join()
+        self.close()
+
+    def close(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+
+        self._workers = []
+
+        while self._blocked:
+            future, _ = self._blocked.popleft()
+
+            if not future.done():
+                future.set_result(None)
+                self.dropped += 1
+
+
+class Dispatcher:
+    """Runs the async handlers registered for Gateway events.
+
+    Calling the dispatcher with an event never runs user code directly:
+    the payload is put in the bounded `EventQueue` of the event and its
+    handlers run concurrently in the queue's worker tasks.
+    """
+
+    __slots__ = (
+        "maxsize",
+        "policy",
+        "concurrency",
+        "tracer",
+
+        "_handlers",
+        "_queues",
+        "_options",
+        "_draining",
+    )
+
+    def __init__(
+        self,
+        *,
+        maxsize: int = _DEFAULT_MAXSIZE,
+        policy: str = "block",
+        concurrency: int = _DEFAULT_CONCURRENCY,
+        tracer: t.Optional[Tracer] = None,
+    ) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"unknown backpressure policy {policy!r}")
+
+        self.maxsize = maxsize
+        self.policy = policy
+        self.concurrency = concurrency
+        self.tracer = tracer
+
+        self._handlers: t.Dict[str, t.List[Handler]] = {}
+        self._queues: t.Dict[str, EventQueue] = {}
+        self._options: t.Dict[str, t.Dict[str, t.Any]] = {}
+        self._draining: t.Dict[asyncio.Future, EventQueue] = {}
+
+    def __call__(self, name: str, payload: t.Any) -> t.Optional[t.Awaitable[None]]:
+        queue = self._queues.get(name)
+
+        if queue is None:
+            if name not in self._handlers:
+                return None
+
+            queue = self._queues[name] = EventQueue(
+                name,
+                self._handlers[name],
+                **self._queue_options(name),
+            )
+
+        return queue.put(payload)
+
+    def _queue_options(self, name: str) -> t.Dict[str, t.Any]:
+        options = {
+            "maxsize": self.maxsize,
+            "policy": self.policy,
+            "concurrency": self.concurrency,
+            "tracer": self.tracer,
+        }
+        options.update(self._options.get(name, {}))
+
+        return options
+
+    def configure(
+        self,
+        name: str,
+        *,
+        maxsize: t.Optional[int] = None,
+        policy: t.Optional[str] = None,
+        concurrency: t.Optional[int] = None,
+    ) -> None:
+        """Overrides the queue options of one event."""
+        if policy is not None and policy not in POLICIES:
+            raise ValueError(f"unknown backpressure policy {policy!r}")
+
+        options = self._options.setdefault(name, {})
+
+        for key, value in (("maxsize", maxsize), ("policy", policy), ("concurrency", concurrency)):
+            if value is not None:
+                options[key] = value
+
+        self._retire(name)
+
+    def _retire(self, name: str) -> None:
+        # new payloads go to a new queue, the ones already in this one
+        # are still handled before its workers stop
+        queue = self._queues.pop(name, None)
+        if queue is None:
+            return
+
+        try:
+            task = asyncio.get_running_loop().create_task(queue.drain())
+        except RuntimeError:
+            queue.close()
+            return
+
+        self._draining[task] = queue
+        task.add_done_callback(self._draining.pop)
+
+    def has_handlers(self, name: str) -> bool:
+        return name in self._handlers
+
+    def add_handler(self, name: str, handler: Handler) -> None:
+        if not asyncio.iscoroutinefunction(handler):
+            raise TypeError("event handlers must be coroutine functions")
+
+        handlers = self._handlers.get(name)
+        if handlers is None:
+            handlers = self._handlers[name] = []
+
+        handlers.append(handler)
+
+    def remove_handler(self, name: str, handler: Handler) -> None:
+        handlers = self._handlers.get(name)
+        if not handlers or handler not in handlers:
+            return
+
+        handlers.remove(handler)
+
+        if not handlers:
+            del self._handlers[name]
+            self._retire(name)
+
+    def listen(self, name: t.Optional[str] = None) -> t.Callable[[Handler], Handler]:
+        """Registers the decorated coroutine function as an event handler.
+
+        Without a `name`, it is taken from the function name, so
+        `on_message_create` handles `MESSAGE_CREATE`.
+        """
+        def decorator(func: Handler) -> Handler:
+            event = name
+
+            if event is None:
+                event = func.__name__
+                if event.startswith("on_"):
+                    event = event[3:]
+
+                event = event.upper()
+
+            self.add_handler(event, func)
+            return func
+
+        return decorator
+
+    def queue(self, name: str) -> t.Optional[EventQueue]:
+        return self._queues.get(name)
+
+    def close(self) -> None:
+        for queue in self._queues.values():
+            queue.close()
+
+        for task, queue in list(self._draining.items()):
+            task.cancel()
+            queue.close()
+
+        self._queues.clear()
@@ -1,8 +1,64 @@
+import typing as t
+
+if t.TYPE_CHECKING:
+    from .http import Route
+
+
 class PuddingError(Exception):
     pass
 
 
 class HTTPException(PuddingError):
+    """A request that Discord did not fulfill.
+
+    `status` is `None` when no response was received. `code` and `body`
+    are the Discord error code and the decoded error body, `elapsed` the
+    seconds spent across all the `attempts` of the request.
+    """
+
+    def __init__(
+        self,
+        message: t.Optional[str] = None,
+        *,
+        status: t.Optional[int] = None,
+        code: t.Optional[int] = None,
+        body: t.Any = None,
+        route: t.Optional["Route"] = None,
+        retry_after: t.Optional[float] = None,
+        elapsed: t.Optional[float] = None,
+        attempts: int = 1,
+    ) -> None:
+        self.status = status
+        self.code = code
+        self.body = body
+        self.route = route
+        self.retry_after = retry_after
+        self.elapsed = elapsed
+        self.attempts = attempts
+
+        if message is None:
+            message = self._format()
+
+        super().__init__(message)
+
+    def _format(self) -> str:
+        message = "" if self.status is None else str(self.status)
+
+        if self.route is not None:
+            message += f" on {self.route.method} {self.route.path}"
+
+        if self.code is not None:
+            message += f" (error code: {self.code})"
+
+        if isinstance(self.body, dict) and self.body.get("message"):
+            message += f": {self.body['message']}"
+        elif isinstance(self.body, str) and self.body:
+            message += f": {self.body}"
+
+        return message.strip()
+
+
+class Forbidden(HTTPException):
     pass
 
 
@@ -10,6 +66,14 @@ class NotFound(HTTPException):
     pass
 
 
+class RateLimited(HTTPException):
+    pass
+
+
+class ServerError(HTTPException):
+    pass
+
+
 class GatewayError(PuddingError):
     pass
 
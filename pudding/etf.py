@@ -0,0 +1,348 @@
+import zlib
+import struct
+import typing as t
+
+__all__ = (
+    "ETFError",
+    "ETFCodec",
+    "ETF",
+    "decode",
+    "encode",
+)
+
+# https://www.erlang.org/doc/apps/erts/erl_ext_dist.html
+# https://discord.com/developers/docs/topics/gateway#etf-erlang-term-format
+
+VERSION = 131
+
+NEW_FLOAT_EXT = 70
+COMPRESSED = 80
+SMALL_INTEGER_EXT = 97
+INTEGER_EXT = 98
+FLOAT_EXT = 99
+ATOM_EXT = 100
+SMALL_TUPLE_EXT = 104
+LARGE_TUPLE_EXT = 105
+NIL_EXT = 106
+STRING_EXT = 107
+LIST_EXT = 108
+BINARY_EXT = 109
+SMALL_BIG_EXT = 110
+LARGE_BIG_EXT = 111
+MAP_EXT = 116
+SMALL_ATOM_EXT = 115
+ATOM_UTF8_EXT = 118
+SMALL_ATOM_UTF8_EXT = 119
+
+_INT32_MIN = -(1 << 31)
+_INT32_MAX = (1 << 31) - 1
+
+_ATOMS: t.Dict[str, t.Any] = {
+    "nil": None,
+    "true": True,
+    "false": False,
+}
+
+_u16 = struct.Struct(">H").unpack_from
+_u32 = struct.Struct(">I").unpack_from
+_i32 = struct.Struct(">i").unpack_from
+_f64 = struct.Struct(">d").unpack_from
+
+
+class ETFError(ValueError):
+    pass
+
+
+# Decoding
+#
+# Binaries and atoms are decoded to `str` and lists of small integers,
+# which Erlang sends as strings, to lists. Discord sends snowflakes as
+# integers over ETF but as strings over JSON, so the integers of `id`,
+# `*_id`, `*_ids` and the role lists become strings. Other integers, like
+# millisecond timestamps, stay integers. This way the decoded payloads
+# are the same ones that JSON produces.
+
+_SNOWFLAKE_LISTS = frozenset(("roles", "mention_roles"))
+
+
+def _atom(name: str) -> t.Any:
+    return _ATOMS.get(name, name)
+
+
+def _snowflakes(key: t.Any, value: t.Any) -> t.Any:
+    type_ = type(value)
+
+    if type_ is int:
+        if key == "id" or type(key) is str and key.endswith("_id"):
+            return str(value)
+
+    elif type_ is list:
+        if key in _SNOWFLAKE_LISTS or type(key) is str and key.endswith("_ids"):
+            return [str(v) if type(v) is int else v for v in value]
+
+    return value
+
+
+def _decode(data: t.Any, pos: int) -> t.Tuple[t.Any, int]:
+    tag = data[pos]
+    pos += 1
+
+    if tag == BINARY_EXT:
+        (size,) = _u32(data, pos)
+        pos += 4
+        return str(data[pos:pos + size], "utf-8"), pos + size
+
+    if tag == SMALL_INTEGER_EXT:
+        return data[pos], pos + 1
+
+    if tag == INTEGER_EXT:
+        return _i32(data, pos)[0], pos + 4
+
+    if tag == MAP_EXT:
+        (arity,) = _u32(data, pos)
+        pos += 4
+
+        value = {}
+        for _ in range(arity):
+            key, pos = _decode(data, pos)
+            item, pos = _decode(data, pos)
+            value[key] = _snowflakes(key, item)
+
+        return value, pos
+
+    if tag == SMALL_ATOM_UTF8_EXT or tag == SMALL_ATOM_EXT:
+        size = data[pos]
+        pos += 1
+        return _atom(str(data[pos:pos + size], "utf-8")), pos + size
+
+    if tag == ATOM_UTF8_EXT or tag == ATOM_EXT:
+        (size,) = _u16(data, pos)
+        pos += 2
+        return _atom(str(data[pos:pos + size], "utf-8")), pos + size
+
+    if tag == LIST_EXT:
+        (size,) = _u32(data, pos)
+        pos += 4
+
+        value = []
+        for _ in range(size):
+            item, pos = _decode(data, pos)
+            value.append(item)
+
+        tail, pos = _decode(data, pos)
+        if tail != []:
+            raise ETFError("improper lists are not supported")
+
+        return value, pos
+
+    if tag == NIL_EXT:
+        return [], pos
+
+    if tag == SMALL_BIG_EXT or tag == LARGE_BIG_EXT:
+        if tag == SMALL_BIG_EXT:
+            size = data[pos]
+            pos += 1
+        else:
+            (size,) = _u32(data, pos)
+            pos += 4
+
+        sign = data[pos]
+        pos += 1
+
+        value = int.from_bytes(data[pos:pos + size], "little")
+        return -value if sign else value, pos + size
+
+    if tag == NEW_FLOAT_EXT:
+        return _f64(data, pos)[0], pos + 8
+
+    if tag == STRING_EXT:
+        (size,) = _u16(data, pos)
+        pos += 2
+        # lists of small integers, like `shard: [0, 1]`
+        return list(data[pos:pos + size]), pos + size
+
+    if tag == SMALL_TUPLE_EXT or tag == LARGE_TUPLE_EXT:
+        if tag == SMALL_TUPLE_EXT:
+            size = data[pos]
+            pos += 1
+        else:
+            (size,) = _u32(data, pos)
+            pos += 4
+
+        items = []
+        for _ in range(size):
+            item, pos = _decode(data, pos)
+            items.append(item)
+
+        return tuple(items), pos
+
+    if tag == FLOAT_EXT:
+        return float(str(data[pos:pos + 31], "ascii").rstrip('\x00')), pos + 31
+
+    raise ETFError(f"unsupported term tag {tag}")
+
+
+def decode(data: t.Union[bytes, bytearray, memoryview]) -> t.Any:
+    """Decodes an ETF term into Python objects."""
+    if not data or data[0] != VERSION:
+        raise ETFError("missing ETF version byte")
+
+    if data[1] == COMPRESSED:
+        (size,) = _u32(data, 2)
+        data = bytes([VERSION]) + zlib.decompress(data[6:], bufsize=size + 1)
+
+    value, _ = _decode(data, 1)
+    return value
+
+
+# Encoding
+
+def _encode(value: t.Any, out: bytearray) -> None:
+    if value is None:
+        out += b'\x77\x03nil'
+
+    elif value is True:
+        out += b'\x77\x04true'
+
+    elif value is False:
+        out += b'\x77\x05false'
+
+    elif type(value) is str:
+        raw = value.encode("utf-8")
+        out.append(BINARY_EXT)
+        out += struct.pack(">I", len(raw))
+        out += raw
+
+    elif isinstance(value, int):
+        if 0 <= value <= 255:
+            out.append(SMALL_INTEGER_EXT)
+            out.append(value)
+
+        elif _INT32_MIN <= value <= _INT32_MAX:
+            out.append(INTEGER_EXT)
+            out += struct.pack(">i", value)
+
+        else:
+            magnitude = abs(value)
+            raw = magnitude.to_bytes((magnitude.bit_length() + 7) // 8, "little")
+
+            if len(raw) > 255:
+                raise ETFError("integer too large to encode")
+
+            out.append(SMALL_BIG_EXT)
+            out.append(len(raw))
+            out.append(value < 0)
+            out += raw
+
+    elif isinstance(value, float):
+        out.append(NEW_FLOAT_EXT)
+        out += struct.pack(">d", value)
+
+    elif isinstance(value, dict):
+        out.append(MAP_EXT)
+        out += struct.pack(">I", len(value))
+
+        for key, item in value.items():
+            _encode(key, out)
+            _encode(item, out)
+
+    elif isinstance(value, (list, tuple)):
+        if not value:
+            out.append(NIL_EXT)
+            return
+
+        out.append(LIST_EXT)
+        out += struct.pack(">I", len(value))
+
+        for item in value:
+            _encode(item, out)
+
+        out.append(NIL_EXT)
+
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        out.append(BINARY_EXT)
+        out += struct.pack(">I", len(value))
+        out += value
+
+    else:
+        raise ETFError(f"can't encode {type(value).__name__!r} objects")
+
+
+def encode(value: t.Any) -> bytes:
+    """Encodes `value` as an ETF term."""
+    out = bytearray((VERSION,))
+    _encode(value, out)
+    return bytes(out)
+
+
+# Accelerated backend
+
+def _normalize(value: t.Any) -> t.Any:
+    type_ = type(value)
+
+    if type_ is dict:
+        items = ((_normalize(k), _normalize(v)) for k, v in value.items())
+        return {k: _snowflakes(k, v) for k, v in items}
+
+    if type_ is list:
+        return [_normalize(v) for v in value]
+
+    if type_ is bytes:
+        return value.decode("utf-8")
+
+    if type_ is tuple:
+        return tuple(_normalize(v) for v in value)
+
+    return value
+
+
+def _erlpack() -> t.Tuple[t.Callable[[t.Any], t.Any], t.Callable[[t.Any], bytes]]:
+    import erlpack
+
+    def loads(data: t.Any) -> t.Any:
+        return _normalize(erlpack.unpack(bytes(data)))
+
+    return loads, erlpack.pack
+
+
+def _python() -> t.Tuple[t.Callable[[t.Any], t.Any], t.Callable[[t.Any], bytes]]:
+    return decode, encode
+
+
+_LOADERS = {
+    "erlpack": _erlpack,
+    "python": _python,
+}
+
+
+class ETFCodec:
+    """Encodes and decodes ETF, using `erlpack` when it is installed."""
+
+    __slots__ = ("name", "loads", "dumps")
+
+    encoding: t.ClassVar[str] = "etf"
+    binary: t.ClassVar[bool] = True
+
+    def __init__(self, backend: t.Optional[str] = None) -> None:
+        if backend is not None:
+            if backend not in _LOADERS:
+                raise ValueError(f"unknown ETF backend {backend!r}")
+
+            self.name = backend
+            self.loads, self.dumps = _LOADERS[backend]()
+            return
+
+        for name in ("erlpack", "python"):
+            try:
+                self.loads, self.dumps = _LOADERS[name]()
+            except ImportError:
+                continue
+
+            self.name = name
+            break
+
+    def __repr__(self) -> str:
+        return f"<ETFCodec backend={self.name!r}>"
+
+
+ETF = ETFCodec()
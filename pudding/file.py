@@ -0,0 +1,267 @@
+import io
+import os
+import mmap
+import base64
+import asyncio
+import mimetypes
+import typing as t
+
+from aiohttp import MultipartWriter
+from aiohttp.abc import AbstractStreamWriter
+from aiohttp.payload import Payload
+
+from .codec import JSON
+
+__all__ = (
+    "File",
+    "FileLike",
+    "DataURIPayload",
+    "FilePayload",
+    "multipart",
+    "to_file",
+)
+
+Buffer = t.Union[bytes, bytearray, memoryview, mmap.mmap]
+FileLike = t.Union["File", str, "os.PathLike[str]", Buffer, t.BinaryIO]
+
+# A multiple of 3, so every chunk but the last is base64 encoded without padding.
+_CHUNK_SIZE = 3 * 2 ** 14
+
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"{", "application/json"),
+)
+
+
+def _sniff(head: bytes) -> t.Optional[str]:
+    for signature, content_type in _SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+
+    return None
+
+
+class File:
+    """A file to upload, read in chunks while the request is sent.
+
+    `fp` is a path, a binary file object, a memory-mapped file or a
+    bytes-like object. Paths are opened on each upload and file objects
+    are rewound to the position they had when the `File` was made, so a
+    failed upload can be sent again.
+    """
+
+    __slots__ = ("fp", "filename", "content_type", "size", "_offset")
+
+    def __init__(
+        self,
+        fp: t.Union[str, "os.PathLike[str]", Buffer, t.BinaryIO],
+        filename: t.Optional[str] = None,
+        *,
+        content_type: t.Optional[str] = None,
+    ) -> None:
+        self._offset = 0
+
+        if isinstance(fp, (str, os.PathLike)):
+            fp = os.fspath(fp)
+            filename = filename or os.path.basename(fp)
+            self.size = os.path.getsize(fp)
+        elif isinstance(fp, (bytes, bytearray, memoryview, mmap.mmap)):
+            self.size = len(fp)
+        else:
+            self._offset = fp.tell()
+            self.size = fp.seek(0, io.SEEK_END) - self._offset
+            fp.seek(self._offset)
+
+            name = getattr(fp, "name", None)
+            if filename is None and isinstance(name, str):
+                filename = os.path.basename(name)
+
+        self.fp = fp
+        self.filename = filename
+
+        if content_type is None and filename is not None:
+            content_type = mimetypes.guess_type(filename)[0]
+
+        if content_type is None:
+            content_type = _sniff(self.head()) or "application/octet-stream"
+
+        self.content_type = content_type
+
+    def __repr__(self) -> str:
+        return f"<File filename={self.filename!r} size={self.size}>"
+
+    def head(self, size: int = 16) -> bytes:
+        """Returns the first bytes of the file."""
+        fp = self.fp
+
+        if isinstance(fp, str):
+            with open(fp, "rb") as f:
+                return f.read(size)
+
+        if isinstance(fp, (bytes, bytearray, memoryview, mmap.mmap)):
+            return bytes(fp[:size])
+
+        fp.seek(self._offset)
+        head = fp.read(size)
+        fp.seek(self._offset)
+
+        return head
+
+    async def chunks(self, size: int = _CHUNK_SIZE) -> t.AsyncIterator[t.Union[bytes, memoryview]]:
+        """Yields the contents of the file in chunks of `size` bytes.
+
+        Buffers are sliced without copies, files are read in the default
+        executor so the event loop is not blocked.
+        """
+        fp = self.fp
+
+        if isinstance(fp, (bytes, bytearray, memoryview, mmap.mmap)):
+            view = memoryview(fp)  # type: ignore
+
+            for start in range(0, len(view), size):
+                yield view[start:start + size]
+
+            return
+
+        loop = asyncio.get_running_loop()
+        f = open(fp, "rb") if isinstance(fp, str) else fp
+
+        try:
+            f.seek(self._offset)
+
+            while True:
+                chunk = await loop.run_in_executor(None, f.read, size)
+                if not chunk:
+                    break
+
+                yield chunk
+        finally:
+            if f is not fp:
+                f.close()
+
+    async def base64(self) -> t.AsyncIterator[bytes]:
+        """Yields the file encoded in base64, one chunk at a time."""
+        rest = b""
+
+        async for chunk in self.chunks():
+            if rest:
+                chunk = rest + chunk
+
+            cut = len(chunk) - len(chunk) % 3
+            rest = bytes(chunk[cut:])
+
+            yield base64.b64encode(chunk[:cut])
+
+        if rest:
+            yield base64.b64encode(rest)
+
+    def read(self) -> bytes:
+        """Returns the whole file, only for the rare callers that need it."""
+        fp = self.fp
+
+        if isinstance(fp, str):
+            with open(fp, "rb") as f:
+                return f.read()
+
+        if isinstance(fp, (bytes, bytearray, memoryview, mmap.mmap)):
+            return bytes(fp)
+
+        fp.seek(self._offset)
+        return fp.read()
+
+
+def to_file(fp: FileLike) -> File:
+    return fp if isinstance(fp, File) else File(fp)
+
+
+class FilePayload(Payload):
+    """Streams a `File` as a request body or a multipart part."""
+
+    _autoclose = True
+
+    def __init__(self, file: File, **kwargs: t.Any) -> None:
+        kwargs.setdefault("content_type", file.content_type)
+        kwargs.setdefault("filename", file.filename)
+
+        super().__init__(file, **kwargs)
+        self._size = file.size
+
+    async def write(self, writer: AbstractStreamWriter) -> None:
+        async for chunk in self._value.chunks():
+            await writer.write(chunk)
+
+    def decode(self, encoding: str = "utf-8", errors: str = "strict") -> str:
+        return self._value.read().decode(encoding, errors)
+
+
+class DataURIPayload(Payload):
+    """A JSON object whose `key` member is the data URI of a `File`.
+
+    The rest of the object is encoded up front, the file is encoded in
+    base64 chunk by chunk as the body is sent.
+    """
+
+    _autoclose = True
+
+    def __init__(self, fields: t.Mapping[str, t.Any], key: str, file: File) -> None:
+        fields = {k: v for k, v in fields.items() if k != key}
+        fields[key] = ""
+
+        # drop the closing `"}` of the empty string and the object
+        prefix = JSON.dumps(fields)[:-2] + f"data:{file.content_type};base64,"
+
+        super().__init__(file, content_type="application/json")
+
+        self._prefix = prefix.encode("utf-8")
+        self._size = len(self._prefix) + 4 * ((file.size + 2) // 3) + 2
+
+    async def write(self, writer: AbstractStreamWriter) -> None:
+        await writer.write(self._prefix)
+
+        async for chunk in self._value.base64():
+            await writer.write(chunk)
+
+        await writer.write(b'"}')
+
+    def decode(self, encoding: str = "utf-8", errors: str = "strict") -> str:
+        data = base64.b64encode(self._value.read())
+        return (self._prefix + data + b'"}').decode(encoding, errors)
+
+
+def multipart(
+    files: t.Union[t.Sequence[FileLike], t.Mapping[str, FileLike]],
+    *,
+    fields: t.Optional[t.Mapping[str, t.Any]] = None,
+    payload_json: t.Any = None,
+) -> MultipartWriter:
+    """Builds a `multipart/form-data` body that streams its files.
+
+    A sequence of files is sent as `files[n]`, a mapping names each part.
+    The body can be sent more than once.
+    """
+    writer = MultipartWriter("form-data")
+
+    if payload_json is not None:
+        part = writer.append(JSON.dumps(payload_json), {"Content-Type": "application/json"})
+        part.set_content_disposition("form-data", name="payload_json")
+
+    for name, value in (fields or {}).items():
+        part = writer.append(str(value), {"Content-Type": "text/plain"})
+        part.set_content_disposition("form-data", name=name)
+
+    if not isinstance(files, t.Mapping):
+        files = {f"files[{i}]": file for i, file in enumerate(files)}
+
+    for name, value in files.items():
+        file = to_file(value)
+
+        part = writer.append_payload(FilePayload(file))
+        part.set_content_disposition("form-data", name=name, filename=file.filename or name)
+
+    return writer
@@ -1,10 +1,11 @@
+import re
 import sys
-import zlib
-import json
+import math
 import time
+import random
 import asyncio
-import threading
 import traceback
+import collections
 import typing as t
 from urllib.parse import urlencode
 from asyncio.events import AbstractEventLoop
@@ -14,78 +15,271 @@ from aiohttp import WSMsgType as MType
 from aiohttp.http_websocket import WSMessage
 
 from . import errors
+from .codec import get_codec
+from .inflate import Inflater
+from .tracing import current_trace_id, new_trace_id
 from .types import GatewayBotPayload, Packet, Payload, GatewayPayload
 
+if t.TYPE_CHECKING:
+    from .metrics import Metrics
+    from .recording import FrameRecorder
+    from .shard import IdentifyScheduler
+    from .tracing import Tracer
+
 _DEFAULT_INTERVAL = 30
 
+# Closing with these codes ends the session, Discord won't resume it.
+_SESSION_ENDING_CODES = frozenset({1000, 1001})
+
+# https://discord.com/developers/docs/topics/gateway#rate-limiting
+_COMMAND_LIMIT = 120
+_COMMAND_WINDOW = 60.0
+
+# Discord sends the header of dispatch payloads before `d`, so the event
+# name and sequence can be read without parsing the whole payload.
+_DISPATCH_HEADER = re.compile(rb'\{"t":"([A-Z_]+)","s":(\d+),"op":0,')
+
+# Events needed by the connection itself, never skipped.
+_ALWAYS_DECODED = frozenset({"READY", "RESUMED"})
+
+
+class KeepAlive:
+    """Sends heartbeats from a task on the event loop of the connection.
+
+    The first heartbeat is sent after `interval * jitter`, as Discord
+    recommends. If a heartbeat is due before the previous one was
+    acknowledged, the connection is a zombie and it is closed, which makes
+    `DiscordWebSocket.poll_event` raise `ReconnectWebSocket`.
+    """
 
-class KeepAlive(threading.Thread):
     __slots__ = (
         "ws",
         "interval",
 
         "latency",
-        "_event",
+        "_task",
+        "_acked",
         "_last_ack",
         "_last_send",
         "_last_recv",
     )
 
-    def __init__(self, ws: "DiscordWebSocket", interval: int, **kwargs: t.Any) -> None:
+    def __init__(self, ws: "DiscordWebSocket", interval: float) -> None:
         self.ws = ws
         self.interval = interval
 
-        super().__init__(daemon=True, **kwargs)
-
-        self.latency = None
-        self._event = threading.Event()
+        self.latency: t.Optional[float] = None
+        self._task: t.Optional[asyncio.Task] = None
+        self._acked = True
         self._last_ack = time.perf_counter()
         self._last_send = time.perf_counter()
         self._last_recv = time.perf_counter()
 
-    def run(self) -> None:
-        while not self._event.wait(self.interval):
-            if self._last_ack + (self.interval*1.5) < time.perf_counter():
-                coro = self.ws.close()
-                future = asyncio.run_coroutine_threadsafe(coro, self.ws.loop)
+    def start(self) -> None:
+        self._task = self.ws.loop.create_task(self.run())
 
-                try:
-                    future.result()
-                finally:
-                    return self.stop()
+    def stop(self) -> None:
+        task, self._task = self._task, None
+
+        if task and task is not asyncio.current_task():
+            task.cancel()
+
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def run(self) -> None:
+        await asyncio.sleep(self.interval * random.random())
 
-            coro = self.send_heartbeat_packet()
-            future = asyncio.run_coroutine_threadsafe(coro, self.ws.loop)
+        while True:
+            if not self._acked:
+                await self.ws.close()
+                return
 
             try:
-                future.result()
+                await self.beat()
             except Exception as e:
                 traceback.print_exception(type(e), e, e.__traceback__)
-                return self.stop()
-
-    def send_heartbeat_packet(self) -> t.Coroutine[t.Any, t.Any, None]:
-        packet = self.ws.heartbeat()
+                return
 
-        async def send():
-            await self.ws.send(packet)
-            self.send()
+            await asyncio.sleep(self.interval)
 
-        return send()
-
-    def stop(self) -> None:
-        if not self._event.is_set():
-            self._event.set()
+    async def beat(self) -> None:
+        """Sends a heartbeat now."""
+        await self.ws.send(self.ws.heartbeat())
+        self.send()
 
     def ack(self) -> None:
         now = time.perf_counter()
         self.latency = now - self._last_send
         self._last_ack = now
+        self._acked = True
+
+        metrics = self.ws.metrics
+        if metrics is not None:
+            metrics.gateway_heartbeat_rtt_seconds.observe(self.latency, self.ws._labels)
 
     def recv(self) -> None:
         self._last_recv = time.perf_counter()
 
     def send(self) -> None:
         self._last_send = time.perf_counter()
+        self._acked = False
+
+
+class SendQueue:
+    """Sends the commands of a connection within the Gateway rate limit.
+
+    At most `limit` commands are sent in any `window` seconds. Heartbeats,
+    IDENTIFY and RESUME are urgent: they are sent before anything else
+    and `reserved` of the commands are kept for them. Other commands
+    wait until the session was identified or resumed, and a presence
+    update that is still queued is replaced by a newer one.
+    """
+
+    __slots__ = (
+        "ws",
+        "limit",
+        "window",
+        "reserved",
+
+        "sent",
+        "coalesced",
+        "_times",
+        "_urgent",
+        "_bulk",
+        "_presence",
+        "_ready",
+        "_wakeup",
+        "_task",
+    )
+
+    def __init__(
+        self,
+        ws: "DiscordWebSocket",
+        *,
+        limit: int = _COMMAND_LIMIT,
+        window: float = _COMMAND_WINDOW,
+    ) -> None:
+        self.ws = ws
+        self.limit = limit
+        self.window = window
+        self.reserved = self.reserve_for(_DEFAULT_INTERVAL)
+
+        self.sent = 0
+        self.coalesced = 0
+        self._times: t.Deque[float] = collections.deque()
+        # [data, future, op]
+        self._urgent: t.Deque[t.List[t.Any]] = collections.deque()
+        self._bulk: t.Deque[t.List[t.Any]] = collections.deque()
+        self._presence: t.Optional[t.List[t.Any]] = None
+        self._ready = False
+        self._wakeup = asyncio.Event()
+        self._task: t.Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._urgent) + len(self._bulk)
+
+    def reserve_for(self, interval: float) -> int:
+        """The commands kept for heartbeats sent each `interval` seconds."""
+        # the heartbeats of a window, and an IDENTIFY or a RESUME
+        return min(math.ceil(self.window / interval) + 1, self.limit - 1)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = self.ws.loop.create_task(self.run())
+
+    def stop(self) -> None:
+        """Stops sending, the queued commands fail with `ConnectionResetError`."""
+        task, self._task = self._task, None
+
+        if task is not None:
+            task.cancel()
+
+        for queue in (self._urgent, self._bulk):
+            while queue:
+                future = queue.popleft()[1]
+
+                if not future.done():
+                    future.set_exception(ConnectionResetError("the gateway connection was closed"))
+
+        self._presence = None
+        self._ready = False
+
+    def put(self, data: t.Union[bytes, str], op: t.Optional[int] = None) -> "asyncio.Future[None]":
+        """Queues encoded `data`, the future is done once it was sent."""
+        ws = self.ws
+
+        if op == ws.PRESENCE_UPDATE and self._presence is not None:
+            self._presence[0] = data
+            self.coalesced += 1
+            return self._presence[1]
+
+        item = [data, ws.loop.create_future(), op]
+
+        if op in (ws.HEARTBEAT, ws.IDENTIFY, ws.RESUME):
+            self._urgent.append(item)
+        else:
+            self._bulk.append(item)
+
+            if op == ws.PRESENCE_UPDATE:
+                self._presence = item
+
+        self._wakeup.set()
+        return item[1]
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        times = self._times
+
+        while True:
+            now = loop.time()
+
+            while times and times[0] <= now - self.window:
+                times.popleft()
+
+            if self._urgent:
+                queue, capacity = self._urgent, self.limit
+            elif self._bulk and self._ready:
+                queue, capacity = self._bulk, self.limit - self.reserved
+            else:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            if len(times) >= capacity:
+                # an urgent command queued meanwhile may go first
+                self._wakeup.clear()
+                delay = times[len(times) - capacity] + self.window - now
+
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+
+                continue
+
+            data, future, op = item = queue.popleft()
+
+            if item is self._presence:
+                self._presence = None
+
+            times.append(now)
+
+            try:
+                await self.ws._write(data)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+
+                continue
+
+            self.sent += 1
+
+            if op == self.ws.IDENTIFY or op == self.ws.RESUME:
+                self._ready = True
+
+            if not future.done():
+                future.set_result(None)
 
 
 class DiscordWebSocket:
@@ -111,15 +305,28 @@ class DiscordWebSocket:
         "dispatcher",
         "loop",
         "session",
+        "shard",
+        "scheduler",
+        "event_filter",
+        "recorder",
+        "metrics",
+        "tracer",
 
         "socket",
+        "inflater",
         "session_id",
+        "resume_url",
         "keep_alive",
+        "outbound",
         "heartbeat_interval",
+        "skipped",
         "_seq",
+        "_codec",
         "_closed",
-        "_buffer",
-        "_inflator",
+        "_owns_session",
+        "_labels",
+        "_trace_id",
+        "_heartbeat",
     )
 
     def __init__(
@@ -127,9 +334,17 @@ class DiscordWebSocket:
         token: str,
         intents: int,
         gateway: t.Union[GatewayPayload, GatewayBotPayload],
-        dispatcher: t.Callable[[str, t.Any], None],
+        dispatcher: t.Callable[[str, t.Any], t.Optional[t.Awaitable[None]]],
         loop: t.Optional[AbstractEventLoop] = None,
         session: t.Optional[aiohttp.ClientSession] = None,
+        encoding: str = "json",
+        codec: t.Optional[t.Any] = None,
+        shard: t.Optional[t.Tuple[int, int]] = None,
+        scheduler: t.Optional["IdentifyScheduler"] = None,
+        event_filter: t.Optional[t.Callable[[str], bool]] = None,
+        recorder: t.Optional["FrameRecorder"] = None,
+        metrics: t.Optional["Metrics"] = None,
+        tracer: t.Optional["Tracer"] = None,
     ) -> None:
 
         self.token = token
@@ -138,15 +353,32 @@ class DiscordWebSocket:
         self.dispatcher = dispatcher
         self.loop = loop or asyncio.get_event_loop()
         self.session = session
+        self.shard = shard
+        self.scheduler = scheduler
+        self.event_filter = event_filter
+        self.recorder = recorder
+        self.metrics = metrics
+        self.tracer = tracer
 
         self.socket = None
-        self.session_id: t.Optional[int] = None
+        self.inflater = Inflater()
+        self.session_id: t.Optional[str] = None
+        self.resume_url: t.Optional[str] = None
         self.keep_alive: t.Optional[KeepAlive] = None
+        self.outbound = SendQueue(self)
         self.heartbeat_interval = _DEFAULT_INTERVAL
+        self.skipped = 0
         self._seq: t.Optional[int] = None
+        self._codec = codec or get_codec(encoding)
         self._closed = True
-        self._buffer = bytearray()
-        self._inflator = zlib.decompressobj()
+        self._owns_session = session is None
+        self._labels = (str(self.shard_id),)
+        self._trace_id: t.Optional[int] = None
+        self._heartbeat: t.Tuple[t.Any, t.Union[bytes, str, None]] = (None, None)
+
+    @property
+    def shard_id(self) -> int:
+        return self.shard[0] if self.shard else 0
 
     @property
     def latency(self) -> t.Optional[float]:
@@ -156,40 +388,84 @@ class DiscordWebSocket:
     def is_closed(self) -> bool:
         return self._closed
 
+    @property
+    def seq(self) -> t.Optional[int]:
+        """The sequence of the last event received."""
+        return self._seq
+
+    def can_resume(self) -> bool:
+        return self.session_id is not None and self._seq is not None
+
+    def set_session(self, session_id: str, seq: int, resume_url: t.Optional[str] = None) -> None:
+        """Sets the session that the next `connect(resume=True)` resumes."""
+        self.session_id = session_id
+        self.resume_url = resume_url
+        self._seq = seq
+
+    def clear_session(self) -> None:
+        self.session_id = None
+        self.resume_url = None
+        self._seq = None
+
     async def close(self, code: t.Optional[int] = None) -> None:
-        if self._closed:
-            return
+        """Closes the connection.
 
+        The session is kept to be resumed unless `code` is 1000 or 1001,
+        which make Discord end it.
+        """
         if code is None:
             code = 4000
 
+        if code in _SESSION_ENDING_CODES:
+            self.clear_session()
+
+        # the queue may run without a connection, when started by hand
+        self.outbound.stop()
+
+        if self._closed:
+            return
+
         if self.keep_alive:
             self.keep_alive.stop()
 
         if self.socket:
             await self.socket.close(code=code)
 
-        if self.session:
+        if self.session and self._owns_session:
             await self.session.close()
+            self.session = None
 
         self.socket = None
-        self.session = None
-        self.session_id = None
         self.keep_alive = None
         self.heartbeat_interval = _DEFAULT_INTERVAL
-        self._seq = None
         self._closed = True
-        self._buffer = bytearray()
 
     async def connect(self, resume: bool = False) -> None:
+        """Connects to the Gateway, resuming the session if `resume` is set
+        and there is a session to resume, identifying otherwise.
+        """
         if self.session is None:
             self.session = aiohttp.ClientSession()
 
-        wss = self.gateway["url"] + '?' + urlencode(
-            {'v': self._VERSION, "encoding": "json", "compress": "zlib-stream"}
+        resume = resume and self.can_resume()
+
+        if not resume and self.scheduler:
+            await self.scheduler.acquire(self.shard_id)
+
+        url = self.resume_url if resume and self.resume_url else self.gateway["url"]
+        wss = url + '?' + urlencode(
+            {'v': self._VERSION, "encoding": self._codec.encoding, "compress": "zlib-stream"}
         )
 
+        self.inflater.reset()
         self.socket = await self.session.ws_connect(wss)
+        self.outbound.start()
+
+        if self.recorder is not None:
+            self.recorder.connect()
+
+        if self.metrics is not None:
+            self.metrics.gateway_connects.inc((*self._labels, "resume" if resume else "identify"))
         self._closed = False
 
         await self.poll_event()
@@ -218,6 +494,13 @@ class DiscordWebSocket:
             if self.keep_alive:
                 self.keep_alive.recv()
 
+            if self.recorder is not None:
+                self.recorder.record(message.data)
+
+            if self.metrics is not None:
+                self.metrics.gateway_frames.inc(self._labels)
+                self.metrics.gateway_bytes.inc(self._labels, len(message.data))
+
             payload = await self.parse_raw_message(message.data)
             if not payload:
                 return
@@ -243,18 +526,55 @@ class DiscordWebSocket:
         pass
 
     async def parse_raw_message(self, data: t.Union[str, bytes]) -> t.Optional[Payload]:
-        if type(data) is bytes:
-            self._buffer.extend(data)
+        tracer = self.tracer
+        if tracer is None:
+            return self._parse(data)
+
+        trace_id = self._trace_id = new_trace_id()
+        tracer.frame_received(trace_id, self.shard_id, len(data), time.perf_counter())
+
+        payload = self._parse(data)
+
+        if payload:
+            tracer.payload_decoded(
+                trace_id, self.shard_id, payload.get("op"), payload.get("t"), time.perf_counter()
+            )
 
-            if len(data) < 4 or data[-4:] != b'\x00\x00\xff\xff':
+        return payload
+
+    def _parse(self, data: t.Union[str, bytes]) -> t.Optional[Payload]:
+        metrics = self.metrics
+
+        if type(data) is bytes:
+            if metrics is None:
+                data = self.inflater.feed(data)  # type: ignore
+            else:
+                start = time.perf_counter()
+                data = self.inflater.feed(data)  # type: ignore
+                metrics.gateway_inflate_seconds.observe(time.perf_counter() - start, self._labels)
+
+            if data is None:
                 return
 
-            data = self._inflator.decompress(self._buffer)
-            # data = data.decode('utf-8')
+            if self.event_filter is not None and not self._codec.binary:
+                header = _DISPATCH_HEADER.match(data)
+
+                if header is not None:
+                    name = header.group(1).decode("ascii")
 
-            self._buffer.clear()
+                    if name not in _ALWAYS_DECODED and not self.event_filter(name):
+                        self._seq = int(header.group(2))
+                        self.skipped += 1
+                        return
 
-        return json.loads(data)
+        if metrics is None:
+            return self._codec.loads(data)
+
+        start = time.perf_counter()
+        payload = self._codec.loads(data)
+        metrics.gateway_decode_seconds.observe(time.perf_counter() - start, self._labels)
+
+        return payload
 
     async def handle_payload(self, payload: Payload) -> None:
         op = int(payload["op"])
@@ -265,6 +585,7 @@ class DiscordWebSocket:
 
             interval = self.heartbeat_interval / 1000
             self.keep_alive = KeepAlive(self, interval)
+            self.outbound.reserved = self.outbound.reserve_for(interval)
 
             return self.keep_alive.start()
 
@@ -272,16 +593,23 @@ class DiscordWebSocket:
             assert self.keep_alive
             return self.keep_alive.ack()
 
+        if op is self.HEARTBEAT:
+            if self.keep_alive:
+                return await self.keep_alive.beat()
+
+            return await self.send(self.heartbeat())
+
         if op is self.INVALID_SESSION:
             if d is True:
                 await self.close()
                 raise errors.ReconnectWebSocket()
 
+            # the next connect identifies again
             await self.close(1000)
-            raise errors.GatewayError("can't reconnect")
+            raise errors.ReconnectWebSocket()
 
         if op is self.RECONNECT:
-            await self.close(1000)
+            await self.close()
             raise errors.ReconnectWebSocket()
 
         if op is self.DISPATCH:  # 0
@@ -290,6 +618,7 @@ class DiscordWebSocket:
 
             if t == "READY":
                 self.session_id = d["session_id"]
+                self.resume_url = d.get("resume_gateway_url")
 
             # if t == "RESUMED":
             #     return
@@ -297,7 +626,32 @@ class DiscordWebSocket:
             self._seq = s
 
             if self.dispatcher:
-                self.dispatcher(t, d)
+                metrics = self.metrics
+
+                if metrics is not None:
+                    metrics.gateway_events.inc((*self._labels, t))
+                    start = time.perf_counter()
+
+                tracer = self.tracer
+
+                if tracer is None:
+                    waiter = self.dispatcher(t, d)
+                else:
+                    # lets the dispatcher tie the handlers to this frame
+                    token = current_trace_id.set(self._trace_id)
+                    try:
+                        waiter = self.dispatcher(t, d)
+                    finally:
+                        current_trace_id.reset(token)
+
+                if waiter is not None:
+                    await waiter
+
+                if metrics is not None:
+                    metrics.gateway_dispatch_seconds.observe(time.perf_counter() - start, (t,))
+
+                if tracer is not None:
+                    tracer.dispatched(self._trace_id, self.shard_id, t, time.perf_counter())  # type: ignore
 
             return
 
@@ -306,22 +660,46 @@ class DiscordWebSocket:
     async def _unknown_payload(self, payload: Payload, /) -> None:
         pass
 
-    def send(self, data: t.Union[bytes, str, Packet]) -> t.Coroutine[t.Any, t.Any, None]:
+    def send(self, data: t.Union[bytes, str, Packet]) -> t.Awaitable[None]:
+        """Queues a command in `outbound`, the awaitable is done once it was sent.
+
+        Encoded data is sent as a bulk command, as its op is unknown.
+        """
+        assert self.socket
+
+        if type(data) is bytes or type(data) is str:
+            return self.outbound.put(data)  # type: ignore
+
+        op = data["op"]  # type: ignore
+
+        if op == self.HEARTBEAT:
+            return self.outbound.put(self._encode_heartbeat(data['d']), op)  # type: ignore
+
+        return self.outbound.put(self._codec.dumps(data), op)
+
+    def _encode_heartbeat(self, seq: t.Optional[int]) -> t.Union[bytes, str]:
+        # heartbeats are the same until the next event
+        last_seq, encoded = self._heartbeat
+
+        if encoded is None or last_seq != seq:
+            encoded = self._codec.dumps({"op": self.HEARTBEAT, 'd': seq})
+            self._heartbeat = (seq, encoded)
+
+        return encoded
+
+    def _write(self, data: t.Union[bytes, str]) -> t.Awaitable[None]:
         assert self.socket
 
         if type(data) is bytes:
             return self.socket.send_bytes(data)
 
-        if type(data) is str:
-            return self.socket.send_str(data)
-
-        return self.socket.send_json(data)
+        return self.socket.send_str(data)  # type: ignore
 
     # Packets
 
     def identify(self) -> Packet:
         """Returns the `IDENTIFY` packet."""
-        return {
+        packet: Packet = {
             "op": self.IDENTIFY,
             'd': {
                 "token": self.token,
@@ -334,6 +712,11 @@ class DiscordWebSocket:
             },
         }
 
+        if self.shard:
+            packet['d']["shard"] = list(self.shard)
+
+        return packet
+
     def resume(self) -> Packet:
         """Returns the `RESUME` packet."""
         return {
@@ -351,3 +734,45 @@ class DiscordWebSocket:
             "op": self.HEARTBEAT,
             'd': self._seq,
         }
+
+    def presence(
+        self,
+        *,
+        activities: t.Sequence[t.Dict[str, t.Any]] = (),
+        status: str = "online",
+        afk: bool = False,
+        since: t.Optional[int] = None,
+    ) -> Packet:
+        """Returns the `PRESENCE_UPDATE` packet."""
+        return {
+            "op": self.PRESENCE_UPDATE,
+            'd': {
+                "since": since,
+                "activities": list(activities),
+                "status": status,
+                "afk": afk,
+            }
+        }
+
+    def request_guild_members(
+        self,
+        guild_id: str,
+        *,
+        query: str = "",
+        limit: int = 0,
+        user_ids: t.Optional[t.Sequence[str]] = None,
+        presences: bool = False,
+        nonce: t.Optional[str] = None,
+    ) -> Packet:
+        """Returns the `REQUEST_GUILD_MEMBERS` packet."""
+        d: t.Dict[str, t.Any] = {"guild_id": guild_id, "limit": limit, "presences": presences}
+
+        if user_ids is not None:
+            d["user_ids"] = list(user_ids)
+        else:
+            d["query"] = query
+
+        if nonce is not None:
+            d["nonce"] = nonce
+
+        return {"op": self.REQUEST_GUILD_MEMBERS, 'd': d}
@@ -1,24 +1,85 @@
-import json
+import time
+import asyncio
 import typing as t
 
-from aiohttp import ClientSession
+from aiohttp import ClientConnectionError, ClientSession
 
 from . import errors, utils, types
+from .codec import JSON
+from .file import DataURIPayload, FileLike, multipart, to_file
+from .httpcache import ResponseCache
+from .metrics import Metrics
+from .models import Model
+from .ratelimit import Bucket, RateLimiter
+from .retry import RetryPolicy
+from .tracing import Tracer, new_trace_id
+from .transport import Transport
+
+if t.TYPE_CHECKING:
+    from .state import State
 from .types import GatewayPayload, GatewayBotPayload
 
+T = t.TypeVar('T')
+K = t.TypeVar('K')
+
+# A fetched entity, or the exception raised while fetching it.
+FetchResult = t.Tuple[K, t.Union[T, Exception]]
+
+_DEFAULT_CONCURRENCY = 10
+
+_STATUS_ERRORS: t.Dict[int, t.Type[errors.HTTPException]] = {
+    403: errors.Forbidden,
+    404: errors.NotFound,
+    429: errors.RateLimited,
+    500: errors.ServerError,
+    502: errors.ServerError,
+    503: errors.ServerError,
+    504: errors.ServerError,
+}
+
+
+def _payload(value: t.Any) -> t.Any:
+    # a `State` with `models` caches models, the requests return payloads
+    if isinstance(value, Model):
+        return value.to_dict()
+
+    if isinstance(value, tuple):
+        return [_payload(v) for v in value]
+
+    return value
+
+
+def _retry_after(headers: t.Mapping[str, str]) -> t.Optional[float]:
+    try:
+        return float(headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
 
 class Route:
-    __slots__ = ("_method", "_path", "auth")
+    __slots__ = ("_method", "_path", "_template", "params", "major", "auth")
 
     BASE: t.ClassVar[str] = "https://discord.com/api/v9"
+    MAJOR_PARAMETERS: t.ClassVar[t.Tuple[str, ...]] = (
+        "channel_id",
+        "guild_id",
+        "webhook_id",
+        "webhook_token",
+    )
 
     def __init__(self, method: str, path: str, *, auth: bool = True, **params: t.Any) -> None:
+        self._template = path
         path = path.format_map(params)
 
         self._method = method
         self._path = path
+        self.params = params
         self.auth = auth
 
+        self.major = ':'.join(
+            str(params[k]) for k in self.MAJOR_PARAMETERS if k in params
+        )
+
     def __repr__(self) -> str:
         return "Route({0.method!r}, {0.path!r}, auth={0.auth})".format(self)
 
@@ -34,22 +95,84 @@ class Route:
     def url(self) -> str:
         return self.BASE + self.path
 
+    @property
+    def template(self) -> str:
+        return self._template
+
+    @property
+    def key(self) -> str:
+        """The rate limit key of the route, without its major parameters."""
+        return self.method + ' ' + self._template
+
 
 class DiscordHTTPClient:
     __slots__ = (
-        "token",
-
-        "session",
+        "transport",
+        "state",
+        "cache",
+        "retry",
+        "coalesce",
+        "metrics",
+        "tracer",
+
+        "coalesced",
+        "_inflight",
+        "_token",
         "_closed",
+        "_owns_transport",
         "_user_agent",
+        "_headers",
+        "_auth_headers",
+        "_ratelimiter",
     )
 
-    def __init__(self, token: t.Optional[str] = None) -> None:
-        self.token = token
+    def __init__(
+        self,
+        token: t.Optional[str] = None,
+        *,
+        transport: t.Optional[Transport] = None,
+        state: t.Optional["State"] = None,
+        cache: t.Optional[ResponseCache] = None,
+        retry: t.Optional[RetryPolicy] = None,
+        coalesce: bool = True,
+        metrics: t.Optional[Metrics] = None,
+        tracer: t.Optional[Tracer] = None,
+    ) -> None:
+        self.transport = transport or Transport()
+        self.state = state
+        self.cache = cache
+        self.retry = retry or RetryPolicy()
+        self.coalesce = coalesce
+        self.metrics = metrics
+        self.tracer = tracer
+
+        self.coalesced = 0
+        self._inflight: t.Dict[t.Any, asyncio.Future] = {}
 
-        self.session: t.Optional[ClientSession] = None
         self._closed = False
+        self._owns_transport = transport is None
         self._user_agent = "DiscordBot"
+        self._ratelimiter = RateLimiter()
+
+        self.token = token
+
+    @property
+    def token(self) -> t.Optional[str]:
+        return self._token
+
+    @token.setter
+    def token(self, value: t.Optional[str]) -> None:
+        self._token = value
+
+        self._headers = {"User-Agent": self._user_agent}
+        self._auth_headers = self._headers.copy()
+
+        if value:
+            self._auth_headers["Authorization"] = "Bot " + value
+
+    @property
+    def session(self) -> ClientSession:
+        return self.transport.session
 
     def is_closed(self) -> bool:
         return self._closed
@@ -58,12 +181,16 @@ class DiscordHTTPClient:
         if self._closed:
             return
 
-        with utils.suppress_all():
-            await self.session.close()  # type: ignore
+        if self._owns_transport:
+            with utils.suppress_all():
+                await self.transport.close()
 
-        self.session = None
         self._closed = True
 
+    async def warm_up(self) -> None:
+        """Opens a pooled connection before the first real request."""
+        await self.get_gateway()
+
     async def request(
         self,
         route: Route,
@@ -74,44 +201,268 @@ class DiscordHTTPClient:
         if self._closed:
             return
 
-        if not self.session:
-            self.session = ClientSession()
+        if not self.coalesce or route.method != "GET" or reason or kwargs.keys() - {"params"}:
+            return await self._request(route, reason=reason, **kwargs)
+
+        # Identical GETs that are already in flight share its response.
+        key = ResponseCache.key(route, kwargs.get("params"))
+        future = self._inflight.get(key)
+
+        if future is not None:
+            self.coalesced += 1
+        else:
+            future = self._inflight[key] = asyncio.ensure_future(self._request(route, **kwargs))
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
 
-        headers: t.Dict[str, str] = {
-            "User-Agent": self._user_agent,
-        }
+        return await asyncio.shield(future)
+
+    async def _request(self, route: Route, **kwargs: t.Any) -> t.Any:
+        tracer = self.tracer
+        if tracer is None:
+            return await self._send(route, None, **kwargs)
+
+        trace_id = new_trace_id()
+        tracer.request_start(trace_id, route, time.perf_counter())
+
+        error = None
+        try:
+            return await self._send(route, trace_id, **kwargs)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            tracer.request_end(trace_id, route, time.perf_counter(), error)
+
+    async def _send(
+        self,
+        route: Route,
+        trace_id: t.Optional[int],
+        *,
+        reason: t.Optional[str] = None,
+        files: t.Optional[t.Union[t.Sequence[FileLike], t.Mapping[str, FileLike]]] = None,
+        **kwargs: t.Any,
+    ) -> t.Any:
+        headers = self._auth_headers if route.auth else self._headers
+
+        if files is not None:
+            # the body streams the files and is sent again on retries
+            kwargs["data"] = multipart(
+                files,
+                fields=kwargs.pop("data", None),
+                payload_json=kwargs.pop("json", None),
+            )
 
         if reason:
-            headers["X-Audit-Log-Reason"] = reason
+            headers = {**headers, "X-Audit-Log-Reason": reason}
+
+        cache = self.cache
+        cached = None
+
+        if cache is not None and cache.is_cacheable(route):
+            key = cache.key(route, kwargs.get("params"))
+            cached = cache.get(key)
+
+            if cached is not None:
+                if cached.is_fresh():
+                    return cached.data
 
-        if route.auth and self.token:
-            headers["Authorization"] = "Bot " + self.token
+                validators = cached.validators()
+                if validators:
+                    headers = {**headers, **validators}
+        else:
+            cache = None
 
         kwargs["url"] = route.url
         kwargs["method"] = route.method
         kwargs["headers"] = headers
 
-        async with self.session.request(**kwargs) as response:
-            data = await response.text()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        attempt = 0
+
+        metrics = self.metrics
+        if metrics is not None:
+            labels = (route.method, route.template)
+
+        tracer = self.tracer if trace_id is not None else None
+
+        while True:
+            attempt += 1
+
+            if metrics is None and tracer is None:
+                bucket = await self._ratelimiter.acquire(route)
+            else:
+                waited = time.perf_counter()
+                bucket = await self._ratelimiter.acquire(route)
+                sent = time.perf_counter()
+
+                if metrics is not None:
+                    metrics.http_ratelimit_wait_seconds.inc(labels, sent - waited)
+
+                if tracer is not None:
+                    tracer.ratelimit_wait(trace_id, route, waited, sent)  # type: ignore
+
+            delay = 0.0
+
+            try:
+                async with self.session.request(**kwargs) as response:
+                    if tracer is not None:
+                        tracer.response_headers(trace_id, route, response.status, time.perf_counter())  # type: ignore
+
+                    self._ratelimiter.update(route, bucket, response.headers)
+
+                    if response.content_type == "application/json":
+                        data = JSON.loads(await response.read())
+                    else:
+                        data = await response.text()
+
+                    if tracer is not None:
+                        tracer.response_decoded(trace_id, route, response.status, time.perf_counter())  # type: ignore
+
+                    if metrics is not None:
+                        metrics.http_request_seconds.observe(time.perf_counter() - sent, labels)
+                        metrics.http_responses.inc((*labels, str(response.status)))
+
+                    if 300 > response.status >= 200:
+                        if cache is not None:
+                            cache.store(route, key, data, response.headers)
+                        elif self.cache is not None and route.method != "GET":
+                            self.cache.invalidate(route)
+
+                        return data
+
+                    if response.status == 304 and cached is not None:
+                        return cache.refresh(route, cached)  # type: ignore
+
+                    if response.status == 429:
+                        # the bucket makes the next attempt wait for it
+                        retry_after = self._handle_ratelimited(bucket, response.headers, data)
+                    else:
+                        retry_after = _retry_after(response.headers)
+                        delay = self.retry.backoff(attempt, retry_after)
+
+                    error = _STATUS_ERRORS.get(response.status, errors.HTTPException)(
+                        status=response.status,
+                        code=data.get("code") if isinstance(data, dict) else None,
+                        body=data,
+                        route=route,
+                        retry_after=retry_after,
+                        attempts=attempt,
+                    )
+
+            except (ClientConnectionError, asyncio.TimeoutError) as e:
+                if metrics is not None:
+                    metrics.http_responses.inc((*labels, "error"))
+
+                error = errors.HTTPException(
+                    f"{type(e).__name__} on {route.method} {route.path}",
+                    route=route,
+                    attempts=attempt,
+                )
+                error.__cause__ = e
+                delay = self.retry.backoff(attempt)
+            finally:
+                bucket.release()
+
+            error.elapsed = loop.time() - started
+
+            if not self.retry.is_retryable(route.method, error.status):
+                raise error
+
+            if not self.retry.allows(attempt, error.elapsed, error.retry_after or delay):
+                raise error
+
+            if delay:
+                await asyncio.sleep(delay)
+
+    def _handle_ratelimited(
+        self,
+        bucket: Bucket,
+        headers: t.Mapping[str, str],
+        data: t.Any,
+    ) -> float:
+        if not isinstance(data, dict):
+            data = {}
+
+        retry_after = float(
+            data.get("retry_after") or headers.get("Retry-After") or 1
+        )
+
+        if data.get("global") or headers.get("X-RateLimit-Global"):
+            self._ratelimiter.set_global(retry_after)
+        else:
+            bucket.exhaust(retry_after)
+
+        return retry_after
 
-            if response.headers.get("Content-Type") == "application/json":
-                data = json.loads(data)
+    async def fetch_many(
+        self,
+        fetch: t.Callable[[K], t.Awaitable[T]],
+        ids: t.Iterable[K],
+        *,
+        concurrency: int = _DEFAULT_CONCURRENCY,
+    ) -> t.AsyncIterator[FetchResult[K, T]]:
+        """Yields `(id, result)` for each id as their `fetch` completes.
+
+        At most `concurrency` fetches run at once. A failed fetch yields
+        its exception as the result instead of ending the iteration.
+        """
+        ids = iter(ids)
+        pending: t.Dict[asyncio.Future, K] = {}
+
+        def schedule() -> None:
+            for id in ids:
+                pending[asyncio.ensure_future(fetch(id))] = id
+
+                if len(pending) >= concurrency:
+                    break
 
-            if 300 > response.status >= 200:
-                return data
+        schedule()
 
-            if response.status == 404:
-                raise errors.NotFound()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
 
-            raise errors.HTTPException()
+                for future in done:
+                    id = pending.pop(future)
+
+                    if future.cancelled():
+                        yield id, asyncio.CancelledError()
+                    elif future.exception() is not None:
+                        yield id, future.exception()  # type: ignore
+                    else:
+                        yield id, future.result()
+
+                schedule()
+        finally:
+            for future in pending:
+                future.cancel()
 
     # Audit Log
 
     # Channel
 
     async def get_channel(self, id: types.Snowflake) -> types.Channel:
-        r = Route("GET", "/channels/{id}", id=id)
-        return await self.request(r)
+        if self.state is not None:
+            channel = self.state.get_channel(id)
+            if channel is not None:
+                return _payload(channel)
+
+        r = Route("GET", "/channels/{channel_id}", channel_id=id)
+        channel = await self.request(r)
+
+        if self.state is not None:
+            self.state.store_channel(channel)
+
+        return channel
+
+    def get_many_channels(
+        self,
+        ids: t.Iterable[types.Snowflake],
+        *,
+        concurrency: int = _DEFAULT_CONCURRENCY,
+    ) -> t.AsyncIterator[FetchResult[types.Snowflake, types.Channel]]:
+        return self.fetch_many(self.get_channel, ids, concurrency=concurrency)
 
     async def delete_channel(
         self,
@@ -119,7 +470,7 @@ class DiscordHTTPClient:
         *,
         reason: t.Optional[str] = None,
     ) -> None:
-        r = Route("DELETE", "/channels/{id}", id=id)
+        r = Route("DELETE", "/channels/{channel_id}", channel_id=id)
         return await self.request(r, reason=reason)
 
     # Emoji
@@ -128,6 +479,11 @@ class DiscordHTTPClient:
         self,
         guild_id: types.Snowflake,
     ) -> t.List[types.Emoji]:
+        if self.state is not None:
+            emojis = self.state.get_guild_emojis(guild_id)
+            if emojis is not None:
+                return _payload(emojis)
+
         r = Route(
             "GET", "/guilds/{guild_id}/emojis",
 
@@ -136,11 +492,29 @@ class DiscordHTTPClient:
 
         return await self.request(r)
 
+    def get_many_guild_emojis(
+        self,
+        guild_id: types.Snowflake,
+        emoji_ids: t.Iterable[types.Snowflake],
+        *,
+        concurrency: int = _DEFAULT_CONCURRENCY,
+    ) -> t.AsyncIterator[FetchResult[types.Snowflake, types.Emoji]]:
+        return self.fetch_many(
+            lambda id: self.get_guild_emoji(guild_id, id),
+            emoji_ids,
+            concurrency=concurrency,
+        )
+
     async def get_guild_emoji(
         self,
         guild_id: types.Snowflake,
         emoji_id: types.Snowflake,
     ) -> types.Emoji:
+        if self.state is not None:
+            emoji = self.state.get_emoji(emoji_id)
+            if emoji is not None:
+                return _payload(emoji)
+
         r = Route(
             "GET", "/guilds/{guild_id}/emojis/{emoji_id}",
 
@@ -148,18 +522,31 @@ class DiscordHTTPClient:
             emoji_id=emoji_id,
         )
 
-        return await self.request(r)
+        emoji = await self.request(r)
+
+        if self.state is not None:
+            self.state.store_emoji(emoji)
+
+        return emoji
 
     async def create_guild_emoji(
         self,
         guild_id: types.Snowflake,
         *,
         name: str,
-        image: bytes,
+        image: FileLike,
         roles: t.Optional[t.List[types.Snowflake]] = None,
         reason: t.Optional[str] = None,
     ) -> types.Emoji:
-        ...
+        payload: t.Dict[str, t.Any] = {"name": name}
+
+        if roles is not None:
+            payload["roles"] = roles
+
+        r = Route("POST", "/guilds/{guild_id}/emojis", guild_id=guild_id)
+        data = DataURIPayload(payload, "image", to_file(image))
+
+        return await self.request(r, reason=reason, data=data)
 
     async def edit_guild_emoji(
         self,
@@ -170,7 +557,22 @@ class DiscordHTTPClient:
         roles: t.Optional[t.List[types.Snowflake]] = None,
         reason: t.Optional[str] = None,
     ) -> types.Emoji:
-        ...
+        payload: t.Dict[str, t.Any] = {}
+
+        if name is not None:
+            payload["name"] = name
+
+        if roles is not None:
+            payload["roles"] = roles
+
+        r = Route(
+            "PATCH", "/guilds/{guild_id}/emojis/{emoji_id}",
+
+            guild_id=guild_id,
+            emoji_id=emoji_id,
+        )
+
+        return await self.request(r, reason=reason, json=payload)
 
     async def delete_guild_emoji(
         self,
@@ -194,9 +596,26 @@ class DiscordHTTPClient:
         self,
         guild_id: types.Snowflake
     ) -> types.Guild:
+        if self.state is not None:
+            guild = self.state.get_guild(guild_id)
+            if guild is not None:
+                return _payload(guild)
+
         r = Route("GET", "/guilds/{guild_id}", guild_id=guild_id)
+        guild = await self.request(r)
 
-        return await self.request(r)
+        if self.state is not None:
+            self.state.store_guild(guild)  # type: ignore
+
+        return guild
+
+    def get_many_guilds(
+        self,
+        guild_ids: t.Iterable[types.Snowflake],
+        *,
+        concurrency: int = _DEFAULT_CONCURRENCY,
+    ) -> t.AsyncIterator[FetchResult[types.Snowflake, types.Guild]]:
+        return self.fetch_many(self.get_guild, guild_ids, concurrency=concurrency)
 
     # Guild Template
 
@@ -237,8 +656,26 @@ class DiscordHTTPClient:
         self,
         sticker_id: types.Snowflake,
     ) -> types.Sticker:
+        if self.state is not None:
+            sticker = self.state.get_sticker(sticker_id)
+            if sticker is not None:
+                return _payload(sticker)
+
         r = Route("GET", "/stickers/{sticker_id}", sticker_id=sticker_id)
-        return await self.request(r)
+        sticker = await self.request(r)
+
+        if self.state is not None:
+            self.state.store_sticker(sticker)
+
+        return sticker
+
+    def get_many_stickers(
+        self,
+        sticker_ids: t.Iterable[types.Snowflake],
+        *,
+        concurrency: int = _DEFAULT_CONCURRENCY,
+    ) -> t.AsyncIterator[FetchResult[types.Snowflake, types.Sticker]]:
+        return self.fetch_many(self.get_sticker, sticker_ids, concurrency=concurrency)
 
     async def get_nitro_sticker_packs(self) -> types.ListNitroStickerPacks:
         r = Route("GET", "/stickers-packs")
@@ -248,14 +685,37 @@ class DiscordHTTPClient:
         self,
         guild_id: types.Snowflake,
     ) -> t.List[types.Sticker]:
+        if self.state is not None:
+            stickers = self.state.get_guild_stickers(guild_id)
+            if stickers is not None:
+                return _payload(stickers)
+
         r = Route("GET", "/guilds/{guild_id}/stickers", guild_id=guild_id)
         return await self.request(r)
 
+    def get_many_guild_stickers(
+        self,
+        guild_id: types.Snowflake,
+        sticker_ids: t.Iterable[types.Snowflake],
+        *,
+        concurrency: int = _DEFAULT_CONCURRENCY,
+    ) -> t.AsyncIterator[FetchResult[types.Snowflake, types.Sticker]]:
+        return self.fetch_many(
+            lambda id: self.get_guild_sticker(guild_id, id),
+            sticker_ids,
+            concurrency=concurrency,
+        )
+
     async def get_guild_sticker(
         self,
         guild_id: types.Snowflake,
         sticker_id: types.Snowflake,
     ) -> types.Sticker:
+        if self.state is not None:
+            sticker = self.state.get_sticker(sticker_id)
+            if sticker is not None:
+                return _payload(sticker)
+
         r = Route(
             "GET", "/guilds/{guild_id}/stickers/{sticker_id}",
 
@@ -263,7 +723,12 @@ class DiscordHTTPClient:
             sticker_id=sticker_id,
         )
 
-        return await self.request(r)
+        sticker = await self.request(r)
+
+        if self.state is not None:
+            self.state.store_sticker(sticker)
+
+        return sticker
 
     async def create_guild_sticker(
         self,
@@ -272,10 +737,13 @@ class DiscordHTTPClient:
         name: str,
         description: str,
         tags: str,
-        file: bytes,
+        file: FileLike,
         reason: t.Optional[str] = None,
     ) -> types.Sticker:
-        ...
+        r = Route("POST", "/guilds/{guild_id}/stickers", guild_id=guild_id)
+        fields = {"name": name, "description": description, "tags": tags}
+
+        return await self.request(r, reason=reason, data=fields, files={"file": file})
 
     async def edit_guild_sticker(
         self,
@@ -284,10 +752,28 @@ class DiscordHTTPClient:
         *,
         name: t.Optional[str] = None,
         description: t.Optional[str] = None,
-        tags: t.Optional[str],
+        tags: t.Optional[str] = None,
         reason: t.Optional[str] = None,
     ) -> types.Sticker:
-        ...
+        payload = {}
+
+        if name is not None:
+            payload["name"] = name
+
+        if description is not None:
+            payload["description"] = description
+
+        if tags is not None:
+            payload["tags"] = tags
+
+        r = Route(
+            "PATCH", "/guilds/{guild_id}/stickers/{sticker_id}",
+
+            guild_id=guild_id,
+            sticker_id=sticker_id,
+        )
+
+        return await self.request(r, reason=reason, json=payload)
 
     async def delete_guild_sticker(
         self,
@@ -308,8 +794,26 @@ class DiscordHTTPClient:
     # User
 
     async def get_user(self, id: types.Snowflake) -> types.User:
+        if self.state is not None:
+            user = self.state.get_user(id)
+            if user is not None:
+                return _payload(user)
+
         r = Route("GET", "/users/{id}", id=id)
-        return await self.request(r)
+        user = await self.request(r)
+
+        if self.state is not None and id != "@me":
+            self.state.store_user(user)
+
+        return user
+
+    def get_many_users(
+        self,
+        ids: t.Iterable[types.Snowflake],
+        *,
+        concurrency: int = _DEFAULT_CONCURRENCY,
+    ) -> t.AsyncIterator[FetchResult[types.Snowflake, types.User]]:
+        return self.fetch_many(self.get_user, ids, concurrency=concurrency)
 
     async def get_current_user(self) -> types.User:
         return await self.get_user("@me")
@@ -0,0 +1,144 @@
+import time
+import typing as t
+
+from .utils import LRUCache
+
+if t.TYPE_CHECKING:
+    from .http import Route
+
+__all__ = (
+    "CachedResponse",
+    "ResponseCache",
+)
+
+CacheKey = t.Tuple[str, str, t.Tuple[t.Tuple[str, str], ...]]
+
+# Seconds the responses of rarely changing GET routes are fresh for.
+DEFAULT_TTLS: t.Dict[str, float] = {
+    "/gateway": 3600.0,
+    "/voice/regions": 3600.0,
+    "/stickers-packs": 3600.0,
+    "/users/{id}": 300.0,
+    "/guilds/{guild_id}/emojis": 300.0,
+    "/guilds/{guild_id}/stickers": 300.0,
+}
+
+_DEFAULT_MAXSIZE = 512
+
+
+class CachedResponse:
+    """The decoded body of a GET response and its validators."""
+
+    __slots__ = ("data", "etag", "last_modified", "expires_at")
+
+    def __init__(
+        self,
+        data: t.Any,
+        ttl: float,
+        *,
+        etag: t.Optional[str] = None,
+        last_modified: t.Optional[str] = None,
+    ) -> None:
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = time.monotonic() + ttl
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+    def validators(self) -> t.Dict[str, str]:
+        """Returns the headers of a conditional request for the response."""
+        headers = {}
+
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+
+        return headers
+
+
+class ResponseCache:
+    """Keeps the responses of GET routes for `DiscordHTTPClient`.
+
+    Only routes with a TTL in `ttls`, keyed by their path template, are
+    cached. Stale responses that came with an `ETag` or `Last-Modified`
+    header are kept and revalidated with a conditional request. Any other
+    request to a cached path, or to one of its children, drops it.
+    """
+
+    __slots__ = (
+        "ttls",
+
+        "hits",
+        "misses",
+        "revalidated",
+        "_entries",
+    )
+
+    def __init__(
+        self,
+        ttls: t.Optional[t.Mapping[str, float]] = None,
+        *,
+        maxsize: t.Optional[int] = _DEFAULT_MAXSIZE,
+    ) -> None:
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._entries: LRUCache[CacheKey, CachedResponse] = LRUCache(maxsize)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(route: "Route", params: t.Optional[t.Mapping[str, t.Any]] = None) -> CacheKey:
+        items = tuple(sorted((k, str(v)) for k, v in params.items())) if params else ()
+        return (route.method, route.url, items)
+
+    def is_cacheable(self, route: "Route") -> bool:
+        return route.method == "GET" and route.template in self.ttls
+
+    def get(self, key: CacheKey) -> t.Optional[CachedResponse]:
+        """Returns the cached response of `key`, even if it is stale."""
+        entry = self._entries.get(key)
+
+        if entry is not None and entry.is_fresh():
+            self.hits += 1
+        else:
+            self.misses += 1
+
+        return entry
+
+    def store(self, route: "Route", key: CacheKey, data: t.Any, headers: t.Mapping[str, str]) -> None:
+        if "no-store" in headers.get("Cache-Control", ""):
+            return
+
+        self._entries.set(key, CachedResponse(
+            data,
+            self.ttls[route.template],
+            etag=headers.get("ETag"),
+            last_modified=headers.get("Last-Modified"),
+        ))
+
+    def refresh(self, route: "Route", entry: CachedResponse) -> t.Any:
+        """Marks `entry` as fresh after a `304 Not Modified`."""
+        entry.expires_at = time.monotonic() + self.ttls[route.template]
+        self.revalidated += 1
+
+        return entry.data
+
+    def invalidate(self, route: "Route") -> None:
+        """Drops the responses of the path of `route` and of its parent."""
+        url = route.url
+        urls = {url, url.rsplit('/', 1)[0]}
+
+        for key in self._entries:
+            if key[1] in urls:
+                self._entries.pop(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
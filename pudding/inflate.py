@@ -0,0 +1,97 @@
+import zlib
+import typing as t
+
+__all__ = (
+    "Inflater",
+)
+
+# https://discord.com/developers/docs/topics/gateway#transport-compression
+ZLIB_SUFFIX = b'\x00\x00\xff\xff'
+
+_INITIAL_CAPACITY = 64 * 1024
+_MAX_RETAINED = 1024 * 1024
+
+
+class Inflater:
+    """Inflates a `zlib-stream` Gateway connection frame by frame.
+
+    Every frame is decompressed as soon as it arrives. Messages made of a
+    single frame are returned as is; messages split across frames are
+    written into a reusable buffer and returned as a `memoryview` that is
+    only valid until the next call to `feed`.
+    """
+
+    __slots__ = (
+        "bytes_in",
+        "bytes_out",
+        "max_retained",
+
+        "_zlib",
+        "_buffer",
+        "_size",
+        "_view",
+    )
+
+    def __init__(self, max_retained: int = _MAX_RETAINED) -> None:
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.max_retained = max_retained
+
+        self._zlib = zlib.decompressobj()
+        self._buffer = bytearray(_INITIAL_CAPACITY)
+        self._size = 0
+        self._view: t.Optional[memoryview] = None
+
+    @property
+    def ratio(self) -> t.Optional[float]:
+        """How many bytes were inflated for each byte received."""
+        if self.bytes_in:
+            return self.bytes_out / self.bytes_in
+
+    def reset(self) -> None:
+        """Starts a new compression context, used for every new connection."""
+        self._release()
+        self._zlib = zlib.decompressobj()
+        self._size = 0
+
+    def feed(self, frame: bytes) -> t.Optional[t.Union[bytes, memoryview]]:
+        """Inflates `frame`, returns the message once it is complete."""
+        self._release()
+
+        data = self._zlib.decompress(frame)
+
+        self.bytes_in += len(frame)
+        self.bytes_out += len(data)
+
+        if not frame.endswith(ZLIB_SUFFIX):
+            self._write(data)
+            return None
+
+        if not self._size:
+            return data
+
+        self._write(data)
+
+        self._view = memoryview(self._buffer)[:self._size]
+        self._size = 0
+
+        return self._view
+
+    def _write(self, data: bytes) -> None:
+        end = self._size + len(data)
+
+        if end > len(self._buffer):
+            self._buffer.extend(bytes(max(end - len(self._buffer), len(self._buffer))))
+
+        self._buffer[self._size:end] = data
+        self._size = end
+
+    def _release(self) -> None:
+        if self._view is None:
+            return
+
+        self._view.release()
+        self._view = None
+
+        if len(self._buffer) > self.max_retained:
+            self._buffer = bytearray(_INITIAL_CAPACITY)
@@ -0,0 +1,241 @@
+import bisect
+import typing as t
+
+__all__ = (
+    "Counter",
+    "Histogram",
+    "Metrics",
+)
+
+Labels = t.Tuple[str, ...]
+
+# Seconds, from a fast dict lookup to a slow REST call.
+DEFAULT_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_labels(names: Labels, values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+
+    if extra:
+        pairs.append(extra)
+
+    return '{' + ','.join(pairs) + '}' if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A value that only goes up, by label values."""
+
+    __slots__ = ("name", "help", "labels", "_values")
+
+    type: t.ClassVar[str] = "counter"
+
+    def __init__(self, name: str, help: str, labels: Labels = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+
+        self._values: t.Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def get(self, labels: Labels = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> t.Iterator[t.Tuple[str, str, float]]:
+        for values, value in sorted(self._values.items()):
+            yield self.name, _format_labels(self.labels, values), value
+
+    def snapshot(self) -> t.List[t.Dict[str, t.Any]]:
+        return [
+            {"labels": dict(zip(self.labels, values)), "value": value}
+            for values, value in sorted(self._values.items())
+        ]
+
+
+class Histogram:
+    """Counts observations in cumulative buckets, by label values."""
+
+    __slots__ = ("name", "help", "labels", "buckets", "_values")
+
+    type: t.ClassVar[str] = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Labels = (),
+        buckets: t.Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+
+        # per label values: bucket counts (the last one is +Inf), sum
+        self._values: t.Dict[Labels, t.List[t.Any]] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        entry = self._values.get(labels)
+
+        if entry is None:
+            entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def count(self, labels: Labels = ()) -> int:
+        entry = self._values.get(labels)
+        return 0 if entry is None else sum(entry[0])
+
+    def _cumulative(self, counts: t.List[int]) -> t.Iterator[t.Tuple[float, int]]:
+        total = 0
+
+        for bound, count in zip((*self.buckets, float("inf")), counts):
+            total += count
+            yield bound, total
+
+    def samples(self) -> t.Iterator[t.Tuple[str, str, float]]:
+        for values, (counts, sum_) in sorted(self._values.items()):
+            total = 0
+
+            for bound, total in self._cumulative(counts):
+                le = 'le="' + _format_value(bound) + '"'
+                yield self.name + "_bucket", _format_labels(self.labels, values, le), total
+
+            yield self.name + "_sum", _format_labels(self.labels, values), sum_
+            yield self.name + "_count", _format_labels(self.labels, values), total
+
+    def snapshot(self) -> t.List[t.Dict[str, t.Any]]:
+        return [
+            {
+                "labels": dict(zip(self.labels, values)),
+                "count": sum(counts),
+                "sum": sum_,
+                "buckets": {_format_value(b): c for b, c in self._cumulative(counts)},
+            }
+            for values, (counts, sum_) in sorted(self._values.items())
+        ]
+
+
+class Metrics:
+    """The metrics of the HTTP client and the gateway connections.
+
+    Pass the same `Metrics` to `DiscordHTTPClient` and the websockets
+    (or to `Bot`) to collect them. Without one, the hot paths only check
+    for `None`. Export them with `to_prometheus` or `snapshot`.
+    """
+
+    __slots__ = (
+        "http_request_seconds",
+        "http_responses",
+        "http_ratelimit_wait_seconds",
+        "gateway_frames",
+        "gateway_bytes",
+        "gateway_inflate_seconds",
+        "gateway_decode_seconds",
+        "gateway_events",
+        "gateway_dispatch_seconds",
+        "gateway_heartbeat_rtt_seconds",
+        "gateway_connects",
+    )
+
+    def __init__(self, *, buckets: t.Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.http_request_seconds = Histogram(
+            "pudding_http_request_seconds",
+            "Time from sending a request to its decoded response.",
+            ("method", "route"),
+            buckets,
+        )
+        self.http_responses = Counter(
+            "pudding_http_responses_total",
+            "Responses by status code, error when none was received.",
+            ("method", "route", "status"),
+        )
+        self.http_ratelimit_wait_seconds = Counter(
+            "pudding_http_ratelimit_wait_seconds_total",
+            "Time spent waiting for rate limits.",
+            ("method", "route"),
+        )
+        self.gateway_frames = Counter(
+            "pudding_gateway_frames_total",
+            "Frames received from the gateway.",
+            ("shard",),
+        )
+        self.gateway_bytes = Counter(
+            "pudding_gateway_bytes_total",
+            "Bytes received from the gateway, as sent.",
+            ("shard",),
+        )
+        self.gateway_inflate_seconds = Histogram(
+            "pudding_gateway_inflate_seconds",
+            "Time spent decompressing a frame.",
+            ("shard",),
+            buckets,
+        )
+        self.gateway_decode_seconds = Histogram(
+            "pudding_gateway_decode_seconds",
+            "Time spent decoding a payload.",
+            ("shard",),
+            buckets,
+        )
+        self.gateway_events = Counter(
+            "pudding_gateway_events_total",
+            "Dispatched events by type.",
+            ("shard", "event"),
+        )
+        self.gateway_dispatch_seconds = Histogram(
+            "pudding_gateway_dispatch_seconds",
+            "Time the connection spent handing an event to the dispatcher.",
+            ("event",),
+            buckets,
+        )
+        self.gateway_heartbeat_rtt_seconds = Histogram(
+            "pudding_gateway_heartbeat_rtt_seconds",
+            "Time from a heartbeat to its acknowledgement.",
+            ("shard",),
+            buckets,
+        )
+        self.gateway_connects = Counter(
+            "pudding_gateway_connects_total",
+            "Connections to the gateway, by how the session was started.",
+            ("shard", "kind"),
+        )
+
+    def __iter__(self) -> t.Iterator[t.Union[Counter, Histogram]]:
+        for name in self.__slots__:
+            yield getattr(self, name)
+
+    def snapshot(self) -> t.Dict[str, t.Dict[str, t.Any]]:
+        """Returns the current values of every metric."""
+        return {
+            metric.name: {"type": metric.type, "help": metric.help, "samples": metric.snapshot()}
+            for metric in self
+        }
+
+    def to_prometheus(self) -> str:
+        """Returns the metrics in the Prometheus text exposition format."""
+        lines = []
+
+        for metric in self:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+
+        return '\n'.join(lines) + '\n'
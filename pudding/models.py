@@ -0,0 +1,399 @@
+import typing as t
+
+from . import types
+
+__all__ = (
+    "field",
+    "snowflake",
+    "snowflakes",
+    "model",
+    "models",
+    "Model",
+    "User",
+    "Member",
+    "Role",
+    "Emoji",
+    "Sticker",
+    "StickerPack",
+    "PartialChannel",
+    "PartialGuild",
+    "Guild",
+    "PartialApplication",
+    "Invite",
+    "VoiceRegion",
+)
+
+M = t.TypeVar('M', bound="Model")
+T = t.TypeVar('T', covariant=True)
+
+
+class field(t.Generic[T]):
+    """A model attribute, stored raw and parsed the first time it is read.
+
+    Every field gets a `_<name>` slot that holds the value from the
+    payload. If the field has a `parser`, the parsed value replaces the
+    raw one on first access, and `dumper` turns it back into its payload
+    form for `Model.to_dict`.
+
+    Fields are annotated with the type they read as, `name: field[str]`,
+    so type checkers know that `model.name` is a `str`.
+    """
+
+    __slots__ = ("key", "parser", "dumper", "default", "bit", "_slot")
+
+    @t.overload
+    def __init__(
+        self: "field[t.Any]",
+        parser: None = None,
+        dumper: t.Optional[t.Callable[[t.Any], t.Any]] = None,
+        *,
+        key: t.Optional[str] = None,
+        default: t.Any = None,
+    ) -> None: ...
+
+    @t.overload
+    def __init__(
+        self,
+        parser: t.Callable[[t.Any], T],
+        dumper: t.Optional[t.Callable[[t.Any], t.Any]] = None,
+        *,
+        key: t.Optional[str] = None,
+        default: t.Any = None,
+    ) -> None: ...
+
+    def __init__(
+        self,
+        parser: t.Optional[t.Callable[[t.Any], t.Any]] = None,
+        dumper: t.Optional[t.Callable[[t.Any], t.Any]] = None,
+        *,
+        key: t.Optional[str] = None,
+        default: t.Any = None,
+    ) -> None:
+        self.key = key
+        self.parser = parser
+        self.dumper = dumper
+        self.default = default
+        self.bit = 0
+        self._slot: t.Any = None
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        if self.key is None:
+            self.key = name
+
+        self._slot = owner.__dict__["_" + name]
+
+    @t.overload
+    def __get__(self, instance: None, owner: type) -> "field[T]": ...
+
+    @t.overload
+    def __get__(self, instance: "Model", owner: type) -> T: ...
+
+    def __get__(self, instance: t.Optional["Model"], owner: type) -> t.Any:
+        if instance is None:
+            return self
+
+        try:
+            value = self._slot.__get__(instance, owner)
+        except AttributeError:
+            return self.default
+
+        if self.parser is None or value is None or instance._parsed & self.bit:
+            return value
+
+        value = self.parser(value)
+
+        self._slot.__set__(instance, value)
+        instance._parsed |= self.bit
+
+        return value
+
+    def raw(self, instance: "Model") -> t.Any:
+        """Returns the payload form of the field, or raises `AttributeError`."""
+        value = self._slot.__get__(instance, type(instance))
+
+        if self.dumper is not None and value is not None and instance._parsed & self.bit:
+            return self.dumper(value)
+
+        return value
+
+    def set(self, instance: "Model", value: t.Any) -> None:
+        self._slot.__set__(instance, value)
+        instance._parsed &= ~self.bit
+
+
+def snowflake(**kwargs: t.Any) -> field[int]:
+    return field(int, str, **kwargs)
+
+
+def _snowflakes(values: t.List[types.Snowflake]) -> t.Tuple[int, ...]:
+    return tuple([int(v) for v in values])
+
+
+def _dump_snowflakes(values: t.Tuple[int, ...]) -> t.List[str]:
+    return [str(v) for v in values]
+
+
+def snowflakes(**kwargs: t.Any) -> field[t.Tuple[int, ...]]:
+    kwargs.setdefault("default", ())
+    return field(_snowflakes, _dump_snowflakes, **kwargs)
+
+
+def _to_dict(value: "Model") -> t.Dict[str, t.Any]:
+    return value.to_dict()
+
+
+def model(cls: t.Type[M], **kwargs: t.Any) -> field[M]:
+    def parse(value: t.Any) -> M:
+        return value if isinstance(value, cls) else cls(value)
+
+    return field(parse, _to_dict, **kwargs)
+
+
+def models(cls: t.Type[M], **kwargs: t.Any) -> field[t.Tuple[M, ...]]:
+    def parse(values: t.List[t.Any]) -> t.Tuple[M, ...]:
+        # models already built, like the cached ones, are kept as they are
+        return tuple([v if isinstance(v, cls) else cls(v) for v in values])
+
+    def dump(values: t.Tuple[M, ...]) -> t.List[t.Dict[str, t.Any]]:
+        return [v.to_dict() for v in values]
+
+    kwargs.setdefault("default", ())
+    return field(parse, dump, **kwargs)
+
+
+class _ModelMeta(type):
+    def __new__(mcs, name: str, bases: t.Tuple[type, ...], ns: t.Dict[str, t.Any]) -> "_ModelMeta":
+        own = {k: v for k, v in ns.items() if isinstance(v, field)}
+        ns["__slots__"] = tuple(ns.get("__slots__", ())) + tuple('_' + k for k in own)
+
+        cls = super().__new__(mcs, name, bases, ns)
+
+        fields: t.Dict[str, field] = {}
+        for base in reversed(cls.__mro__[1:]):
+            fields.update(base.__dict__.get("_fields", {}))
+
+        parsed = sum(1 for f in fields.values() if f.parser is not None)
+        for f in own.values():
+            if f.parser is not None:
+                f.bit = 1 << parsed
+                parsed += 1
+
+        fields.update(own)
+
+        cls._fields = fields  # type: ignore
+        cls._keys = {f.key: f for f in fields.values()}  # type: ignore
+
+        return cls
+
+
+class Model(metaclass=_ModelMeta):
+    """A compact, slotted form of a payload.
+
+    The `id` is stored as an `int` and the values of the known fields
+    are kept in slots as they came in the payload, so no dict is kept
+    around. Snowflakes and nested objects are only parsed when read.
+    Unknown keys are kept in a small dict.
+    """
+
+    __slots__ = ("id", "_parsed", "_extra")
+
+    _fields: t.ClassVar[t.Dict[str, field]]
+    _keys: t.ClassVar[t.Dict[str, field]]
+    _id_type: t.ClassVar[type] = int
+
+    def __init__(self, data: t.Mapping[str, t.Any]) -> None:
+        self._parsed = 0
+        self._extra: t.Optional[t.Dict[str, t.Any]] = None
+
+        id_ = data.get("id")
+        self.id: t.Any = None if id_ is None else self._id_type(id_)
+
+        self._load(data)
+
+    def _load(self, data: t.Mapping[str, t.Any]) -> None:
+        keys = self._keys
+
+        for key, value in data.items():
+            f = keys.get(key)
+
+            if f is not None:
+                f.set(self, value)
+            elif key != "id":
+                if self._extra is None:
+                    self._extra = {}
+
+                self._extra[key] = value
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} id={self.id!r}>"
+
+    def __eq__(self, other: object) -> bool:
+        return type(other) is type(self) and other.id == self.id  # type: ignore
+
+    def __hash__(self) -> int:
+        return hash((type(self), self.id))
+
+    def update(self, data: t.Mapping[str, t.Any]) -> None:
+        """Merges a partial payload into the model."""
+        self._load(data)
+
+    def to_dict(self) -> t.Dict[str, t.Any]:
+        """Rebuilds the payload of the model."""
+        data: t.Dict[str, t.Any] = {}
+
+        if self.id is not None:
+            data["id"] = str(self.id)
+
+        for f in self._fields.values():
+            try:
+                data[f.key] = f.raw(self)  # type: ignore
+            except AttributeError:
+                pass
+
+        if self._extra:
+            data.update(self._extra)
+
+        return data
+
+
+class User(Model):
+    username: field[str] = field()
+    discriminator: field[str] = field()
+    avatar: field[t.Optional[str]] = field()
+    bot: field[bool] = field(default=False)
+    system: field[bool] = field(default=False)
+    public_flags: field[int] = field(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.username}#{self.discriminator}"
+
+
+class Member(Model):
+    # members have no id of their own, theirs is the one of their user
+
+    user: field[t.Optional[User]] = model(User)
+    nick: field[t.Optional[str]] = field()
+    avatar: field[t.Optional[str]] = field()
+    roles: field[t.Tuple[int, ...]] = snowflakes()
+    joined_at: field[str] = field()
+    premium_since: field[t.Optional[str]] = field()
+    deaf: field[bool] = field(default=False)
+    mute: field[bool] = field(default=False)
+    pending: field[bool] = field(default=False)
+
+    def __init__(self, data: t.Mapping[str, t.Any]) -> None:
+        super().__init__(data)
+
+        user = data.get("user")
+        if isinstance(user, User):
+            self.id = user.id
+        elif user is not None:
+            self.id = int(user["id"])
+
+    def to_dict(self) -> t.Dict[str, t.Any]:
+        data = super().to_dict()
+        data.pop("id", None)
+        return data
+
+
+class Role(Model):
+    name: field[str] = field()
+    color: field[int] = field(default=0)
+    hoist: field[bool] = field(default=False)
+    icon: field[t.Optional[str]] = field()
+    position: field[int] = field(default=0)
+    permissions: field[int] = field(int, str, default=0)
+    managed: field[bool] = field(default=False)
+    mentionable: field[bool] = field(default=False)
+
+
+class Emoji(Model):
+    name: field[t.Optional[str]] = field()
+    require_colons: field[bool] = field(default=True)
+    managed: field[bool] = field(default=False)
+    animated: field[bool] = field(default=False)
+    available: field[bool] = field(default=True)
+    roles: field[t.Tuple[int, ...]] = snowflakes()
+    user: field[t.Optional[User]] = model(User)
+
+
+class Sticker(Model):
+    name: field[str] = field()
+    description: field[t.Optional[str]] = field()
+    tags: field[str] = field()
+    type: field[int] = field()
+    format_type: field[int] = field()
+    available: field[bool] = field(default=True)
+    sort_value: field[t.Optional[int]] = field()
+    pack_id: field[t.Optional[int]] = snowflake()
+    guild_id: field[t.Optional[int]] = snowflake()
+    user: field[t.Optional[User]] = model(User)
+
+
+class StickerPack(Model):
+    name: field[str] = field()
+    description: field[str] = field()
+    stickers: field[t.Tuple[Sticker, ...]] = models(Sticker)
+    sku_id: field[int] = snowflake()
+    cover_sticker_id: field[t.Optional[int]] = snowflake()
+    banner_asset_id: field[t.Optional[int]] = snowflake()
+
+
+class PartialChannel(Model):
+    name: field[t.Optional[str]] = field()
+    type: field[int] = field()
+    guild_id: field[t.Optional[int]] = snowflake()
+
+
+class PartialGuild(Model):
+    name: field[str] = field()
+    icon: field[t.Optional[str]] = field()
+    splash: field[t.Optional[str]] = field()
+    banner: field[t.Optional[str]] = field()
+    description: field[t.Optional[str]] = field()
+    features: field[t.List[str]] = field(default=())
+
+
+class Guild(PartialGuild):
+    owner_id: field[int] = snowflake()
+    member_count: field[t.Optional[int]] = field()
+    large: field[bool] = field(default=False)
+    unavailable: field[bool] = field(default=False)
+    members: field[t.Tuple[Member, ...]] = models(Member)
+    roles: field[t.Tuple[Role, ...]] = models(Role)
+    emojis: field[t.Tuple[Emoji, ...]] = models(Emoji)
+    stickers: field[t.Tuple[Sticker, ...]] = models(Sticker)
+    channels: field[t.Tuple[PartialChannel, ...]] = models(PartialChannel)
+
+
+class PartialApplication(Model):
+    flags: field[int] = field(default=0)
+
+
+class Invite(Model):
+    code: field[str] = field()
+    target_type: field[t.Optional[int]] = field()
+    approximate_presence_count: field[t.Optional[int]] = field()
+    approximate_member_count: field[t.Optional[int]] = field()
+    expires_at: field[t.Optional[str]] = field()
+    guild: field[t.Optional[PartialGuild]] = model(PartialGuild)
+    channel: field[t.Optional[PartialChannel]] = model(PartialChannel)
+    inviter: field[t.Optional[User]] = model(User)
+    target_user: field[t.Optional[User]] = model(User)
+    target_application: field[t.Optional[PartialApplication]] = model(PartialApplication)
+
+
+class VoiceRegion(Model):
+    # voice region ids are names, not snowflakes
+    _id_type = str
+
+    name: field[str] = field()
+    vip: field[bool] = field(default=False)
+    optimal: field[bool] = field(default=False)
+    deprecated: field[bool] = field(default=False)
+    custom: field[bool] = field(default=False)
+
+    def to_dict(self) -> t.Dict[str, t.Any]:
+        data = super().to_dict()
+        data["id"] = self.id
+        return data
@@ -0,0 +1,242 @@
+import asyncio
+import typing as t
+
+if t.TYPE_CHECKING:
+    from .http import Route
+
+# https://discord.com/developers/docs/topics/rate-limits
+
+# Seconds between the sweeps of the buckets that are no longer used.
+_SWEEP_INTERVAL = 60.0
+
+
+class Bucket:
+    __slots__ = (
+        "key",
+        "limit",
+        "remaining",
+        "reset_at",
+
+        "_known",
+        "_window",
+        "_reset",
+        "_latest",
+        "_probing",
+        "_lock",
+    )
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.limit: t.Optional[int] = None
+        self.remaining = 0
+        self.reset_at = 0.0
+
+        self._known = False
+        self._window = 0.0
+        # `X-RateLimit-Reset` of the window the counters belong to, None
+        # once the window was started locally, and the latest one seen
+        self._reset: t.Optional[float] = None
+        self._latest: t.Optional[float] = None
+        self._probing = False
+        self._lock = asyncio.Lock()
+
+    def __repr__(self) -> str:
+        return "<Bucket key={0.key!r} limit={0.limit} remaining={0.remaining}>".format(self)
+
+    async def acquire(self) -> None:
+        """Waits until a request can be made inside this bucket.
+
+        Waiters queue on a FIFO lock, only the head of the queue sleeps
+        while the bucket is exhausted. While the limits are unknown, the
+        lock is held until `release` so a single request probes them.
+        """
+        await self._lock.acquire()
+
+        if not self._known:
+            self._probing = True
+            return
+
+        try:
+            if self.limit is None:
+                return
+
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+
+            # `update` may move the reset later while this sleeps
+            while self.remaining <= 0 and self.reset_at > now:
+                await asyncio.sleep(self.reset_at - now)
+                now = loop.time()
+
+            if self.reset_at <= now:
+                self.remaining = self.limit
+                self.reset_at = now + self._window
+                self._reset = None
+
+            self.remaining -= 1
+        finally:
+            self._lock.release()
+
+    def is_idle(self, now: float) -> bool:
+        """Whether the bucket can be forgotten, no one uses it and its
+        window ended."""
+        return not self._lock.locked() and self.reset_at <= now
+
+    def release(self) -> None:
+        if self._probing:
+            self._probing = False
+            self._lock.release()
+
+    def update(self, headers: t.Mapping[str, str]) -> None:
+        """Updates the bucket from the `X-RateLimit-*` response headers."""
+        self._known = True
+
+        limit = headers.get("X-RateLimit-Limit")
+        if limit is None:
+            return
+
+        now = asyncio.get_running_loop().time()
+        remaining = int(headers.get("X-RateLimit-Remaining", 0))
+        reset_after = float(headers.get("X-RateLimit-Reset-After", 0))
+        reset = headers.get("X-RateLimit-Reset")
+        window = None if reset is None else float(reset)
+
+        self._window = max(self._window, reset_after)
+
+        if self.limit is not None:
+            if window is None or self._latest is None:
+                # the windows can't be told apart, while one runs trust
+                # the lowest count that was seen
+                if self.reset_at > now:
+                    remaining = min(remaining, self.remaining)
+            elif window < self._latest or (window == self._latest and self._reset is None):
+                # a late response of a window that already ended
+                return
+            elif window == self._reset or self._reset is None:
+                # responses of a window arrive out of order, and requests
+                # sent since a local refill may not be counted yet
+                remaining = min(remaining, self.remaining)
+
+        if window is not None:
+            self._reset = self._latest = window
+
+        self.limit = int(limit)
+        self.remaining = max(remaining, 0)
+        self.reset_at = max(self.reset_at, now + reset_after)
+
+    def exhaust(self, retry_after: float) -> None:
+        """Marks the bucket as empty for `retry_after` seconds."""
+        self._known = True
+
+        if self.limit is None:
+            self.limit = 1
+
+        self.remaining = 0
+        self.reset_at = max(self.reset_at, asyncio.get_running_loop().time() + retry_after)
+
+
+class RateLimiter:
+    """Keeps the `Bucket` of each route and major parameter.
+
+    Buckets are created as routes are used, and the idle ones are swept
+    every `sweep_interval` seconds, so a bot that talks to many channels
+    doesn't keep a bucket for each of them forever.
+    """
+
+    __slots__ = (
+        "sweep_interval",
+
+        "_buckets",
+        "_hashes",
+        "_global",
+        "_global_handle",
+        "_next_sweep",
+    )
+
+    def __init__(self, *, sweep_interval: float = _SWEEP_INTERVAL) -> None:
+        self.sweep_interval = sweep_interval
+
+        self._buckets: t.Dict[str, Bucket] = {}
+        # bucket hash of each route, there is a route key per endpoint
+        self._hashes: t.Dict[str, str] = {}
+        self._global: t.Optional[asyncio.Event] = None
+        self._global_handle: t.Optional[asyncio.TimerHandle] = None
+        self._next_sweep = 0.0
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def is_global_limited(self) -> bool:
+        return self._global is not None and not self._global.is_set()
+
+    def get_bucket(self, route: "Route") -> Bucket:
+        """Returns the `Bucket` that `route` belongs to.
+
+        Until Discord reports the bucket hash of a route, the route
+        itself is used as the key.
+        """
+        key = self._hashes.get(route.key, route.key) + ':' + route.major
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            now = asyncio.get_running_loop().time()
+
+            if now >= self._next_sweep:
+                self.sweep(now)
+
+            bucket = self._buckets[key] = Bucket(key)
+
+        return bucket
+
+    def sweep(self, now: t.Optional[float] = None) -> int:
+        """Forgets the idle buckets, returns how many were."""
+        if now is None:
+            now = asyncio.get_running_loop().time()
+
+        self._next_sweep = now + self.sweep_interval
+
+        idle = [key for key, bucket in self._buckets.items() if bucket.is_idle(now)]
+        for key in idle:
+            del self._buckets[key]
+
+        return len(idle)
+
+    async def acquire(self, route: "Route") -> Bucket:
+        if self._global is not None:
+            await self._global.wait()
+
+        bucket = self.get_bucket(route)
+        await bucket.acquire()
+
+        return bucket
+
+    def update(
+        self,
+        route: "Route",
+        bucket: Bucket,
+        headers: t.Mapping[str, str],
+    ) -> None:
+        hash_ = headers.get("X-RateLimit-Bucket")
+
+        if hash_ is not None and self._hashes.get(route.key) != hash_:
+            self._hashes[route.key] = hash_
+            self._buckets.setdefault(hash_ + ':' + route.major, bucket)
+
+            # the route is looked up by its hash from now on, requests
+            # that already hold the old bucket keep using it
+            self._buckets.pop(route.key + ':' + route.major, None)
+
+        bucket.update(headers)
+
+    def set_global(self, retry_after: float) -> None:
+        """Blocks every request for `retry_after` seconds."""
+        loop = asyncio.get_running_loop()
+
+        if self._global is None:
+            self._global = asyncio.Event()
+
+        if self._global_handle is not None:
+            self._global_handle.cancel()
+
+        self._global.clear()
+        self._global_handle = loop.call_later(retry_after, self._global.set)
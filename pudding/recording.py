@@ -0,0 +1,172 @@
+import os
+import time
+import struct
+import asyncio
+import argparse
+import collections
+import typing as t
+
+if t.TYPE_CHECKING:
+    from .gateway import DiscordWebSocket
+
+__all__ = (
+    "Frame",
+    "FrameRecorder",
+    "read_frames",
+    "replay",
+)
+
+MAGIC = b"PUDREC\x00\x01"
+
+# offset in seconds, kind, size
+_RECORD = struct.Struct(">dBI")
+
+TEXT = 0
+BINARY = 1
+CONNECT = 2
+
+
+class Frame(t.NamedTuple):
+    offset: float
+    kind: int
+    data: t.Union[bytes, str, None]
+
+
+class FrameRecorder:
+    """Appends the raw inbound frames of a websocket to a log.
+
+    Binary frames are kept exactly as received, still compressed. Every
+    record holds the seconds since the recorder was made, and a `CONNECT`
+    record marks each new connection, where the zlib stream restarts.
+    """
+
+    __slots__ = ("path", "frames", "_fp", "_start")
+
+    def __init__(self, path: t.Union[str, "os.PathLike[str]"]) -> None:
+        self.path = os.fspath(path)
+        self.frames = 0
+
+        self._fp: t.Optional[t.BinaryIO] = open(self.path, "wb")
+        self._fp.write(MAGIC)
+        self._start = time.monotonic()
+
+    def __enter__(self) -> "FrameRecorder":
+        return self
+
+    def __exit__(self, *_: t.Any) -> None:
+        self.close()
+
+    def _write(self, kind: int, data: bytes) -> None:
+        if self._fp is None:
+            return
+
+        self._fp.write(_RECORD.pack(time.monotonic() - self._start, kind, len(data)))
+        self._fp.write(data)
+
+    def connect(self) -> None:
+        self._write(CONNECT, b"")
+
+    def record(self, data: t.Union[bytes, str]) -> None:
+        if type(data) is str:
+            self._write(TEXT, data.encode("utf-8"))  # type: ignore
+        else:
+            self._write(BINARY, data)  # type: ignore
+
+        self.frames += 1
+
+    def flush(self) -> None:
+        if self._fp is not None:
+            self._fp.flush()
+
+    def close(self) -> None:
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+
+def read_frames(path: t.Union[str, "os.PathLike[str]"]) -> t.Iterator[Frame]:
+    """Yields the frames of a log written by `FrameRecorder`."""
+    with open(path, "rb") as fp:
+        if fp.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{os.fspath(path)!r} is not a frame recording")
+
+        while True:
+            header = fp.read(_RECORD.size)
+            if len(header) < _RECORD.size:
+                return
+
+            offset, kind, size = _RECORD.unpack(header)
+            data = fp.read(size)
+
+            if kind == CONNECT:
+                yield Frame(offset, kind, None)
+            elif kind == TEXT:
+                yield Frame(offset, kind, data.decode("utf-8"))
+            else:
+                yield Frame(offset, kind, data)
+
+
+async def replay(
+    ws: "DiscordWebSocket",
+    frames: t.Iterable[Frame],
+    *,
+    speed: t.Optional[float] = 1.0,
+) -> int:
+    """Feeds recorded frames through `ws` as if they were received.
+
+    Frames go through `parse_raw_message` and the dispatches through
+    `handle_payload` and the dispatcher of `ws`, which needs no
+    connection. `speed` scales the recorded pace, `None` replays as fast
+    as possible. Returns the number of events dispatched.
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    events = 0
+
+    for frame in frames:
+        if speed:
+            delay = start + frame.offset / speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        if frame.kind == CONNECT:
+            ws.inflater.reset()
+            continue
+
+        payload = await ws.parse_raw_message(frame.data)  # type: ignore
+
+        # HELLO, heartbeats and the like belong to the live connection
+        if payload and payload["op"] == ws.DISPATCH:
+            await ws.handle_payload(payload)
+            events += 1
+
+    return events
+
+
+def main(argv: t.Optional[t.List[str]] = None) -> None:
+    from .gateway import DiscordWebSocket
+
+    parser = argparse.ArgumentParser(description="Replays a recording of gateway frames.")
+    parser.add_argument("path")
+    parser.add_argument("--speed", type=float, default=0.0, help="pace of the replay, 0 is as fast as possible")
+    args = parser.parse_args(argv)
+
+    counts: t.Counter[str] = collections.Counter()
+
+    async def run() -> None:
+        ws = DiscordWebSocket("", 0, {"url": ""}, lambda name, _: counts.update((name,)))
+
+        start = time.perf_counter()
+        events = await replay(ws, read_frames(args.path), speed=args.speed or None)
+        elapsed = time.perf_counter() - start
+
+        for name, count in counts.most_common():
+            print(f"{name:<32} {count:>10,}")
+
+        print(f"{events:,} events in {elapsed:.3f}s ({events / elapsed:,.0f}/s)")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
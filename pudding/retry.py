@@ -0,0 +1,73 @@
+import random
+import typing as t
+
+__all__ = (
+    "RetryPolicy",
+)
+
+# https://www.rfc-editor.org/rfc/rfc9110#section-9.2.2
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+
+
+class RetryPolicy:
+    """Decides whether and when a failed request is sent again.
+
+    Transient failures (`statuses` and lost connections) are retried for
+    the `methods` only, since other requests may have been processed.
+    Rate limited requests are never processed, so they are retried for
+    every method. A request makes at most `attempts` tries and gives up
+    when the next one would start after `deadline` seconds.
+    """
+
+    __slots__ = (
+        "attempts",
+        "base",
+        "cap",
+        "deadline",
+        "methods",
+        "statuses",
+    )
+
+    def __init__(
+        self,
+        *,
+        attempts: int = 5,
+        base: float = 0.5,
+        cap: float = 30.0,
+        deadline: t.Optional[float] = 60.0,
+        methods: t.Iterable[str] = IDEMPOTENT_METHODS,
+        statuses: t.Iterable[int] = RETRY_STATUSES,
+    ) -> None:
+        self.attempts = attempts
+        self.base = base
+        self.cap = cap
+        self.deadline = deadline
+        self.methods = frozenset(m.upper() for m in methods)
+        self.statuses = frozenset(statuses)
+
+    def is_retryable(self, method: str, status: t.Optional[int] = None) -> bool:
+        """Whether a request failed with `status`, or without a response, may be retried."""
+        if status == 429:
+            return True
+
+        return method in self.methods and (status is None or status in self.statuses)
+
+    def backoff(self, attempt: int, retry_after: t.Optional[float] = None) -> float:
+        """Returns the seconds to wait after the `attempt`-th try failed.
+
+        A hint from the server is honoured as is, otherwise the delay is
+        a random fraction of an exponentially growing window.
+        """
+        if retry_after is not None:
+            return retry_after
+
+        return random.uniform(0, min(self.cap, self.base * 2 ** (attempt - 1)))
+
+    def allows(self, attempt: int, elapsed: float, delay: float) -> bool:
+        """Whether another try fits in the attempts and the deadline."""
+        if attempt >= self.attempts:
+            return False
+
+        return self.deadline is None or elapsed + delay <= self.deadline
@@ -0,0 +1,147 @@
+import os
+import time
+import tempfile
+import contextlib
+import typing as t
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore
+
+from .codec import JSON
+
+if t.TYPE_CHECKING:
+    from .gateway import DiscordWebSocket
+
+__all__ = (
+    "SessionStore",
+)
+
+# Seconds a closed session is tried again, older ones are identified.
+# Discord doesn't document how long it keeps them, an `INVALID_SESSION`
+# reply makes the shard identify anyway.
+SESSION_TIMEOUT = 120.0
+
+
+class SessionStore:
+    """Keeps the resume state of shards in a JSON file between runs.
+
+    `save` writes the session id, the last sequence and the resume URL of
+    each shard, and `restore` sets them back on new websockets, so a
+    restarted process resumes its sessions instead of identifying again.
+    Shards of other processes sharing the file are kept as they are:
+    saves hold a lock on `path + ".lock"` while they merge the file.
+    """
+
+    __slots__ = ("path", "timeout")
+
+    def __init__(
+        self,
+        path: t.Union[str, "os.PathLike[str]"],
+        *,
+        timeout: float = SESSION_TIMEOUT,
+    ) -> None:
+        self.path = os.fspath(path)
+        self.timeout = timeout
+
+    def load(self) -> t.Dict[str, t.Dict[str, t.Any]]:
+        """Returns the sessions saved less than `timeout` seconds ago."""
+        try:
+            with open(self.path, "rb") as fp:
+                sessions = JSON.loads(fp.read())
+        except (OSError, ValueError):
+            return {}
+
+        if not isinstance(sessions, dict):
+            return {}
+
+        now = time.time()
+
+        return {
+            key: session for key, session in sessions.items()
+            if _is_valid(session) and now - session["closed_at"] < self.timeout
+        }
+
+    def restore(self, shards: t.Iterable["DiscordWebSocket"]) -> int:
+        """Sets the saved sessions on `shards`, returns how many were."""
+        sessions = self.load()
+        restored = 0
+
+        for ws in shards:
+            session = sessions.get(_key(ws))
+            if session is None:
+                continue
+
+            ws.set_session(session["session_id"], session["seq"], session.get("resume_url"))
+            restored += 1
+
+        return restored
+
+    @contextlib.contextmanager
+    def _lock(self) -> t.Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+
+        with open(self.path + ".lock", "wb") as fp:
+            fcntl.flock(fp, fcntl.LOCK_EX)
+
+            try:
+                yield
+            finally:
+                fcntl.flock(fp, fcntl.LOCK_UN)
+
+    def save(self, shards: t.Iterable["DiscordWebSocket"]) -> None:
+        """Writes the sessions of `shards` that can be resumed."""
+        with self._lock():
+            self._save(shards)
+
+    def _save(self, shards: t.Iterable["DiscordWebSocket"]) -> None:
+        sessions = self.load()
+        now = time.time()
+
+        for ws in shards:
+            key = _key(ws)
+
+            if not ws.can_resume():
+                sessions.pop(key, None)
+                continue
+
+            sessions[key] = {
+                "session_id": ws.session_id,
+                "seq": ws.seq,
+                "resume_url": ws.resume_url,
+                "closed_at": now,
+            }
+
+        # a crash while writing must not leave half a file behind
+        with tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(self.path) or ".",
+            prefix=os.path.basename(self.path) + ".",
+            delete=False,
+        ) as fp:
+            fp.write(JSON.dumps(sessions).encode("utf-8"))
+
+        try:
+            os.replace(fp.name, self.path)
+        except OSError:
+            os.unlink(fp.name)
+            raise
+
+
+def _is_valid(session: t.Any) -> bool:
+    # files of older versions, or cut short, are treated as missing
+    return (
+        isinstance(session, dict)
+        and isinstance(session.get("session_id"), str)
+        and type(session.get("seq")) is int
+        and isinstance(session.get("resume_url", None), (str, type(None)))
+        and isinstance(session.get("closed_at"), (int, float))
+    )
+
+
+def _key(ws: "DiscordWebSocket") -> str:
+    # a session belongs to one shard of one shard count
+    shard_id, shard_count = ws.shard or (0, 1)
+    return f"{shard_id}/{shard_count}"
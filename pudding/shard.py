@@ -0,0 +1,237 @@
+import asyncio
+import typing as t
+
+from . import errors
+from .gateway import DiscordWebSocket
+from .metrics import Metrics
+from .recording import FrameRecorder
+from .session import SessionStore
+from .tracing import Tracer
+from .types import GatewayBotPayload, SessionStartLimit
+
+if t.TYPE_CHECKING:
+    from .http import DiscordHTTPClient
+
+__all__ = (
+    "IdentifyScheduler",
+    "ShardManager",
+)
+
+# https://discord.com/developers/docs/topics/gateway#sharding
+_IDENTIFY_INTERVAL = 5.0
+
+
+class IdentifyScheduler:
+    """Spaces out IDENTIFYs as the session start limit requires.
+
+    Shards share a bucket when `shard_id % max_concurrency` is the same,
+    and every bucket allows one IDENTIFY each 5 seconds. Each IDENTIFY
+    takes one of the `remaining` session starts, once they run out the
+    scheduler waits for the quota to reset instead of exhausting it.
+    """
+
+    __slots__ = (
+        "max_concurrency",
+        "total",
+        "remaining",
+        "reset_at",
+        "interval",
+
+        "_locks",
+        "_next_at",
+        "_quota_lock",
+    )
+
+    def __init__(
+        self,
+        limit: SessionStartLimit,
+        *,
+        interval: float = _IDENTIFY_INTERVAL,
+    ) -> None:
+        loop = asyncio.get_event_loop()
+
+        self.max_concurrency = limit.get("max_concurrency", 1) or 1
+        self.total = limit["total"]
+        self.remaining = limit["remaining"]
+        self.reset_at = loop.time() + limit["reset_after"] / 1000
+        self.interval = interval
+
+        self._locks: t.Dict[int, asyncio.Lock] = {}
+        self._next_at: t.Dict[int, float] = {}
+        self._quota_lock = asyncio.Lock()
+
+    def rate_limit_key(self, shard_id: int) -> int:
+        return shard_id % self.max_concurrency
+
+    async def acquire(self, shard_id: int) -> None:
+        """Waits until `shard_id` is allowed to IDENTIFY."""
+        key = self.rate_limit_key(shard_id)
+
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+
+        loop = asyncio.get_running_loop()
+
+        async with lock:
+            delay = self._next_at.get(key, 0) - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            await self._take_session_start()
+            self._next_at[key] = loop.time() + self.interval
+
+    async def _take_session_start(self) -> None:
+        async with self._quota_lock:
+            loop = asyncio.get_running_loop()
+
+            if self.remaining <= 0:
+                delay = self.reset_at - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                self.remaining = self.total
+                self.reset_at = loop.time() + 24 * 60 * 60
+
+            self.remaining -= 1
+
+
+class ShardManager:
+    """Runs one `DiscordWebSocket` for each shard of a bot.
+
+    With `record`, a path with a `{shard_id}` field, the inbound frames
+    of every shard are written to a `FrameRecorder`. With `session_file`,
+    the sessions are saved there on `close` and resumed by the next run.
+    """
+
+    __slots__ = (
+        "http",
+        "token",
+        "intents",
+        "dispatcher",
+        "shard_ids",
+        "shard_count",
+        "encoding",
+        "event_filter",
+        "record",
+        "metrics",
+        "tracer",
+        "sessions",
+
+        "shards",
+        "scheduler",
+        "_tasks",
+    )
+
+    def __init__(
+        self,
+        http: "DiscordHTTPClient",
+        token: str,
+        intents: int,
+        dispatcher: t.Callable[[str, t.Any], t.Optional[t.Awaitable[None]]],
+        *,
+        shard_ids: t.Optional[t.Iterable[int]] = None,
+        shard_count: t.Optional[int] = None,
+        encoding: str = "json",
+        event_filter: t.Optional[t.Callable[[str], bool]] = None,
+        record: t.Optional[str] = None,
+        metrics: t.Optional[Metrics] = None,
+        tracer: t.Optional[Tracer] = None,
+        session_file: t.Optional[str] = None,
+    ) -> None:
+        self.http = http
+        self.token = token
+        self.intents = intents
+        self.dispatcher = dispatcher
+        self.shard_ids = None if shard_ids is None else list(shard_ids)
+        self.shard_count = shard_count
+        self.encoding = encoding
+        self.event_filter = event_filter
+        self.record = record
+        self.metrics = metrics
+        self.tracer = tracer
+        self.sessions = None if session_file is None else SessionStore(session_file)
+
+        self.shards: t.Dict[int, DiscordWebSocket] = {}
+        self.scheduler: t.Optional[IdentifyScheduler] = None
+        self._tasks: t.List[asyncio.Task] = []
+
+    def __iter__(self) -> t.Iterator[DiscordWebSocket]:
+        return iter(self.shards.values())
+
+    def __len__(self) -> int:
+        return len(self.shards)
+
+    def create_shards(self, gateway: GatewayBotPayload) -> None:
+        """Creates the websockets of the shards, without connecting them."""
+        if self.shard_count is None:
+            self.shard_count = gateway["shards"]
+
+        if self.shard_ids is None:
+            self.shard_ids = list(range(self.shard_count))
+
+        if self.scheduler is None:
+            self.scheduler = IdentifyScheduler(gateway["session_start_limit"])
+
+        for shard_id in self.shard_ids:
+            self.shards[shard_id] = DiscordWebSocket(
+                token=self.token,
+                intents=self.intents,
+                gateway=gateway,
+                dispatcher=self.dispatcher,
+                session=self.http.session,
+                encoding=self.encoding,
+                shard=(shard_id, self.shard_count),
+                scheduler=self.scheduler,
+                event_filter=self.event_filter,
+                recorder=self._recorder(shard_id),
+                metrics=self.metrics,
+                tracer=self.tracer,
+            )
+
+        if self.sessions is not None:
+            self.sessions.restore(self)
+
+    def _recorder(self, shard_id: int) -> t.Optional[FrameRecorder]:
+        if self.record is None:
+            return None
+
+        return FrameRecorder(self.record.format(shard_id=shard_id))
+
+    async def run(self) -> None:
+        """Connects every shard and polls them until one of them fails."""
+        if not self.shards:
+            self.create_shards(await self.http.get_bot_gateway())
+
+        self._tasks = [
+            asyncio.ensure_future(self.run_shard(ws)) for ws in self
+        ]
+
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            for task in self._tasks:
+                task.cancel()
+
+    async def run_shard(self, ws: DiscordWebSocket) -> t.NoReturn:
+        await ws.connect(resume=ws.can_resume())
+
+        while True:
+            try:
+                await ws.poll_event()
+            except errors.ReconnectWebSocket:
+                await ws.connect(resume=True)
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+
+        for ws in self:
+            await ws.close()
+
+            if ws.recorder is not None:
+                ws.recorder.close()
+
+        # closing keeps the sessions, the next run resumes them
+        if self.sessions is not None:
+            self.sessions.save(self)
@@ -0,0 +1,350 @@
+import typing as t
+
+from . import types
+from .models import Emoji, Guild, Member, Model, PartialChannel, Role, Sticker, User
+from .utils import LRUCache
+
+__all__ = (
+    "State",
+)
+
+_KINDS = ("guilds", "channels", "users", "emojis", "stickers")
+
+
+def _key(id: types.Snowflake) -> t.Optional[int]:
+    try:
+        return int(id)
+    except (TypeError, ValueError):
+        return None
+
+
+def _id(entity: t.Any) -> t.Optional[int]:
+    if isinstance(entity, Model):
+        return entity.id
+
+    return _key(entity["id"])
+
+
+def _children(guild: t.Any, kind: str) -> t.Sequence[t.Any]:
+    if isinstance(guild, Model):
+        return getattr(guild, kind)
+
+    return guild.get(kind, ())
+
+
+class State:
+    """Caches the entities that the Gateway streams to the bot.
+
+    `limits` and `ttls` take the maximum number of entities and the
+    seconds they are kept for, by kind: `guilds`, `channels`, `users`,
+    `emojis` and `stickers`. Entities are keyed by their snowflake as
+    an `int`.
+
+    With `models`, entities are cached as the slotted `pudding.models`
+    instead of their payloads, which takes less memory. The members,
+    channels, emojis and stickers of a cached guild then share the
+    objects of the other caches.
+
+    The channels, roles, emojis and stickers lists of a cached guild are
+    kept in sync with the events, and the channels, emojis and stickers
+    of a guild are dropped along with it, evicted or deleted.
+    """
+
+    __slots__ = (
+        "models",
+        "guilds",
+        "channels",
+        "users",
+        "emojis",
+        "stickers",
+
+        "_parsers",
+    )
+
+    def __init__(
+        self,
+        *,
+        limits: t.Optional[t.Mapping[str, t.Optional[int]]] = None,
+        ttls: t.Optional[t.Mapping[str, t.Optional[float]]] = None,
+        models: bool = False,
+    ) -> None:
+        self.models = models
+
+        limits = limits or {}
+        ttls = ttls or {}
+
+        for kind in (*limits, *ttls):
+            if kind not in _KINDS:
+                raise ValueError(f"unknown cache kind {kind!r}")
+
+        self.guilds: LRUCache[int, types.Guild] = LRUCache(
+            limits.get("guilds"), ttls.get("guilds"), on_evict=self._forget_guild,
+        )
+        self.channels: LRUCache[int, types.Channel] = LRUCache(limits.get("channels"), ttls.get("channels"))
+        self.users: LRUCache[int, types.User] = LRUCache(limits.get("users"), ttls.get("users"))
+        self.emojis: LRUCache[int, types.Emoji] = LRUCache(limits.get("emojis"), ttls.get("emojis"))
+        self.stickers: LRUCache[int, types.Sticker] = LRUCache(limits.get("stickers"), ttls.get("stickers"))
+
+        self._parsers: t.Dict[str, t.Callable[[t.Any], None]] = {
+            "READY": self.parse_ready,
+            "USER_UPDATE": self.store_user,
+            "GUILD_CREATE": self.store_guild,
+            "GUILD_UPDATE": self.parse_guild_update,
+            "GUILD_DELETE": self.parse_guild_delete,
+            "GUILD_EMOJIS_UPDATE": self.parse_guild_emojis_update,
+            "GUILD_STICKERS_UPDATE": self.parse_guild_stickers_update,
+            "GUILD_ROLE_CREATE": self.parse_role,
+            "GUILD_ROLE_UPDATE": self.parse_role,
+            "GUILD_ROLE_DELETE": self.parse_role_delete,
+            "GUILD_MEMBER_ADD": self.parse_member,
+            "GUILD_MEMBER_UPDATE": self.parse_member,
+            "CHANNEL_CREATE": self.parse_channel,
+            "CHANNEL_UPDATE": self.parse_channel,
+            "CHANNEL_DELETE": self.parse_channel_delete,
+            "MESSAGE_CREATE": self.parse_message,
+        }
+
+    def __call__(self, name: str, payload: t.Any) -> None:
+        parser = self._parsers.get(name)
+
+        if parser is not None:
+            parser(payload)
+
+    def handles(self, name: str) -> bool:
+        return name in self._parsers
+
+    def clear(self) -> None:
+        for kind in _KINDS:
+            getattr(self, kind).clear()
+
+    # Lookups
+
+    def get_guild(self, id: types.Snowflake) -> t.Optional[types.Guild]:
+        return self.guilds.get(_key(id))
+
+    def get_channel(self, id: types.Snowflake) -> t.Optional[types.Channel]:
+        return self.channels.get(_key(id))
+
+    def get_user(self, id: types.Snowflake) -> t.Optional[types.User]:
+        return self.users.get(_key(id))
+
+    def get_emoji(self, id: types.Snowflake) -> t.Optional[types.Emoji]:
+        return self.emojis.get(_key(id))
+
+    def get_sticker(self, id: types.Snowflake) -> t.Optional[types.Sticker]:
+        return self.stickers.get(_key(id))
+
+    def get_guild_emojis(self, guild_id: types.Snowflake) -> t.Optional[t.Sequence[types.Emoji]]:
+        guild = self.get_guild(guild_id)
+        if guild is not None and (self.models or "emojis" in guild):
+            return _children(guild, "emojis")  # type: ignore
+
+    def get_guild_stickers(self, guild_id: types.Snowflake) -> t.Optional[t.Sequence[types.Sticker]]:
+        guild = self.get_guild(guild_id)
+        if guild is not None and (self.models or "stickers" in guild):
+            return _children(guild, "stickers")  # type: ignore
+
+    # Storing
+
+    # The `store_*` methods return the cached entity, a model or the
+    # payload itself.
+
+    def store_user(self, user: types.User) -> t.Any:
+        key = _key(user["id"])
+        if key is None:
+            return None
+
+        cached = self.users.get(key)
+        if cached is not None:
+            cached.update(user)
+            return cached
+
+        cached = User(user) if self.models else user
+        self.users.set(key, cached)
+        return cached
+
+    def store_channel(self, channel: types.Channel) -> t.Any:
+        cached = PartialChannel(channel) if self.models else channel
+        self.channels.set(_key(channel["id"]), cached)  # type: ignore
+        return cached
+
+    def store_emoji(self, emoji: types.Emoji) -> t.Any:
+        key = _key(emoji["id"])
+        if key is None:
+            return None
+
+        cached = Emoji(emoji) if self.models else emoji
+        self.emojis.set(key, cached)
+        return cached
+
+    def store_sticker(self, sticker: types.Sticker) -> t.Any:
+        cached = Sticker(sticker) if self.models else sticker
+        self.stickers.set(_key(sticker["id"]), cached)  # type: ignore
+        return cached
+
+    def store_guild(self, guild: t.Dict[str, t.Any]) -> t.Any:
+        if guild.get("unavailable"):
+            return None
+
+        guild_id = guild["id"]
+
+        # a guild sent again, after a reconnect, may have lost channels
+        old = self.guilds.pop(_key(guild_id))
+        if old is not None:
+            self._forget_guild(_key(guild_id), old)
+
+        channels = []
+
+        for channel in guild.get("channels", ()):
+            channel.setdefault("guild_id", guild_id)
+            channels.append(self.store_channel(channel))
+
+        emojis = [self.store_emoji(emoji) for emoji in guild.get("emojis", ())]
+        stickers = [self.store_sticker(sticker) for sticker in guild.get("stickers", ())]
+
+        members = []
+
+        for member in guild.get("members", ()):
+            if "user" in member:
+                user = self.store_user(member["user"])
+
+                if self.models:
+                    member = Member({**member, "user": user})
+                    member.user
+
+            members.append(member)
+
+        cached: t.Any = guild
+
+        if self.models:
+            cached = Guild(guild)
+            self._set_children(cached, "members", members)
+            self._set_children(cached, "channels", channels)
+            self._set_children(cached, "emojis", emojis)
+            self._set_children(cached, "stickers", stickers)
+
+        self.guilds.set(_key(guild_id), cached)  # type: ignore
+        return cached
+
+    def _set_children(self, guild: t.Any, kind: str, children: t.List[t.Any]) -> None:
+        children = [child for child in children if child is not None]
+
+        if not isinstance(guild, Model):
+            guild[kind] = children
+            return
+
+        # the models share the cached ones, parsed right away so
+        # `to_dict` doesn't see a list of models as a raw payload
+        guild.update({kind: children})
+        getattr(guild, kind)
+
+    def _put_child(self, guild_id: types.Snowflake, kind: str, child: t.Any) -> None:
+        # adds or replaces an entity in the list of its cached guild
+        guild = self.guilds.get(_key(guild_id))
+        if guild is None:
+            return
+
+        id = _id(child)
+        children = [c for c in _children(guild, kind) if _id(c) != id]
+        children.append(child)
+
+        self._set_children(guild, kind, children)
+
+    def _remove_child(self, guild_id: types.Snowflake, kind: str, id: types.Snowflake) -> None:
+        guild = self.guilds.get(_key(guild_id))
+        if guild is None:
+            return
+
+        key = _key(id)
+        self._set_children(guild, kind, [c for c in _children(guild, kind) if _id(c) != key])
+
+    def _forget_guild(self, key: t.Optional[int], guild: t.Any) -> None:
+        for channel in _children(guild, "channels"):
+            self.channels.pop(_id(channel))
+
+        for emoji in _children(guild, "emojis"):
+            self.emojis.pop(_id(emoji))
+
+        for sticker in _children(guild, "stickers"):
+            self.stickers.pop(_id(sticker))
+
+    # Parsers
+
+    def parse_ready(self, data: t.Dict[str, t.Any]) -> None:
+        self.store_user(data["user"])
+
+    def parse_guild_update(self, data: t.Dict[str, t.Any]) -> None:
+        cached = self.get_guild(data["id"])
+
+        if cached is None:
+            self.store_guild(data)
+            return
+
+        # the emojis also go to their own cache
+        cached.update({key: value for key, value in data.items() if key != "emojis"})
+
+        if "emojis" in data:
+            self.parse_guild_emojis_update({"guild_id": data["id"], "emojis": data["emojis"]})
+
+    def parse_guild_delete(self, data: t.Dict[str, t.Any]) -> None:
+        if data.get("unavailable"):
+            return
+
+        key = _key(data["id"])
+        guild = self.guilds.pop(key)
+
+        if guild is not None:
+            self._forget_guild(key, guild)
+
+    def parse_guild_emojis_update(self, data: t.Dict[str, t.Any]) -> None:
+        guild = self.get_guild(data["guild_id"])
+
+        if guild is not None:
+            for emoji in _children(guild, "emojis"):
+                self.emojis.pop(_id(emoji))
+
+        emojis = [self.store_emoji(emoji) for emoji in data["emojis"]]
+
+        if guild is not None:
+            self._set_children(guild, "emojis", emojis)
+
+    def parse_guild_stickers_update(self, data: t.Dict[str, t.Any]) -> None:
+        guild = self.get_guild(data["guild_id"])
+
+        if guild is not None:
+            for sticker in _children(guild, "stickers"):
+                self.stickers.pop(_id(sticker))
+
+        stickers = [self.store_sticker(sticker) for sticker in data["stickers"]]
+
+        if guild is not None:
+            self._set_children(guild, "stickers", stickers)
+
+    def parse_role(self, data: t.Dict[str, t.Any]) -> None:
+        role = data["role"]
+        self._put_child(data["guild_id"], "roles", Role(role) if self.models else role)
+
+    def parse_role_delete(self, data: t.Dict[str, t.Any]) -> None:
+        self._remove_child(data["guild_id"], "roles", data["role_id"])
+
+    def parse_member(self, data: t.Dict[str, t.Any]) -> None:
+        if "user" in data:
+            self.store_user(data["user"])
+
+    def parse_channel(self, data: t.Dict[str, t.Any]) -> None:
+        channel = self.store_channel(data)
+
+        if data.get("guild_id") is not None:
+            self._put_child(data["guild_id"], "channels", channel)
+
+    def parse_channel_delete(self, data: t.Dict[str, t.Any]) -> None:
+        self.channels.pop(_key(data["id"]))
+
+        if data.get("guild_id") is not None:
+            self._remove_child(data["guild_id"], "channels", data["id"])
+
+    def parse_message(self, data: t.Dict[str, t.Any]) -> None:
+        author = data.get("author")
+
+        if author is not None and not data.get("webhook_id"):
+            self.store_user(author)
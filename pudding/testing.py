@@ -0,0 +1,721 @@
+import sys
+import time
+import zlib
+import random
+import asyncio
+import hashlib
+import argparse
+import collections
+import typing as t
+
+from aiohttp import WSMsgType, web
+
+from .codec import JSON
+from .http import Route
+
+__all__ = (
+    "FakeDiscord",
+)
+
+DEFAULT_TOKEN = "pudding.fake.token"
+DEFAULT_USER = {
+    "id": "256444020413300736",
+    "username": "Nium",
+    "discriminator": "0001",
+    "avatar": None,
+    "public_flags": 0,
+}
+BOT_USER = {
+    "id": "880000000000000001",
+    "username": "pudding",
+    "discriminator": "0000",
+    "avatar": None,
+    "bot": True,
+}
+
+_API_PREFIX = "/api/v9"
+_EPOCH_ID = 880_000_000_000_000_000
+
+# https://discord.com/developers/docs/topics/opcodes-and-status-codes
+_UNKNOWN = {
+    "channel": 10003,
+    "emoji": 10014,
+    "guild": 10004,
+    "invite": 10006,
+    "sticker": 10060,
+    "user": 10013,
+}
+
+EventFactory = t.Callable[[random.Random], t.Tuple[str, t.Dict[str, t.Any]]]
+
+
+def _default_event(rng: random.Random) -> t.Tuple[str, t.Dict[str, t.Any]]:
+    user = {"id": str(_EPOCH_ID + rng.randrange(1 << 30))}
+
+    if rng.random() < 0.7:
+        return "PRESENCE_UPDATE", {
+            "user": user,
+            "guild_id": str(_EPOCH_ID),
+            "status": rng.choice(("online", "idle", "dnd", "offline")),
+            "activities": [],
+            "client_status": {"desktop": "online"},
+        }
+
+    return "MESSAGE_CREATE", {
+        "id": str(_EPOCH_ID + rng.randrange(1 << 40)),
+        "channel_id": str(_EPOCH_ID),
+        "guild_id": str(_EPOCH_ID),
+        "author": {**user, "username": "user", "discriminator": "0001", "avatar": None},
+        "content": "pudding",
+        "timestamp": "2021-08-20T12:00:00.000000+00:00",
+        "type": 0,
+    }
+
+
+class _Bucket:
+    __slots__ = ("name", "remaining", "reset_at", "reset")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.remaining = 0
+        self.reset_at = 0.0
+        self.reset = 0.0
+
+
+class _Session:
+    __slots__ = ("id", "shard", "seq", "sent")
+
+    def __init__(self, id: str, shard: t.List[int], backlog: int) -> None:
+        self.id = id
+        self.shard = shard
+        self.seq = 0
+        self.sent: t.Deque[t.Dict[str, t.Any]] = collections.deque(maxlen=backlog)
+
+
+class _Connection:
+    """One gateway websocket, with its own zlib stream."""
+
+    __slots__ = ("ws", "session", "_deflater", "_lock", "_task")
+
+    def __init__(self, ws: web.WebSocketResponse) -> None:
+        self.ws = ws
+        self.session: t.Optional[_Session] = None
+
+        self._deflater = zlib.compressobj()
+        self._lock = asyncio.Lock()
+        self._task: t.Optional[asyncio.Task] = None
+
+    async def send(self, payload: t.Dict[str, t.Any], latency: float = 0.0) -> None:
+        if latency:
+            await asyncio.sleep(latency)
+
+        async with self._lock:
+            data = JSON.dumps(payload).encode("utf-8")
+            await self.ws.send_bytes(self._deflater.compress(data) + self._deflater.flush(zlib.Z_SYNC_FLUSH))
+
+
+class FakeDiscord:
+    """A local stand-in for Discord's REST API and Gateway.
+
+    It serves the routes `DiscordHTTPClient` uses from in-memory data,
+    with per-route rate limits of `rate_limit` requests each
+    `rate_limit_window` seconds, and a zlib-stream JSON gateway that
+    speaks HELLO, IDENTIFY, HEARTBEAT and RESUME. Every identified
+    session receives `event_rate` events per second made by `events`,
+    and every response and frame is delayed by `latency` seconds. As on
+    Discord, closing a connection with 1000 or 1001 ends its session.
+
+    While running, `Route.BASE` points to the server, and so does the
+    gateway URL it serves.
+    """
+
+    __slots__ = (
+        "token",
+        "latency",
+        "rate_limit",
+        "rate_limit_window",
+        "event_rate",
+        "events",
+        "heartbeat_interval",
+        "users",
+        "guilds",
+        "channels",
+        "emojis",
+        "stickers",
+        "sticker_packs",
+        "invites",
+        "voice_regions",
+
+        "requests",
+        "rate_limited",
+        "events_sent",
+        "identified",
+        "resumed",
+        "_host",
+        "_port",
+        "_runner",
+        "_site",
+        "_base",
+        "_buckets",
+        "_sessions",
+        "_connections",
+        "_rng",
+    )
+
+    def __init__(
+        self,
+        *,
+        token: str = DEFAULT_TOKEN,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        rate_limit: int = 50,
+        rate_limit_window: float = 1.0,
+        event_rate: float = 0.0,
+        events: EventFactory = _default_event,
+        heartbeat_interval: int = 41250,
+        seed: t.Optional[int] = None,
+    ) -> None:
+        self.token = token
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.event_rate = event_rate
+        self.events = events
+        self.heartbeat_interval = heartbeat_interval
+
+        self.users: t.Dict[str, t.Dict[str, t.Any]] = {
+            DEFAULT_USER["id"]: dict(DEFAULT_USER),
+            BOT_USER["id"]: dict(BOT_USER),
+        }
+        self.guilds: t.Dict[str, t.Dict[str, t.Any]] = {}
+        self.channels: t.Dict[str, t.Dict[str, t.Any]] = {}
+        self.emojis: t.Dict[str, t.Dict[str, t.Dict[str, t.Any]]] = {}
+        self.stickers: t.Dict[str, t.Dict[str, t.Any]] = {}
+        self.sticker_packs: t.List[t.Dict[str, t.Any]] = []
+        self.invites: t.Dict[str, t.Dict[str, t.Any]] = {}
+        self.voice_regions: t.List[t.Dict[str, t.Any]] = [
+            {"id": "brazil", "name": "Brazil", "vip": False, "optimal": True, "deprecated": False, "custom": False},
+        ]
+
+        self.requests = 0
+        self.rate_limited = 0
+        self.events_sent = 0
+        self.identified = 0
+        self.resumed = 0
+        self._host = host
+        self._port = port
+        self._runner: t.Optional[web.AppRunner] = None
+        self._site: t.Optional[web.TCPSite] = None
+        self._base: t.Optional[str] = None
+        self._buckets: t.Dict[t.Tuple[str, str, str], _Bucket] = {}
+        self._sessions: t.Dict[str, _Session] = {}
+        self._connections: t.Set[_Connection] = set()
+        self._rng = random.Random(seed)
+
+    async def __aenter__(self) -> "FakeDiscord":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_: t.Any) -> None:
+        await self.close()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self._host}:{self._port}"
+
+    @property
+    def gateway_url(self) -> str:
+        return f"ws://{self._host}:{self._port}"
+
+    @property
+    def base(self) -> str:
+        """The value of `Route.BASE` that points to the server."""
+        return self.url + _API_PREFIX
+
+    async def start(self) -> None:
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+
+        self._site = web.TCPSite(self._runner, self._host, self._port)
+        await self._site.start()
+
+        if not self._port:
+            self._port = self._runner.addresses[0][1]
+
+        self._base = Route.BASE
+        Route.BASE = self.base
+
+    async def close(self) -> None:
+        if self._base is not None:
+            Route.BASE = self._base
+            self._base = None
+
+        for conn in list(self._connections):
+            await conn.ws.close()
+
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def make_app(self) -> web.Application:
+        api = web.Application(middlewares=[self._latency, self._ratelimit, self._auth], client_max_size=2 ** 23)
+        add = api.router.add_route
+
+        add("GET", "/gateway", self.get_gateway)
+        add("GET", "/gateway/bot", self.get_bot_gateway)
+        add("GET", "/users/{id}", self.get_user)
+        add("GET", "/channels/{channel_id}", self.get_channel)
+        add("DELETE", "/channels/{channel_id}", self.delete_channel)
+        add("GET", "/guilds/{guild_id}", self.get_guild)
+        add("GET", "/guilds/{guild_id}/emojis", self.get_guild_emojis)
+        add("POST", "/guilds/{guild_id}/emojis", self.create_guild_emoji)
+        add("GET", "/guilds/{guild_id}/emojis/{emoji_id}", self.get_guild_emoji)
+        add("PATCH", "/guilds/{guild_id}/emojis/{emoji_id}", self.edit_guild_emoji)
+        add("DELETE", "/guilds/{guild_id}/emojis/{emoji_id}", self.delete_guild_emoji)
+        add("GET", "/guilds/{guild_id}/stickers", self.get_guild_stickers)
+        add("POST", "/guilds/{guild_id}/stickers", self.create_guild_sticker)
+        add("GET", "/guilds/{guild_id}/stickers/{sticker_id}", self.get_guild_sticker)
+        add("PATCH", "/guilds/{guild_id}/stickers/{sticker_id}", self.edit_guild_sticker)
+        add("DELETE", "/guilds/{guild_id}/stickers/{sticker_id}", self.delete_guild_sticker)
+        add("GET", "/stickers/{sticker_id}", self.get_sticker)
+        add("GET", "/stickers-packs", self.get_sticker_packs)
+        add("GET", "/invites/{invite_code}", self.get_invite)
+        add("DELETE", "/invites/{invite_code}", self.delete_invite)
+        add("GET", "/voice/regions", self.get_voice_regions)
+
+        app = web.Application()
+        app.router.add_get("/", self.gateway)
+        app.add_subapp(_API_PREFIX, api)
+
+        return app
+
+    def snowflake(self) -> str:
+        return str(_EPOCH_ID + self._rng.randrange(1 << 40))
+
+    # Seeding
+
+    def add_guild(self, name: str = "pudding", **fields: t.Any) -> t.Dict[str, t.Any]:
+        guild = {
+            "id": self.snowflake(),
+            "name": name,
+            "icon": None,
+            "splash": None,
+            "banner": None,
+            "description": None,
+            "features": [],
+            "owner_id": BOT_USER["id"],
+            "emojis": [],
+            "stickers": [],
+            "channels": [],
+            **fields,
+        }
+
+        self.guilds[guild["id"]] = guild
+        self.emojis[guild["id"]] = {e["id"]: e for e in guild["emojis"]}
+
+        for sticker in guild["stickers"]:
+            self.stickers[sticker["id"]] = sticker
+
+        for channel in guild["channels"]:
+            self.channels[channel["id"]] = {**channel, "guild_id": guild["id"]}
+
+        return guild
+
+    def add_user(self, **fields: t.Any) -> t.Dict[str, t.Any]:
+        user = {
+            "id": self.snowflake(),
+            "username": "user",
+            "discriminator": "0001",
+            "avatar": None,
+            **fields,
+        }
+
+        self.users[user["id"]] = user
+        return user
+
+    # Middlewares
+
+    @web.middleware
+    async def _latency(self, request: web.Request, handler: t.Any) -> web.StreamResponse:
+        self.requests += 1
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        return await handler(request)
+
+    @web.middleware
+    async def _auth(self, request: web.Request, handler: t.Any) -> web.StreamResponse:
+        if request.path != _API_PREFIX + "/gateway":
+            if request.headers.get("Authorization") != "Bot " + self.token:
+                return web.json_response({"message": "401: Unauthorized", "code": 0}, status=401)
+
+        return await handler(request)
+
+    @web.middleware
+    async def _ratelimit(self, request: web.Request, handler: t.Any) -> web.StreamResponse:
+        resource = request.match_info.route.resource
+        template = request.path if resource is None else resource.canonical
+        major = ':'.join(
+            request.match_info[k] for k in Route.MAJOR_PARAMETERS if k in request.match_info
+        )
+
+        key = (request.method, template, major)
+        bucket = self._buckets.get(key)
+
+        if bucket is None:
+            name = hashlib.md5((request.method + template).encode()).hexdigest()[:16]
+            bucket = self._buckets[key] = _Bucket(name)
+
+        now = asyncio.get_running_loop().time()
+
+        if now >= bucket.reset_at:
+            bucket.remaining = self.rate_limit
+            bucket.reset_at = now + self.rate_limit_window
+            bucket.reset = round(time.time() + self.rate_limit_window, 3)
+
+        reset_after = round(bucket.reset_at - now, 3)
+        headers = {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Bucket": bucket.name,
+            "X-RateLimit-Reset-After": str(reset_after),
+            "X-RateLimit-Reset": str(bucket.reset),
+        }
+
+        if bucket.remaining <= 0:
+            self.rate_limited += 1
+            headers["X-RateLimit-Remaining"] = "0"
+            headers["Retry-After"] = str(reset_after)
+
+            return web.json_response(
+                {"message": "You are being rate limited.", "retry_after": reset_after, "global": False},
+                status=429,
+                headers=headers,
+            )
+
+        bucket.remaining -= 1
+        headers["X-RateLimit-Remaining"] = str(bucket.remaining)
+
+        response = await handler(request)
+        response.headers.update(headers)
+
+        return response
+
+    # REST
+
+    def _not_found(self, kind: str) -> web.Response:
+        return web.json_response(
+            {"message": f"Unknown {kind.title()}", "code": _UNKNOWN[kind]},
+            status=404,
+        )
+
+    async def get_gateway(self, request: web.Request) -> web.Response:
+        return web.json_response({"url": self.gateway_url})
+
+    async def get_bot_gateway(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "url": self.gateway_url,
+            "shards": 1,
+            "session_start_limit": {
+                "total": 1000,
+                "remaining": 1000,
+                "reset_after": 86400000,
+                "max_concurrency": 1,
+            },
+        })
+
+    async def get_user(self, request: web.Request) -> web.Response:
+        user_id = request.match_info["id"]
+        user = self.users.get(BOT_USER["id"] if user_id == "@me" else user_id)
+
+        if user is None:
+            return self._not_found("user")
+
+        return web.json_response(user)
+
+    async def get_channel(self, request: web.Request) -> web.Response:
+        channel = self.channels.get(request.match_info["channel_id"])
+        return self._not_found("channel") if channel is None else web.json_response(channel)
+
+    async def delete_channel(self, request: web.Request) -> web.Response:
+        channel = self.channels.pop(request.match_info["channel_id"], None)
+        return self._not_found("channel") if channel is None else web.json_response(channel)
+
+    async def get_guild(self, request: web.Request) -> web.Response:
+        guild = self.guilds.get(request.match_info["guild_id"])
+        return self._not_found("guild") if guild is None else web.json_response(guild)
+
+    async def get_guild_emojis(self, request: web.Request) -> web.Response:
+        emojis = self.emojis.get(request.match_info["guild_id"])
+        return self._not_found("guild") if emojis is None else web.json_response(list(emojis.values()))
+
+    async def get_guild_emoji(self, request: web.Request) -> web.Response:
+        emoji = self.emojis.get(request.match_info["guild_id"], {}).get(request.match_info["emoji_id"])
+        return self._not_found("emoji") if emoji is None else web.json_response(emoji)
+
+    async def create_guild_emoji(self, request: web.Request) -> web.Response:
+        emojis = self.emojis.get(request.match_info["guild_id"])
+        if emojis is None:
+            return self._not_found("guild")
+
+        data = await request.json(loads=JSON.loads)
+
+        if not str(data.get("image", "")).startswith("data:image/"):
+            return web.json_response({"message": "Invalid Form Body", "code": 50035}, status=400)
+
+        emoji = {
+            "id": self.snowflake(),
+            "name": data["name"],
+            "roles": data.get("roles", []),
+            "user": BOT_USER,
+            "require_colons": True,
+            "managed": False,
+            "animated": data["image"].startswith("data:image/gif"),
+            "available": True,
+        }
+        emojis[emoji["id"]] = emoji
+
+        return web.json_response(emoji, status=201)
+
+    async def edit_guild_emoji(self, request: web.Request) -> web.Response:
+        emoji = self.emojis.get(request.match_info["guild_id"], {}).get(request.match_info["emoji_id"])
+        if emoji is None:
+            return self._not_found("emoji")
+
+        data = await request.json(loads=JSON.loads)
+        emoji.update((k, data[k]) for k in ("name", "roles") if k in data)
+
+        return web.json_response(emoji)
+
+    async def delete_guild_emoji(self, request: web.Request) -> web.Response:
+        emoji = self.emojis.get(request.match_info["guild_id"], {}).pop(request.match_info["emoji_id"], None)
+        return self._not_found("emoji") if emoji is None else web.Response(status=204)
+
+    def _guild_stickers(self, guild_id: str) -> t.List[t.Dict[str, t.Any]]:
+        return [s for s in self.stickers.values() if s.get("guild_id") == guild_id]
+
+    async def get_guild_stickers(self, request: web.Request) -> web.Response:
+        guild_id = request.match_info["guild_id"]
+
+        if guild_id not in self.guilds:
+            return self._not_found("guild")
+
+        return web.json_response(self._guild_stickers(guild_id))
+
+    async def get_guild_sticker(self, request: web.Request) -> web.Response:
+        sticker = self.stickers.get(request.match_info["sticker_id"])
+
+        if sticker is None or sticker.get("guild_id") != request.match_info["guild_id"]:
+            return self._not_found("sticker")
+
+        return web.json_response(sticker)
+
+    async def create_guild_sticker(self, request: web.Request) -> web.Response:
+        guild_id = request.match_info["guild_id"]
+
+        if guild_id not in self.guilds:
+            return self._not_found("guild")
+
+        form = await request.post()
+
+        if not isinstance(form.get("file"), web.FileField):
+            return web.json_response({"message": "Invalid Form Body", "code": 50035}, status=400)
+
+        sticker = {
+            "id": self.snowflake(),
+            "name": form["name"],
+            "description": form.get("description"),
+            "tags": form["tags"],
+            "type": 2,
+            "format_type": 1,
+            "available": True,
+            "guild_id": guild_id,
+            "user": BOT_USER,
+        }
+        self.stickers[sticker["id"]] = sticker
+
+        return web.json_response(sticker, status=201)
+
+    async def edit_guild_sticker(self, request: web.Request) -> web.Response:
+        sticker = self.stickers.get(request.match_info["sticker_id"])
+
+        if sticker is None or sticker.get("guild_id") != request.match_info["guild_id"]:
+            return self._not_found("sticker")
+
+        data = await request.json(loads=JSON.loads)
+        sticker.update((k, data[k]) for k in ("name", "description", "tags") if k in data)
+
+        return web.json_response(sticker)
+
+    async def delete_guild_sticker(self, request: web.Request) -> web.Response:
+        sticker = self.stickers.get(request.match_info["sticker_id"])
+
+        if sticker is None or sticker.get("guild_id") != request.match_info["guild_id"]:
+            return self._not_found("sticker")
+
+        del self.stickers[sticker["id"]]
+        return web.Response(status=204)
+
+    async def get_sticker(self, request: web.Request) -> web.Response:
+        sticker = self.stickers.get(request.match_info["sticker_id"])
+        return self._not_found("sticker") if sticker is None else web.json_response(sticker)
+
+    async def get_sticker_packs(self, request: web.Request) -> web.Response:
+        return web.json_response({"sticker_packs": self.sticker_packs})
+
+    async def get_invite(self, request: web.Request) -> web.Response:
+        invite = self.invites.get(request.match_info["invite_code"])
+        return self._not_found("invite") if invite is None else web.json_response(invite)
+
+    async def delete_invite(self, request: web.Request) -> web.Response:
+        invite = self.invites.pop(request.match_info["invite_code"], None)
+        return self._not_found("invite") if invite is None else web.json_response(invite)
+
+    async def get_voice_regions(self, request: web.Request) -> web.Response:
+        return web.json_response(self.voice_regions)
+
+    # Gateway
+
+    async def dispatch(self, event: str, data: t.Any) -> None:
+        """Sends an event to every identified session."""
+        for conn in list(self._connections):
+            if conn.session is not None:
+                await self._dispatch(conn, event, data)
+
+    async def reconnect(self) -> None:
+        """Asks every connected session to reconnect."""
+        for conn in list(self._connections):
+            await conn.send({"op": 7, 'd': None, 's': None, 't': None})
+
+    async def _dispatch(self, conn: _Connection, event: str, data: t.Any) -> None:
+        session = conn.session
+        assert session
+
+        session.seq += 1
+        payload = {"t": event, "s": session.seq, "op": 0, "d": data}
+        session.sent.append(payload)
+
+        self.events_sent += 1
+        await conn.send(payload, self.latency)
+
+    async def gateway(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        if request.query.get("encoding", "json") != "json" or request.query.get("compress") != "zlib-stream":
+            await ws.close(code=4012, message=b"Invalid API version")
+            return ws
+
+        conn = _Connection(ws)
+        self._connections.add(conn)
+
+        try:
+            await conn.send({"op": 10, 'd': {"heartbeat_interval": self.heartbeat_interval}, 's': None, 't': None})
+
+            async for message in ws:
+                if message.type is not WSMsgType.TEXT:
+                    continue
+
+                await self._handle(conn, JSON.loads(message.data))
+        finally:
+            self._connections.discard(conn)
+
+            if conn.session is not None and ws.close_code in (1000, 1001):
+                self._sessions.pop(conn.session.id, None)
+
+            if conn._task is not None:
+                conn._task.cancel()
+
+        return ws
+
+    async def _handle(self, conn: _Connection, payload: t.Dict[str, t.Any]) -> None:
+        op, d = payload["op"], payload.get('d')
+
+        if op == 1:
+            return await conn.send({"op": 11, 'd': None, 's': None, 't': None}, self.latency)
+
+        if op == 2:
+            if d.get("token") != self.token:
+                await conn.ws.close(code=4004, message=b"Authentication failed.")
+                return
+
+            session = _Session(self.snowflake(), d.get("shard", [0, 1]), backlog=1000)
+            self._sessions[session.id] = session
+            conn.session = session
+            self.identified += 1
+
+            await self._dispatch(conn, "READY", {
+                "v": 9,
+                "user": BOT_USER,
+                "guilds": [{"id": guild_id, "unavailable": True} for guild_id in self.guilds],
+                "session_id": session.id,
+                "resume_gateway_url": self.gateway_url,
+                "shard": session.shard,
+                "application": {"id": BOT_USER["id"], "flags": 0},
+            })
+
+            for guild in self.guilds.values():
+                await self._dispatch(conn, "GUILD_CREATE", guild)
+
+            self._start_events(conn)
+            return
+
+        if op == 6:
+            session = self._sessions.get(d.get("session_id"))
+
+            if session is None or d.get("token") != self.token:
+                return await conn.send({"op": 9, 'd': False, 's': None, 't': None})
+
+            conn.session = session
+            self.resumed += 1
+
+            for missed in list(session.sent):
+                if missed['s'] > (d.get("seq") or 0):
+                    await conn.send(missed, self.latency)
+
+            await self._dispatch(conn, "RESUMED", None)
+
+            self._start_events(conn)
+
+    def _start_events(self, conn: _Connection) -> None:
+        if self.event_rate > 0 and conn._task is None:
+            conn._task = asyncio.ensure_future(self._produce(conn))
+
+    async def _produce(self, conn: _Connection) -> None:
+        interval = 1 / self.event_rate
+        rng = random.Random(self._rng.random())
+
+        while not conn.ws.closed:
+            await self._dispatch(conn, *self.events(rng))
+            await asyncio.sleep(interval)
+
+
+def main(argv: t.Optional[t.List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Runs a local stand-in for Discord.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--token", default=DEFAULT_TOKEN)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--event-rate", type=float, default=0.0, help="events per second per session")
+    args = parser.parse_args(argv)
+
+    async def serve() -> None:
+        async with FakeDiscord(
+            token=args.token,
+            host=args.host,
+            port=args.port,
+            latency=args.latency,
+            event_rate=args.event_rate,
+        ) as fake:
+            print(f"REST at {fake.base}, gateway at {fake.gateway_url}", file=sys.stderr)
+            await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
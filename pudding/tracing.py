@@ -0,0 +1,105 @@
+import itertools
+import contextvars
+import typing as t
+
+if t.TYPE_CHECKING:
+    from .http import Route
+
+__all__ = (
+    "Tracer",
+    "SpanRecorder",
+    "current_trace_id",
+)
+
+_ids = itertools.count(1)
+
+# The id of the gateway frame whose event is being dispatched.
+current_trace_id: contextvars.ContextVar[t.Optional[int]] = contextvars.ContextVar(
+    "pudding_trace_id", default=None,
+)
+
+
+def new_trace_id() -> int:
+    return next(_ids)
+
+
+class Tracer:
+    """Hooks called around requests and gateway frames.
+
+    Every hook gets the correlation id of its request or frame and a
+    `time.perf_counter` timestamp. The methods do nothing, override the
+    ones you need; hooks run inline, so they should be quick.
+    """
+
+    __slots__ = ()
+
+    # HTTP
+
+    def request_start(self, trace_id: int, route: "Route", ts: float) -> None:
+        pass
+
+    def ratelimit_wait(self, trace_id: int, route: "Route", start: float, end: float) -> None:
+        pass
+
+    def response_headers(self, trace_id: int, route: "Route", status: int, ts: float) -> None:
+        pass
+
+    def response_decoded(self, trace_id: int, route: "Route", status: int, ts: float) -> None:
+        pass
+
+    def request_end(self, trace_id: int, route: "Route", ts: float, error: t.Optional[BaseException]) -> None:
+        pass
+
+    # Gateway
+
+    def frame_received(self, trace_id: int, shard_id: int, size: int, ts: float) -> None:
+        pass
+
+    def payload_decoded(self, trace_id: int, shard_id: int, op: t.Optional[int], event: t.Optional[str], ts: float) -> None:
+        pass
+
+    def dispatched(self, trace_id: int, shard_id: int, event: str, ts: float) -> None:
+        pass
+
+    def handler_finished(self, trace_id: t.Optional[int], event: str, ts: float, error: t.Optional[BaseException]) -> None:
+        pass
+
+
+class SpanRecorder(Tracer):
+    """Keeps every hook call as `(hook, trace_id, timestamp, fields)`."""
+
+    __slots__ = ("records",)
+
+    def __init__(self) -> None:
+        self.records: t.List[t.Tuple[str, t.Optional[int], float, t.Dict[str, t.Any]]] = []
+
+    def trace(self, trace_id: t.Optional[int]) -> t.List[t.Tuple[str, float, t.Dict[str, t.Any]]]:
+        """Returns the hooks of one request or frame, in order."""
+        return [(hook, ts, fields) for hook, id, ts, fields in self.records if id == trace_id]
+
+    def request_start(self, trace_id: int, route: "Route", ts: float) -> None:
+        self.records.append(("request_start", trace_id, ts, {"route": route.key}))
+
+    def ratelimit_wait(self, trace_id: int, route: "Route", start: float, end: float) -> None:
+        self.records.append(("ratelimit_wait", trace_id, end, {"waited": end - start}))
+
+    def response_headers(self, trace_id: int, route: "Route", status: int, ts: float) -> None:
+        self.records.append(("response_headers", trace_id, ts, {"status": status}))
+
+    def response_decoded(self, trace_id: int, route: "Route", status: int, ts: float) -> None:
+        self.records.append(("response_decoded", trace_id, ts, {"status": status}))
+
+    def request_end(self, trace_id: int, route: "Route", ts: float, error: t.Optional[BaseException]) -> None:
+        self.records.append(("request_end", trace_id, ts, {"error": error}))
+
+    def frame_received(self, trace_id: int, shard_id: int, size: int, ts: float) -> None:
+        self.records.append(("frame_received", trace_id, ts, {"shard_id": shard_id, "size": size}))
+
+    def payload_decoded(self, trace_id: int, shard_id: int, op: t.Optional[int], event: t.Optional[str], ts: float) -> None:
+        self.records.append(("payload_decoded", trace_id, ts, {"op": op, "event": event}))
+
+    def dispatched(self, trace_id: int, shard_id: int, event: str, ts: float) -> None:
+        self.records.append(("dispatched", trace_id, ts, {"event": event}))
+
+    def handler_finished(self, trace_id: t.Optional[int], event: str, ts: float, error: t.Optional[BaseException]) -> None:
+        self.records.append(("handler_finished", trace_id, ts, {"event": event, "error": error}))
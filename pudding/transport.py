@@ -0,0 +1,77 @@
+import typing as t
+
+import aiohttp
+
+from .codec import JSON
+
+_DEFAULT_LIMIT = 100
+_DEFAULT_LIMIT_PER_HOST = 50
+_DEFAULT_DNS_TTL = 300
+_DEFAULT_KEEPALIVE = 60.0
+
+
+class Transport:
+    """Owns the `aiohttp.ClientSession` shared by the REST and Gateway clients."""
+
+    __slots__ = (
+        "limit",
+        "limit_per_host",
+        "ttl_dns_cache",
+        "keepalive_timeout",
+        "timeout",
+
+        "_session",
+    )
+
+    def __init__(
+        self,
+        *,
+        limit: int = _DEFAULT_LIMIT,
+        limit_per_host: int = _DEFAULT_LIMIT_PER_HOST,
+        ttl_dns_cache: t.Optional[int] = _DEFAULT_DNS_TTL,
+        keepalive_timeout: float = _DEFAULT_KEEPALIVE,
+        timeout: t.Optional[aiohttp.ClientTimeout] = None,
+    ) -> None:
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.ttl_dns_cache = ttl_dns_cache
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+
+        self._session: t.Optional[aiohttp.ClientSession] = None
+
+    def is_closed(self) -> bool:
+        return self._session is None or self._session.closed
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The pooled session, created on first use."""
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+
+        return self._session
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            use_dns_cache=self.ttl_dns_cache is not None,
+            ttl_dns_cache=self.ttl_dns_cache,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+
+        kwargs: t.Dict[str, t.Any] = {
+            "connector": connector,
+            "json_serialize": JSON.dumps,
+        }
+        if self.timeout is not None:
+            kwargs["timeout"] = self.timeout
+
+        return aiohttp.ClientSession(**kwargs)
+
+    async def close(self) -> None:
+        if self._session is None:
+            return
+
+        session, self._session = self._session, None
+        await session.close()
@@ -1,11 +1,70 @@
-from .application import *
-from .channel import *
-from .emoji import *
-from .gateway import *
-from .guild import *
-from .invite import *
-from .payloads import *
-from .snowflake import *
-from .sticker import *
-from .user import *
-from .voice_region import *
+import importlib
+import typing as t
+
+# The public names of each module. A module is only imported when one of
+# its names is first used, `tests/test_types.py` keeps this in sync.
+_EXPORTS = {
+    "application": ("PartialApplication", "Application"),
+    "channel": ("ChannelType", "PartialChannel", "Channel"),
+    "emoji": ("PartialEmoji", "Emoji"),
+    "gateway": ("GatewayPayload", "SessionStartLimit", "GatewayBotPayload", "Packet", "Payload"),
+    "guild": ("PartialGuild", "Guild"),
+    "invite": ("TargetType", "InviteMetadata", "Invite"),
+    "payloads": (
+        "Hello",
+        "UnvailableGuild",
+        "Ready",
+        "Resumed",
+        "Reconnect",
+        "InvalidSession",
+        "HelloPayload",
+        "ReadyPayload",
+        "ResumedPayload",
+        "ReconnectPayload",
+        "InvalidSessionPayload",
+        "EventPayload",
+    ),
+    "snowflake": ("Snowflake",),
+    "sticker": (
+        "StickerType",
+        "StickerFormatType",
+        "PartialSticker",
+        "Sticker",
+        "StickerPack",
+        "ListNitroStickerPacks",
+    ),
+    "user": ("PremiumType", "PartialUser", "User"),
+    "voice_region": ("VoiceRegion",),
+}
+
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = tuple(_MODULES)
+
+if t.TYPE_CHECKING:
+    from .application import *
+    from .channel import *
+    from .emoji import *
+    from .gateway import *
+    from .guild import *
+    from .invite import *
+    from .payloads import *
+    from .snowflake import *
+    from .sticker import *
+    from .user import *
+    from .voice_region import *
+
+
+def __getattr__(name: str) -> t.Any:
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module("." + module, __name__), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__() -> t.List[str]:
+    return sorted({*globals(), *_MODULES})
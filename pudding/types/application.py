@@ -1,9 +1,15 @@
+__all__ = (
+    "PartialApplication",
+    "Application",
+)
+
 import typing as t
 from .snowflake import Snowflake
 
 
-class PartialApplication:
-    pass
+class PartialApplication(t.TypedDict):
+    id: Snowflake
+    flags: int
 
 
 class Application(t.TypedDict):
@@ -1,10 +1,15 @@
 __all__ = (
+    "ChannelType",
+    "PartialChannel",
     "Channel",
 )
 
 import typing as t
 from .snowflake import Snowflake
 
+ChannelType = t.Literal[0, 1, 2, 3, 4, 5, 6, 10, 11, 12, 13]
+
+
 class _RawChannel(t.TypedDict):
     id: Snowflake
     name: str
@@ -14,8 +19,10 @@ class _RawGuildChannel(_RawChannel):
     pass
 
 
-class PartialChannel:
-    pass
+class PartialChannel(t.TypedDict):
+    id: Snowflake
+    name: str
+    type: ChannelType
 
 
 class Channel(_RawChannel):
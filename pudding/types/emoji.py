@@ -1,3 +1,8 @@
+__all__ = (
+    "PartialEmoji",
+    "Emoji",
+)
+
 import typing as t
 from .user import User
 from .snowflake import Snowflake
@@ -1,6 +1,44 @@
-class PartialGuild:
-    pass
+__all__ = (
+    "PartialGuild",
+    "Guild",
+)
 
+import typing as t
 
-class Guild(PartialGuild):
-    pass
+from .emoji import Emoji
+from .sticker import Sticker
+from .snowflake import Snowflake
+
+
+class PartialGuild(t.TypedDict):
+    id: Snowflake
+    name: str
+    icon: t.Optional[str]
+
+
+class _OptionalPartialGuild(t.TypedDict, total=False):
+    splash: t.Optional[str]
+    banner: t.Optional[str]
+    description: t.Optional[str]
+    features: t.List[str]
+    verification_level: int
+    vanity_url_code: t.Optional[str]
+    nsfw_level: int
+    premium_subscription_count: int
+
+
+class Guild(_OptionalPartialGuild, PartialGuild, total=False):
+    owner_id: Snowflake
+    region: t.Optional[str]
+    afk_channel_id: t.Optional[Snowflake]
+    afk_timeout: int
+    roles: t.List[t.Dict[str, t.Any]]
+    emojis: t.List[Emoji]
+    stickers: t.List[Sticker]
+    channels: t.List[t.Dict[str, t.Any]]
+    members: t.List[t.Dict[str, t.Any]]
+    member_count: int
+    large: bool
+    unavailable: bool
+    premium_tier: int
+    preferred_locale: str
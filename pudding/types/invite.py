@@ -1,3 +1,9 @@
+__all__ = (
+    "TargetType",
+    "InviteMetadata",
+    "Invite",
+)
+
 import typing as t
 
 from .user import User
@@ -1,3 +1,7 @@
+__all__ = (
+    "Snowflake",
+)
+
 import typing as t
 
 
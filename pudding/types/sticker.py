@@ -1,3 +1,12 @@
+__all__ = (
+    "StickerType",
+    "StickerFormatType",
+    "PartialSticker",
+    "Sticker",
+    "StickerPack",
+    "ListNitroStickerPacks",
+)
+
 import typing as t
 
 from .user import User
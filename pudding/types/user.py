@@ -1,3 +1,9 @@
+__all__ = (
+    "PremiumType",
+    "PartialUser",
+    "User",
+)
+
 import typing as t
 from .snowflake import Snowflake
 
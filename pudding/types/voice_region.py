@@ -1,3 +1,7 @@
+__all__ = (
+    "VoiceRegion",
+)
+
 import typing as t
 from .snowflake import Snowflake
 
@@ -1,4 +1,6 @@
+import time
 import typing as t
+from collections import OrderedDict
 
 
 class suppress_all:
@@ -15,3 +17,86 @@ class suppress_all:
             return False
 
         return issubclass(t, self.exc)
+
+
+K = t.TypeVar('K')
+V = t.TypeVar('V')
+
+
+class LRUCache(t.Generic[K, V]):
+    """A mapping that evicts its least recently used items.
+
+    Items are dropped once there are more than `maxsize` of them, or when
+    they are read after `ttl` seconds. `None` disables each limit.
+    `on_evict` is called with the key and value of every dropped item.
+    """
+
+    __slots__ = ("maxsize", "ttl", "on_evict", "_data")
+
+    def __init__(
+        self,
+        maxsize: t.Optional[int] = None,
+        ttl: t.Optional[float] = None,
+        *,
+        on_evict: t.Optional[t.Callable[[K, V], t.Any]] = None,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._data: "OrderedDict[K, t.Tuple[V, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __iter__(self) -> t.Iterator[K]:
+        return iter(list(self._data))
+
+    def get(self, key: K, default: t.Any = None) -> t.Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+
+        value, expires_at = entry
+        if expires_at and expires_at < time.monotonic():
+            del self._data[key]
+
+            if self.on_evict is not None:
+                self.on_evict(key, value)
+
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V, ttl: t.Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else 0.0
+
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+
+        if self.maxsize is not None:
+            while len(self._data) > self.maxsize:
+                old, (evicted, _) = self._data.popitem(last=False)
+
+                if self.on_evict is not None:
+                    self.on_evict(old, evicted)
+
+    def pop(self, key: K, default: t.Any = None) -> t.Any:
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def values(self) -> t.Iterator[V]:
+        for key in self:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                yield value
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+_MISSING: t.Any = object()
@@ -1,20 +1,29 @@
 import os
 from typing import Optional
 
-import pytest
 import dotenv
+import pytest_asyncio
 
 import pudding
+from pudding.testing import FakeDiscord
 
 dotenv.load_dotenv(override=True)  # type: ignore
 
 
-@pytest.fixture
+@pytest_asyncio.fixture
 async def http():
     token: Optional[str] = os.getenv("TEST_TOKEN")
-    assert token, "The 'TEST_TOKEN' env var is not defined"
 
-    client = pudding.DiscordHTTPClient(token)
-    yield client
+    if token:
+        client = pudding.DiscordHTTPClient(token)
+        yield client
 
-    await client.close()
+        await client.close()
+        return
+
+    # without a token, the tests run against a local stand-in
+    async with FakeDiscord() as fake:
+        client = pudding.DiscordHTTPClient(fake.token)
+        yield client
+
+        await client.close()
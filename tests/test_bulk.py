@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+from pudding import DiscordHTTPClient, errors
+
+
+@pytest.mark.asyncio
+async def test_fetch_many_is_bounded_and_collects_errors():
+    http = DiscordHTTPClient()
+    running = 0
+    peak = 0
+
+    async def fetch(id: int) -> int:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+
+        await asyncio.sleep(0.001 * (id % 3))
+        running -= 1
+
+        if id == 7:
+            raise errors.NotFound()
+
+        return id * 2
+
+    results = {id: result async for id, result in http.fetch_many(fetch, range(20), concurrency=4)}
+
+    assert peak == 4
+    assert isinstance(results.pop(7), errors.NotFound)
+    assert results == {id: id * 2 for id in range(20) if id != 7}
+
+    await http.close()
@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+
+from pudding import Bot, DiscordHTTPClient, errors
+from pudding.cluster import Cluster, ClusterClient, _worker_main
+from pudding.session import SessionStore
+from pudding.testing import FakeDiscord
+
+
+def test_shard_ranges():
+    cluster = Cluster(dict, "token", processes=3)
+
+    assert cluster.shard_ranges(8) == [range(0, 3), range(3, 6), range(6, 8)]
+    assert cluster.shard_ranges(2) == [range(0, 1), range(1, 2)]
+
+
+@pytest.mark.asyncio
+async def test_worker_requests_are_answered(tmp_path):
+    events = []
+    cluster = Cluster(dict, "token", on_event=lambda *args: events.append(args))
+
+    class FakeScheduler:
+        async def acquire(self, shard_id):
+            events.append(("identify", shard_id))
+
+    class FakeHTTP:
+        async def request(self, route, **kwargs):
+            if route.params["id"] == 0:
+                raise errors.NotFound("unknown user")
+            if route.params["id"] == -1:
+                raise RuntimeError("session is closed")
+            return {"id": str(route.params["id"])}
+
+        async def close(self):
+            pass
+
+    cluster.scheduler = FakeScheduler()
+    cluster.http = FakeHTTP()
+
+    path = str(tmp_path / "cluster.sock")
+    server = await asyncio.start_unix_server(cluster._handle_worker, path)
+    client = await ClusterClient.connect(path)
+
+    try:
+        await client.identify(3)
+        await client.send_event("READY", {})
+
+        params = {"method": "GET", "path": "/users/{id}", "auth": True, "reason": None, "kwargs": {}}
+        assert await client.call("request", params={"id": 1}, **params) == {"id": "1"}
+
+        with pytest.raises(errors.NotFound):
+            await client.call("request", params={"id": 0}, **params)
+
+        with pytest.raises(errors.PuddingError, match="session is closed"):
+            await asyncio.wait_for(client.call("request", params={"id": -1}, **params), 1)
+
+        # a KeyError while building the route
+        with pytest.raises(errors.PuddingError):
+            await asyncio.wait_for(client.call("request", params={}, **params), 1)
+
+        await asyncio.sleep(0)
+        assert not cluster._tasks
+    finally:
+        await client.close()
+        server.close()
+        await cluster.http.close()
+
+    assert events == [("identify", 3), ("READY", {})]
+
+
+@pytest.mark.asyncio
+async def test_close_shuts_workers_down(tmp_path):
+    cluster = Cluster(dict, "token")
+    shutdown = asyncio.Event()
+
+    class FakeWorker:
+        def __init__(self, stops):
+            self.stops = stops
+            self.terminated = False
+
+        def join(self, timeout=None):
+            pass
+
+        def is_alive(self):
+            return not self.stops
+
+        def terminate(self):
+            self.terminated = True
+
+    cluster._workers = [FakeWorker(True), FakeWorker(False)]
+
+    path = str(tmp_path / "cluster.sock")
+    server = await asyncio.start_unix_server(cluster._handle_worker, path)
+    client = await ClusterClient.connect(path)
+    client.on_shutdown = shutdown.set
+
+    try:
+        # the channel is registered once the cluster accepts it
+        while not cluster._channels:
+            await asyncio.sleep(0)
+
+        await cluster.close(timeout=0)
+        await asyncio.wait_for(shutdown.wait(), 1)
+    finally:
+        await client.close()
+        server.close()
+
+    # only the worker that didn't stop in time is terminated
+    assert [worker.terminated for worker in cluster._workers] == [False, True]
+
+
+@pytest.mark.asyncio
+async def test_worker_closes_its_transport_and_saves_sessions(tmp_path):
+    path = str(tmp_path / "cluster.sock")
+    sessions = str(tmp_path / "sessions.json")
+
+    async with FakeDiscord() as fake:
+        cluster = Cluster(dict, fake.token)
+        cluster.http = DiscordHTTPClient(fake.token)
+        gateway = await cluster.http.get_bot_gateway()
+
+        class FakeScheduler:
+            async def acquire(self, shard_id):
+                pass
+
+        cluster.scheduler = FakeScheduler()
+        server = await asyncio.start_unix_server(cluster._handle_worker, path)
+
+        bot = Bot(0, session_file=sessions)
+        bot.token = fake.token
+        transport = bot.http.transport
+
+        worker = asyncio.ensure_future(_worker_main(bot, path, [0], 1, gateway, frozenset(), True))
+
+        try:
+            while not (bot.shards and bot.gtws.session_id):
+                await asyncio.sleep(0.01)
+
+            await cluster.close(timeout=0)
+            await asyncio.wait_for(worker, 1)
+        finally:
+            server.close()
+
+    assert transport.is_closed()
+    assert list(SessionStore(sessions).load()) == ["0/1"]
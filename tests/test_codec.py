@@ -0,0 +1,21 @@
+import pytest
+
+from pudding.codec import JSONCodec
+
+PAYLOAD = {"op": 0, "t": "MESSAGE_CREATE", "s": 1, "d": {"content": "pudding 🍮"}}
+
+
+@pytest.mark.parametrize("backend", ["orjson", "ujson", "json"])
+def test_round_trip(backend: str):
+    pytest.importorskip(backend)
+    codec = JSONCodec(backend)
+
+    encoded = codec.dumps(PAYLOAD)
+
+    assert isinstance(encoded, str)
+    assert codec.loads(encoded.encode("utf-8")) == PAYLOAD
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        JSONCodec("yaml")
@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from pudding.dispatcher import Dispatcher
+
+
+@pytest.mark.asyncio
+async def test_handlers_run_outside_the_caller():
+    dispatcher = Dispatcher()
+    received = []
+
+    @dispatcher.listen()
+    async def on_message_create(payload):
+        await asyncio.sleep(0)
+        received.append(payload)
+
+    assert dispatcher.has_handlers("MESSAGE_CREATE")
+    assert dispatcher("MESSAGE_CREATE", 1) is None
+    assert dispatcher("TYPING_START", 2) is None
+    assert received == []
+
+    await dispatcher.queue("MESSAGE_CREATE").join()
+    dispatcher.close()
+
+    assert received == [1]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("policy", ["drop", "block", "spill"])
+async def test_backpressure_policies(policy: str):
+    dispatcher = Dispatcher(maxsize=1, policy=policy, concurrency=1)
+    release = asyncio.Event()
+    received = []
+
+    @dispatcher.listen("GUILD_CREATE")
+    async def handler(payload):
+        await release.wait()
+        received.append(payload)
+
+    dispatcher("GUILD_CREATE", 0)
+    await asyncio.sleep(0)  # the worker takes the first payload
+
+    dispatcher("GUILD_CREATE", 1)
+    waiter = dispatcher("GUILD_CREATE", 2)
+
+    if policy == "block":
+        assert waiter is not None
+        release.set()
+        await waiter
+    else:
+        assert waiter is None
+        release.set()
+
+    queue = dispatcher.queue("GUILD_CREATE")
+    await queue.join()
+    dispatcher.close()
+
+    if policy == "drop":
+        assert received == [0, 1]
+        assert queue.dropped == 1
+    else:
+        assert received == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_configure_keeps_queued_payloads():
+    dispatcher = Dispatcher(maxsize=1, policy="block", concurrency=1)
+    release = asyncio.Event()
+    received = []
+
+    @dispatcher.listen("GUILD_CREATE")
+    async def handler(payload):
+        await release.wait()
+        received.append(payload)
+
+    dispatcher("GUILD_CREATE", 0)
+    await asyncio.sleep(0)
+
+    dispatcher("GUILD_CREATE", 1)
+    waiter = dispatcher("GUILD_CREATE", 2)
+    assert waiter is not None
+
+    old = dispatcher.queue("GUILD_CREATE")
+    dispatcher.configure("GUILD_CREATE", maxsize=10)
+    assert dispatcher.queue("GUILD_CREATE") is None
+
+    assert dispatcher("GUILD_CREATE", 3) is None
+    release.set()
+
+    await asyncio.wait_for(waiter, 1)
+    await asyncio.wait_for(old.join(), 1)
+    await dispatcher.queue("GUILD_CREATE").join()
+    dispatcher.close()
+
+    assert sorted(received) == [0, 1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_close_wakes_blocked_callers():
+    dispatcher = Dispatcher(maxsize=1, policy="block", concurrency=1)
+
+    @dispatcher.listen("GUILD_CREATE")
+    async def handler(payload):
+        await asyncio.Event().wait()
+
+    dispatcher("GUILD_CREATE", 0)
+    await asyncio.sleep(0)
+
+    dispatcher("GUILD_CREATE", 1)
+    waiter = dispatcher("GUILD_CREATE", 2)
+    queue = dispatcher.queue("GUILD_CREATE")
+
+    dispatcher.close()
+
+    await asyncio.wait_for(waiter, 1)
+    assert queue.dropped == 1
+
+
+def test_handlers_must_be_coroutines():
+    with pytest.raises(TypeError):
+        Dispatcher().add_handler("READY", print)
@@ -0,0 +1,79 @@
+import pytest
+
+from pudding import etf
+from pudding.codec import JSON
+
+
+def test_round_trip():
+    packet = {
+        "op": 2,
+        "d": {
+            "token": "token",
+            "intents": 513,
+            "large_threshold": -1,
+            "ratio": 0.5,
+            "shard": [0, 1],
+            "presence": None,
+            "compress": False,
+            "tags": [],
+        },
+    }
+
+    assert etf.decode(etf.encode(packet)) == packet
+
+
+def test_payloads_match_json():
+    payload = {
+        "op": 0,
+        "s": 1,
+        "t": "PRESENCE_UPDATE",
+        "d": {
+            "user": {"id": "256444020413300736"},
+            "since": 1650000000000,
+            "activities": [{"created_at": 1650000000123, "timestamps": {"start": 1649999990000}}],
+            "flag": True,
+        },
+    }
+
+    decoded = etf.decode(memoryview(etf.encode(payload)))
+
+    assert decoded == JSON.loads(JSON.dumps(payload))
+    assert decoded["d"]["since"] == 1650000000000
+
+
+def test_snowflakes_match_json():
+    # Discord sends snowflakes as SMALL_BIG_EXT integers over ETF
+    data = etf.encode({
+        "id": 1000000000000000000,
+        "guild_id": 256444020413300736,
+        "author": {"id": 80351110224678912, "discriminator": "0001"},
+        "mention_roles": [41771983423143936],
+        "timestamp": 1650000000000,
+    })
+
+    assert data[13] == etf.SMALL_BIG_EXT  # the value of "id"
+    assert etf.decode(data) == JSON.loads("""{
+        "id": "1000000000000000000",
+        "guild_id": "256444020413300736",
+        "author": {"id": "80351110224678912", "discriminator": "0001"},
+        "mention_roles": ["41771983423143936"],
+        "timestamp": 1650000000000
+    }""")
+
+
+def test_short_integer_lists():
+    # STRING_EXT [0, 1], how Erlang sends READY's `shard`
+    data = b'\x83\x74\x00\x00\x00\x01\x6d\x00\x00\x00\x05shard\x6b\x00\x02\x00\x01'
+
+    assert etf.decode(data) == {"shard": [0, 1]} == JSON.loads('{"shard": [0, 1]}')
+
+
+def test_atoms_are_decoded_to_str():
+    # SMALL_ATOM_UTF8_EXT 'READY'
+    assert etf.decode(b'\x83\x77\x05READY') == "READY"
+    assert etf.decode(b'\x83\x77\x03nil') is None
+
+
+def test_missing_version():
+    with pytest.raises(etf.ETFError):
+        etf.decode(b'\x61\x01')
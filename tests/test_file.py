@@ -0,0 +1,81 @@
+import io
+import json
+import mmap
+import base64
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from pudding import DiscordHTTPClient, File
+from pudding.file import DataURIPayload
+from pudding.http import Route
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 1000
+
+
+class Writer:
+    def __init__(self) -> None:
+        self.data = bytearray()
+
+    async def write(self, chunk) -> None:
+        self.data += chunk
+
+
+@pytest.mark.asyncio
+async def test_data_uri_is_encoded_in_chunks(tmp_path):
+    path = tmp_path / "emoji.png"
+    path.write_bytes(PNG)
+
+    fp = io.BytesIO(b"junk" + PNG)
+    fp.seek(4)
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for source in (PNG, path, fp, mapped):
+            payload = DataURIPayload({"name": "pudding"}, "image", File(source))
+            writer = Writer()
+            await payload.write(writer)
+
+            assert len(writer.data) == payload.size
+            assert json.loads(writer.data) == {
+                "name": "pudding",
+                "image": "data:image/png;base64," + base64.b64encode(PNG).decode(),
+            }
+
+
+@pytest.mark.asyncio
+async def test_uploads_are_streamed_and_retried(monkeypatch, tmp_path):
+    path = tmp_path / "sticker.png"
+    path.write_bytes(PNG)
+    received = []
+
+    async def emojis(request: web.Request) -> web.Response:
+        received.append(await request.json())
+        return web.json_response({"id": "1"})
+
+    async def stickers(request: web.Request) -> web.Response:
+        form = await request.post()
+        received.append((form["name"], form["file"].filename, form["file"].file.read()))
+
+        if len(received) == 2:
+            return web.json_response({"retry_after": 0.01, "global": False}, status=429)
+
+        return web.json_response({"id": "2"})
+
+    app = web.Application(client_max_size=2 ** 20)
+    app.router.add_post("/guilds/{guild_id}/emojis", emojis)
+    app.router.add_post("/guilds/{guild_id}/stickers", stickers)
+
+    async with TestServer(app) as server:
+        monkeypatch.setattr(Route, "BASE", str(server.make_url("")).rstrip('/'))
+        http = DiscordHTTPClient("token")
+
+        try:
+            await http.create_guild_emoji(1, name="pudding", image=PNG, roles=["3"])
+            assert received[0]["roles"] == ["3"]
+            assert base64.b64decode(received[0]["image"].split(',', 1)[1]) == PNG
+
+            await http.create_guild_sticker(1, name="pudding", description="", tags="cake", file=path)
+            assert received[1] == received[2] == ("pudding", "sticker.png", PNG)
+        finally:
+            await http.close()
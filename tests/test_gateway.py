@@ -0,0 +1,171 @@
+import json
+import zlib
+import asyncio
+
+import pytest
+
+from pudding.gateway import DiscordWebSocket, KeepAlive, SendQueue
+from pudding.shard import IdentifyScheduler
+
+
+class FakeWebSocket:
+    def __init__(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.sent = []
+        self.closed = False
+        self.on_send = None
+
+    def heartbeat(self):
+        return {"op": 1, "d": None}
+
+    async def send(self, packet) -> None:
+        self.sent.append(packet)
+
+        if self.on_send:
+            self.loop.call_soon(self.on_send)
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_is_acknowledged():
+    ws = FakeWebSocket()
+    keep_alive = KeepAlive(ws, 0.01)
+    ws.on_send = keep_alive.ack
+    keep_alive.start()
+
+    await asyncio.sleep(0.05)
+    keep_alive.stop()
+
+    assert len(ws.sent) >= 2
+    assert keep_alive.latency is not None
+    assert not ws.closed
+
+
+@pytest.mark.asyncio
+async def test_zombie_connection_is_closed():
+    ws = FakeWebSocket()
+    keep_alive = KeepAlive(ws, 0.01)
+    keep_alive.start()
+
+    await asyncio.sleep(0.05)
+
+    assert len(ws.sent) == 1
+    assert ws.closed
+    assert not keep_alive.is_running()
+
+
+@pytest.mark.asyncio
+async def test_identify_scheduler_buckets():
+    limit = {"total": 1000, "remaining": 1000, "reset_after": 0, "max_concurrency": 2}
+    scheduler = IdentifyScheduler(limit, interval=0.05)
+    loop = asyncio.get_running_loop()
+
+    start = loop.time()
+    await asyncio.gather(*(scheduler.acquire(shard_id) for shard_id in range(4)))
+
+    # shards 0 and 2 (and 1 and 3) share a bucket, so one extra interval
+    assert 0.05 <= loop.time() - start < 0.1
+    assert scheduler.remaining == 996
+
+
+@pytest.mark.asyncio
+async def test_identify_scheduler_waits_for_quota():
+    limit = {"total": 5, "remaining": 0, "reset_after": 50, "max_concurrency": 1}
+    scheduler = IdentifyScheduler(limit, interval=0)
+    loop = asyncio.get_running_loop()
+
+    start = loop.time()
+    await scheduler.acquire(0)
+
+    assert loop.time() - start >= 0.04
+    assert scheduler.remaining == 4
+
+
+@pytest.mark.asyncio
+async def test_unfiltered_events_are_skipped():
+    ws = DiscordWebSocket(
+        "token", 0, {"url": "wss://gateway"}, lambda t, d: None,
+        event_filter=lambda name: name == "MESSAGE_CREATE",
+    )
+    deflater = zlib.compressobj()
+
+    async def feed(message: bytes):
+        frame = deflater.compress(message) + deflater.flush(zlib.Z_SYNC_FLUSH)
+        return await ws.parse_raw_message(frame)
+
+    assert await feed(b'{"t":"PRESENCE_UPDATE","s":41,"op":0,"d":{}}') is None
+    assert ws.skipped == 1
+    assert ws._seq == 41
+
+    payload = await feed(b'{"t":"MESSAGE_CREATE","s":42,"op":0,"d":{"id":"1"}}')
+    assert payload["d"] == {"id": "1"}
+
+    # READY is never skipped, the session id comes from it
+    payload = await feed(b'{"t":"READY","s":1,"op":0,"d":{"session_id":"a"}}')
+    assert payload["t"] == "READY"
+
+    assert (await feed(b'{"t":null,"s":null,"op":11,"d":null}'))["op"] == 11
+    assert ws.skipped == 1
+
+
+class RecordingSocket:
+    def __init__(self) -> None:
+        self.sent = []
+
+    async def send_str(self, data) -> None:
+        self.sent.append(json.loads(data))
+
+    async def close(self, code) -> None:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_send_queue_limits_and_priorities():
+    ws = DiscordWebSocket("token", 0, {"url": "wss://gateway"}, lambda t, d: None)
+    ws.socket = RecordingSocket()
+    ws.outbound = SendQueue(ws, limit=4, window=0.2)
+    ws.outbound.reserved = 1
+    ws.outbound.start()
+    task = ws.outbound._task
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+
+    try:
+        # nothing but urgent commands goes before IDENTIFY
+        for status in ("idle", "dnd", "online"):
+            presence = ws.send(ws.presence(status=status))
+
+        await ws.send(ws.identify())
+        await presence
+
+        members = [ws.send(ws.request_guild_members(str(i))) for i in range(3)]
+        await members[0]
+
+        # the bulk commands used their share, the heartbeat has its own
+        await ws.send(ws.heartbeat())
+        assert loop.time() - start < 0.1
+
+        await asyncio.gather(*members)
+        assert loop.time() - start >= 0.2
+    finally:
+        await ws.close()
+
+    await asyncio.sleep(0)
+    assert task.done()
+
+    ops = [packet["op"] for packet in ws.socket.sent]
+
+    assert ops == [2, 3, 8, 1, 8, 8]
+    assert ws.socket.sent[1]['d']["status"] == "online"
+    assert ws.outbound.coalesced == 2
+
+
+@pytest.mark.asyncio
+async def test_heartbeats_are_encoded_once_per_sequence():
+    ws = DiscordWebSocket("token", 0, {"url": "wss://gateway"}, lambda t, d: None)
+
+    assert ws._encode_heartbeat(5) is ws._encode_heartbeat(5)
+    assert json.loads(ws._encode_heartbeat(6)) == {"op": 1, "d": 6}
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from pudding import DiscordHTTPClient, ResponseCache
+from pudding.http import Route
+
+
+@pytest.mark.asyncio
+async def test_responses_are_cached_and_revalidated(monkeypatch):
+    calls = []
+
+    async def regions(request: web.Request) -> web.Response:
+        calls.append(request.headers.get("If-None-Match"))
+
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304)
+
+        return web.json_response([{"id": "brazil"}], headers={"ETag": '"v1"'})
+
+    async def emojis(request: web.Request) -> web.Response:
+        calls.append(request.method)
+
+        if request.method == "DELETE":
+            return web.Response(status=204)
+
+        return web.json_response([{"id": "2"}])
+
+    app = web.Application()
+    app.router.add_get("/voice/regions", regions)
+    app.router.add_get("/guilds/{guild_id}/emojis", emojis)
+    app.router.add_delete("/guilds/{guild_id}/emojis/{emoji_id}", emojis)
+
+    async with TestServer(app) as server:
+        monkeypatch.setattr(Route, "BASE", str(server.make_url("")).rstrip('/'))
+
+        cache = ResponseCache({"/voice/regions": 0, "/guilds/{guild_id}/emojis": 60})
+        http = DiscordHTTPClient("token", cache=cache)
+
+        try:
+            # a TTL of zero always revalidates with the ETag
+            assert await http.get_voice_regions() == [{"id": "brazil"}]
+            assert await http.get_voice_regions() == [{"id": "brazil"}]
+            assert calls == [None, '"v1"']
+            assert cache.revalidated == 1
+
+            calls.clear()
+            await http.get_guild_emojis(1)
+            await http.get_guild_emojis(1)
+            assert calls == ["GET"]
+            assert cache.hits == 1
+
+            await http.delete_guild_emoji(1, 2)
+            await http.get_guild_emojis(1)
+            assert calls == ["GET", "DELETE", "GET"]
+        finally:
+            await http.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_gets_are_coalesced(monkeypatch):
+    calls = []
+
+    async def user(request: web.Request) -> web.Response:
+        calls.append(request.match_info["id"])
+        await asyncio.sleep(0.01)
+        return web.json_response({"id": request.match_info["id"]})
+
+    app = web.Application()
+    app.router.add_get("/users/{id}", user)
+
+    async with TestServer(app) as server:
+        monkeypatch.setattr(Route, "BASE", str(server.make_url("")).rstrip('/'))
+        http = DiscordHTTPClient("token")
+
+        try:
+            users = await asyncio.gather(*(http.get_user(i % 2) for i in range(10)))
+
+            assert sorted(calls) == ["0", "1"]
+            assert http.coalesced == 8
+            assert users[0] is users[2]
+        finally:
+            await http.close()
@@ -0,0 +1,41 @@
+import zlib
+
+from pudding.inflate import Inflater, ZLIB_SUFFIX
+
+
+def compress_stream(*messages: bytes):
+    deflater = zlib.compressobj()
+
+    for message in messages:
+        yield deflater.compress(message) + deflater.flush(zlib.Z_SYNC_FLUSH)
+
+
+def test_single_frame_messages():
+    inflater = Inflater()
+    messages = [b'{"op":10}', b'{"op":11}']
+
+    for frame, message in zip(compress_stream(*messages), messages):
+        assert frame.endswith(ZLIB_SUFFIX)
+        assert inflater.feed(frame) == message
+
+    assert inflater.ratio is not None
+
+
+def test_split_frames_are_joined():
+    inflater = Inflater(max_retained=0)
+    message = b'{"op":0,"d":"' + b'x' * 200_000 + b'"}'
+
+    (frame,) = compress_stream(message)
+    chunks = [frame[:-16], frame[-16:-8], frame[-8:]]
+
+    results = [inflater.feed(chunk) for chunk in chunks]
+
+    assert results[:-1] == [None] * (len(chunks) - 1)
+    assert bytes(results[-1]) == message
+    assert inflater.bytes_in == len(frame)
+    assert inflater.bytes_out == len(message)
+
+    inflater.reset()
+
+    (frame,) = compress_stream(b'{}')
+    assert inflater.feed(frame) == b'{}'
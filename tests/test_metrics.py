@@ -0,0 +1,51 @@
+import pytest
+
+from pudding import DiscordHTTPClient, DiscordWebSocket, Metrics
+from pudding.metrics import Histogram
+from pudding.testing import FakeDiscord
+
+
+def test_prometheus_format():
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1))
+    histogram.observe(0.05, ("/users/{id}",))
+    histogram.observe(0.5, ("/users/{id}",))
+
+    assert list(histogram.samples()) == [
+        ("latency_seconds_bucket", '{route="/users/{id}",le="0.1"}', 1),
+        ("latency_seconds_bucket", '{route="/users/{id}",le="1"}', 2),
+        ("latency_seconds_bucket", '{route="/users/{id}",le="+Inf"}', 2),
+        ("latency_seconds_sum", '{route="/users/{id}"}', 0.55),
+        ("latency_seconds_count", '{route="/users/{id}"}', 2),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_http_and_gateway_are_measured():
+    metrics = Metrics()
+
+    async with FakeDiscord(event_rate=500) as fake:
+        http = DiscordHTTPClient(fake.token, metrics=metrics)
+        ws = DiscordWebSocket(fake.token, 0, await http.get_gateway(), lambda t, d: None, metrics=metrics)
+
+        try:
+            await ws.connect()
+
+            for _ in range(10):
+                await ws.poll_event()
+        finally:
+            await ws.close()
+            await http.close()
+
+    assert metrics.http_responses.get(("GET", "/gateway", "200")) == 1
+    assert metrics.http_request_seconds.count(("GET", "/gateway")) == 1
+    assert metrics.gateway_frames.get(("0",)) == 11  # with HELLO
+    assert metrics.gateway_events.get(("0", "READY")) == 1
+    assert metrics.gateway_decode_seconds.count(("0",)) == 11
+    assert metrics.gateway_connects.get(("0", "identify")) == 1
+
+    text = metrics.to_prometheus()
+    assert '# TYPE pudding_gateway_events_total counter' in text
+    assert 'pudding_http_responses_total{method="GET",route="/gateway",status="200"} 1' in text
+
+    snapshot = metrics.snapshot()
+    assert snapshot["pudding_gateway_frames_total"]["samples"] == [{"labels": {"shard": "0"}, "value": 11}]
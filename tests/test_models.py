@@ -0,0 +1,52 @@
+from pudding import models
+
+EMOJI = {
+    "id": "41771983429993937",
+    "name": "LUL",
+    "roles": ["41771983429993000", "41771983429993111"],
+    "user": {"id": "96008815106887111", "username": "Luigi", "discriminator": "0002", "avatar": None},
+    "animated": False,
+}
+
+
+def test_fields_are_parsed_lazily():
+    emoji = models.Emoji(EMOJI)
+
+    assert emoji.id == 41771983429993937
+    assert not emoji._parsed
+
+    assert emoji.roles == (41771983429993000, 41771983429993111)
+    assert emoji.user.id == 96008815106887111
+    assert emoji.user is emoji.user
+    assert emoji.require_colons is True  # default
+
+
+def test_models_have_no_dict():
+    user = models.User(EMOJI["user"])
+
+    assert not hasattr(user, "__dict__")
+    assert str(user) == "Luigi#0002"
+
+
+def test_to_dict_round_trip():
+    emoji = models.Emoji({**EMOJI, "unknown": 1})
+    emoji.roles, emoji.user
+
+    assert emoji.to_dict() == {**EMOJI, "unknown": 1}
+
+
+def test_update_reparses_fields():
+    emoji = models.Emoji(EMOJI)
+    assert emoji.roles
+
+    emoji.update({"roles": []})
+    assert emoji.roles == ()
+
+
+def test_members_take_the_id_of_their_user():
+    payload = {"user": EMOJI["user"], "roles": ["41771983429993000"], "joined_at": "2021-08-20T12:00:00+00:00"}
+    member = models.Member(payload)
+
+    assert member.id == member.user.id == 96008815106887111
+    assert member.roles == (41771983429993000,)
+    assert member.to_dict() == payload
@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+
+from pudding import DiscordHTTPClient
+from pudding.http import Route
+from pudding.ratelimit import RateLimiter
+from pudding.testing import FakeDiscord
+
+
+def headers(limit: int, remaining: int, reset_after: float, bucket: str = "abc"):
+    return {
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset-After": str(reset_after),
+        "X-RateLimit-Bucket": bucket,
+    }
+
+
+def test_route_major_parameters():
+    a = Route("GET", "/channels/{channel_id}", channel_id=1)
+    b = Route("GET", "/channels/{channel_id}", channel_id=2)
+
+    assert a.key == b.key == "GET /channels/{channel_id}"
+    assert (a.major, b.major) == ("1", "2")
+
+
+@pytest.mark.asyncio
+async def test_unknown_bucket_is_probed_once():
+    limiter = RateLimiter()
+    route = Route("GET", "/users/{id}", id=1)
+
+    bucket = await limiter.acquire(route)
+    second = asyncio.ensure_future(limiter.acquire(route))
+
+    await asyncio.sleep(0)
+    assert not second.done()
+
+    limiter.update(route, bucket, headers(5, 4, 1))
+    bucket.release()
+
+    assert await second is bucket
+
+
+@pytest.mark.asyncio
+async def test_exhausted_bucket_waits_for_reset():
+    limiter = RateLimiter()
+    route = Route("GET", "/guilds/{guild_id}", guild_id=1)
+
+    bucket = await limiter.acquire(route)
+    limiter.update(route, bucket, headers(1, 0, 0.05))
+    bucket.release()
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await limiter.acquire(route)
+
+    assert loop.time() - start >= 0.04
+
+
+@pytest.mark.asyncio
+async def test_bucket_hash_is_shared_between_routes():
+    limiter = RateLimiter()
+    a = Route("GET", "/guilds/{guild_id}/emojis", guild_id=1)
+    b = Route("GET", "/guilds/{guild_id}/stickers", guild_id=1)
+
+    bucket = await limiter.acquire(a)
+    limiter.update(a, bucket, headers(5, 4, 1, bucket="shared"))
+    limiter.update(b, bucket, headers(5, 3, 1, bucket="shared"))
+    bucket.release()
+
+    assert limiter.get_bucket(a) is limiter.get_bucket(b)
+
+
+@pytest.mark.asyncio
+async def test_idle_buckets_are_swept():
+    limiter = RateLimiter(sweep_interval=0)
+    routes = [Route("GET", "/channels/{channel_id}", channel_id=id) for id in range(50)]
+
+    for route in routes:
+        bucket = await limiter.acquire(route)
+        limiter.update(route, bucket, headers(5, 4, 0.01, bucket="channel"))
+        bucket.release()
+
+    # the buckets of the route keys were replaced by the hash ones
+    assert len(limiter) == 50
+
+    # one bucket still in its window, one probing its limits
+    limiter.get_bucket(routes[0]).exhaust(10)
+    probing = await limiter.acquire(Route("GET", "/users/{id}", id=1))
+
+    await asyncio.sleep(0.02)
+    assert limiter.sweep() == 49
+    assert len(limiter) == 2
+
+    assert limiter.get_bucket(routes[0]).remaining == 0
+    assert limiter.get_bucket(Route("GET", "/users/{id}", id=1)) is probing
+
+
+@pytest.mark.asyncio
+async def test_global_limit_blocks_every_route():
+    limiter = RateLimiter()
+    limiter.set_global(0.05)
+
+    assert limiter.is_global_limited()
+    await limiter.acquire(Route("GET", "/gateway"))
+    assert not limiter.is_global_limited()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_burst_is_not_rate_limited():
+    async with FakeDiscord(rate_limit=5, rate_limit_window=0.1, latency=0.005) as fake:
+        guild = fake.add_guild(emojis=[{"id": "1", "name": "pudding"}])
+        http = DiscordHTTPClient(fake.token, coalesce=False)
+
+        try:
+            await asyncio.gather(*(http.get_guild_emoji(guild["id"], "1") for _ in range(30)))
+        finally:
+            await http.close()
+
+    assert fake.rate_limited == 0
+
+
+@pytest.mark.asyncio
+async def test_late_response_of_an_older_window_is_ignored():
+    limiter = RateLimiter()
+    route = Route("GET", "/guilds/{guild_id}", guild_id=1)
+
+    bucket = await limiter.acquire(route)
+    limiter.update(route, bucket, {**headers(5, 1, 1), "X-RateLimit-Reset": "200"})
+    bucket.release()
+
+    limiter.update(route, bucket, {**headers(5, 4, 1), "X-RateLimit-Reset": "100"})
+    assert bucket.remaining == 1
+
+    # the same window, out of order
+    limiter.update(route, bucket, {**headers(5, 3, 1), "X-RateLimit-Reset": "200"})
+    assert bucket.remaining == 1
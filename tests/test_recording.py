@@ -0,0 +1,39 @@
+import pytest
+
+from pudding import DiscordHTTPClient, DiscordWebSocket
+from pudding.recording import FrameRecorder, read_frames, replay
+from pudding.testing import FakeDiscord
+
+
+@pytest.mark.asyncio
+async def test_recorded_session_is_replayed(tmp_path):
+    path = tmp_path / "shard-0.rec"
+    live = []
+
+    async with FakeDiscord(event_rate=500) as fake:
+        http = DiscordHTTPClient(fake.token)
+        ws = DiscordWebSocket(
+            fake.token, 0, await http.get_gateway(), lambda t, d: live.append((t, d)),
+            recorder=FrameRecorder(path),
+        )
+
+        try:
+            await ws.connect()
+
+            while len(live) < 20:
+                await ws.poll_event()
+        finally:
+            await ws.close()
+            await http.close()
+            ws.recorder.close()  # type: ignore
+
+    frames = list(read_frames(path))
+    assert frames[0].data is None  # the connection
+    assert all(type(frame.data) is bytes for frame in frames[1:])
+    assert frames == sorted(frames, key=lambda frame: frame.offset)
+
+    replayed = []
+    ws = DiscordWebSocket("", 0, {"url": ""}, lambda t, d: replayed.append((t, d)))
+
+    assert await replay(ws, frames, speed=None) == len(live)
+    assert replayed == live
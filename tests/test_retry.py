@@ -0,0 +1,63 @@
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from pudding import DiscordHTTPClient, RetryPolicy, errors
+from pudding.http import Route
+
+
+@pytest.fixture
+def app():
+    statuses = [503, 502]
+
+    async def flaky(request: web.Request) -> web.Response:
+        if statuses:
+            return web.json_response({"message": "Unavailable"}, status=statuses.pop(0))
+
+        return web.json_response({"id": "1"})
+
+    async def unknown(request: web.Request) -> web.Response:
+        return web.json_response({"message": "Unknown User", "code": 10013}, status=404)
+
+    app = web.Application()
+    app.router.add_get("/users/{id}", flaky)
+    app.router.add_delete("/invites/{code}", unknown)
+    app.router.add_post("/channels/{channel_id}/messages", flaky)
+
+    return app
+
+
+def test_backoff_honours_server_hints():
+    policy = RetryPolicy(base=1, cap=4)
+
+    assert policy.backoff(1, retry_after=12.5) == 12.5
+    assert all(0 <= policy.backoff(10) <= 4 for _ in range(100))
+    assert policy.is_retryable("POST", 429)
+    assert not policy.is_retryable("POST", 503)
+    assert not policy.allows(2, elapsed=59, delay=2)
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried(monkeypatch, app):
+    async with TestServer(app) as server:
+        monkeypatch.setattr(Route, "BASE", str(server.make_url("")).rstrip('/'))
+        http = DiscordHTTPClient("token", retry=RetryPolicy(base=0.001))
+
+        try:
+            with pytest.raises(errors.ServerError) as info:
+                await http.request(Route("POST", "/channels/{channel_id}/messages", channel_id=1))
+
+            assert info.value.status == 503
+            assert info.value.attempts == 1
+
+            assert await http.get_user(1) == {"id": "1"}
+
+            with pytest.raises(errors.NotFound) as info:
+                await http.delete_invite("abc")
+
+            assert info.value.code == 10013
+            assert info.value.body["message"] == "Unknown User"
+            assert info.value.elapsed is not None
+            assert "Unknown User" in str(info.value)
+        finally:
+            await http.close()
@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import threading
+
+import pytest
+
+from pudding import DiscordHTTPClient, DiscordWebSocket, ShardManager, errors
+from pudding.session import SessionStore
+from pudding.testing import FakeDiscord
+
+
+async def poll_until(ws, received, name):
+    while name not in received:
+        await ws.poll_event()
+
+
+@pytest.mark.asyncio
+async def test_resume_after_close():
+    received = []
+
+    async with FakeDiscord() as fake:
+        http = DiscordHTTPClient(fake.token)
+        ws = DiscordWebSocket(fake.token, 0, await http.get_gateway(), lambda t, d: received.append(t))
+
+        try:
+            await ws.connect()
+            await poll_until(ws, received, "READY")
+
+            await ws.close()
+            assert ws.can_resume()
+
+            await ws.connect(resume=True)
+            await poll_until(ws, received, "RESUMED")
+
+            assert received.count("READY") == 1
+            assert (fake.identified, fake.resumed) == (1, 1)
+
+            await ws.close(1000)
+            assert not ws.can_resume()
+        finally:
+            await ws.close()
+            await http.close()
+
+
+@pytest.mark.asyncio
+async def test_invalid_session_identifies_again():
+    received = []
+
+    async with FakeDiscord() as fake:
+        http = DiscordHTTPClient(fake.token)
+        ws = DiscordWebSocket(fake.token, 0, await http.get_gateway(), lambda t, d: received.append(t))
+        ws.set_session("gone", 10)
+
+        try:
+            await ws.connect(resume=True)
+
+            with pytest.raises(errors.ReconnectWebSocket):
+                await ws.poll_event()
+
+            assert not ws.can_resume()
+
+            await ws.connect(resume=True)
+            await poll_until(ws, received, "READY")
+        finally:
+            await ws.close()
+            await http.close()
+
+
+@pytest.mark.asyncio
+async def test_sessions_survive_a_restart(tmp_path):
+    path = str(tmp_path / "sessions.json")
+    received = []
+
+    async with FakeDiscord() as fake:
+        http = DiscordHTTPClient(fake.token)
+        gateway = await http.get_bot_gateway()
+
+        try:
+            shards = ShardManager(http, fake.token, 0, lambda t, d: received.append(t), session_file=path)
+            shards.create_shards(gateway)
+            [ws] = shards
+
+            await ws.connect()
+            await poll_until(ws, received, "READY")
+            await shards.close()
+
+            # the next process
+            shards = ShardManager(http, fake.token, 0, lambda t, d: received.append(t), session_file=path)
+            shards.create_shards(gateway)
+            [ws] = shards
+
+            assert ws.can_resume()
+
+            await ws.connect(resume=ws.can_resume())
+            await poll_until(ws, received, "RESUMED")
+            await shards.close()
+
+            assert (fake.identified, fake.resumed) == (1, 1)
+        finally:
+            await http.close()
+
+    assert SessionStore(path, timeout=0).load() == {}
+
+
+@pytest.mark.asyncio
+async def test_malformed_sessions_are_ignored(tmp_path):
+    path = tmp_path / "sessions.json"
+    now = time.time()
+    path.write_text(json.dumps({
+        "0/4": {"seq": 3, "closed_at": now},
+        "1/4": {"session_id": "a", "seq": "3", "closed_at": now},
+        "2/4": ["a", 3],
+        "3/4": {"session_id": "b", "seq": 3, "resume_url": None, "closed_at": now},
+    }))
+
+    shards = [
+        DiscordWebSocket("token", 0, {"url": ""}, lambda t, d: None, shard=(shard_id, 4))
+        for shard_id in range(4)
+    ]
+
+    assert SessionStore(path).restore(shards) == 1
+    assert [ws.can_resume() for ws in shards] == [False, False, False, True]
+
+    path.write_text('{"0/4": {"session_id": "a", "se')
+    assert SessionStore(path).load() == {}
+
+
+def test_stores_sharing_a_file_keep_each_others_shards(tmp_path):
+    path = str(tmp_path / "sessions.json")
+
+    class Shard:
+        def __init__(self, shard_id):
+            self.shard = (shard_id, 8)
+            self.session_id = str(shard_id)
+            self.seq = shard_id
+            self.resume_url = None
+
+        def can_resume(self):
+            return True
+
+    # one store per worker process, saving at the same time
+    def save(shard_id):
+        for _ in range(20):
+            SessionStore(path).save([Shard(shard_id)])
+
+    threads = [threading.Thread(target=save, args=(shard_id,)) for shard_id in range(8)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert sorted(SessionStore(path).load()) == [f"{shard_id}/8" for shard_id in range(8)]
+    assert sorted(os.listdir(tmp_path)) == ["sessions.json", "sessions.json.lock"]
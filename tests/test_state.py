@@ -0,0 +1,161 @@
+import time
+
+import pytest
+
+import pudding
+from pudding import models
+from pudding.utils import LRUCache
+
+USER = {"id": "256444020413300736", "username": "Nium", "discriminator": "0001", "avatar": None}
+GUILD = {
+    "id": "1",
+    "name": "pudding",
+    "channels": [{"id": "2", "name": "general"}],
+    "emojis": [{"id": "3", "name": "flan"}],
+    "stickers": [],
+    "members": [{"user": USER}],
+}
+
+
+def test_lru_cache_limits():
+    cache = LRUCache(maxsize=2, ttl=0.01)
+    cache.set(1, 'a')
+    cache.set(2, 'b')
+    cache.get(1)
+    cache.set(3, 'c')
+
+    assert list(cache) == [1, 3]
+
+    time.sleep(0.02)
+    assert cache.get(1) is None
+
+
+def test_guild_create_fills_every_cache():
+    state = pudding.State()
+    state("GUILD_CREATE", GUILD)
+
+    assert state.get_guild(1)["name"] == "pudding"
+    assert state.get_channel("2")["guild_id"] == "1"
+    assert state.get_emoji(3)["name"] == "flan"
+    assert state.get_user(USER["id"]) is USER
+
+    state("GUILD_EMOJIS_UPDATE", {"guild_id": "1", "emojis": []})
+    assert state.get_emoji(3) is None
+    assert state.get_guild_emojis(1) == []
+
+    state("GUILD_DELETE", {"id": "1"})
+    assert state.get_guild(1) is None
+    assert state.get_channel(2) is None
+
+
+def test_unknown_cache_kind():
+    with pytest.raises(ValueError):
+        pudding.State(limits={"members": 10})
+
+
+@pytest.mark.asyncio
+async def test_http_getters_read_through_the_state():
+    state = pudding.State(limits={"users": 10})
+    state("READY", {"user": USER})
+
+    http = pudding.DiscordHTTPClient(state=state)
+    try:
+        assert await http.get_user(int(USER["id"])) is USER
+    finally:
+        await http.close()
+
+
+@pytest.mark.asyncio
+async def test_models_are_cached():
+    state = pudding.State(models=True)
+    state("GUILD_CREATE", {
+        "id": "1",
+        "name": "pudding",
+        "channels": [{"id": "2", "name": "general"}],
+        "emojis": [{"id": "3", "name": "flan"}],
+        "stickers": [],
+        "members": [{"user": dict(USER)}],
+    })
+
+    guild = state.get_guild(1)
+    assert isinstance(guild, models.Guild)
+    assert guild.name == "pudding"
+
+    # the guild shares the cached channels and emojis
+    [channel] = guild.channels
+    assert isinstance(channel, models.PartialChannel)
+    assert state.get_channel(2) is channel
+    assert channel.guild_id == 1
+    assert state.get_emoji(3) is guild.emojis[0]
+
+    user = state.get_user(USER["id"])
+    assert isinstance(user, models.User)
+    assert not hasattr(user, "__dict__")
+    assert str(user) == "Nium#0001"
+    assert guild.members[0].user is user
+
+    state("GUILD_EMOJIS_UPDATE", {"guild_id": "1", "emojis": [{"id": "4", "name": "pudim"}]})
+    assert state.get_emoji(3) is None
+    assert state.get_guild_emojis(1) == (state.get_emoji(4),)
+
+    http = pudding.DiscordHTTPClient(state=state)
+    try:
+        # requests still return payloads
+        assert await http.get_user(int(USER["id"])) == USER
+        assert await http.get_guild_emojis(1) == [{"id": "4", "name": "pudim"}]
+        assert (await http.get_guild(1))["channels"] == [{"id": "2", "name": "general", "guild_id": "1"}]
+    finally:
+        await http.close()
+
+    state("GUILD_DELETE", {"id": "1"})
+    assert state.get_guild(1) is None
+    assert state.get_channel(2) is None
+    assert state.get_emoji(4) is None
+
+
+@pytest.mark.parametrize("models", [False, True])
+def test_guild_lists_follow_the_events(models):
+    state = pudding.State(models=models)
+    state("GUILD_CREATE", {
+        "id": "1",
+        "name": "pudding",
+        "channels": [{"id": "2", "name": "general"}],
+        "roles": [{"id": "1", "name": "@everyone"}],
+        "emojis": [],
+        "stickers": [],
+    })
+
+    def ids(kind):
+        children = state.get_guild(1)[kind] if not models else getattr(state.get_guild(1), kind)
+        return [int(child["id"]) if not models else child.id for child in children]
+
+    state("CHANNEL_CREATE", {"id": "3", "name": "pudim", "guild_id": "1"})
+    state("CHANNEL_UPDATE", {"id": "2", "name": "geral", "guild_id": "1"})
+    state("CHANNEL_DELETE", {"id": "3", "guild_id": "1"})
+    assert ids("channels") == [2]
+
+    [channel] = state.get_guild(1)["channels"] if not models else state.get_guild(1).channels
+    assert channel is state.get_channel(2)
+
+    state("GUILD_ROLE_CREATE", {"guild_id": "1", "role": {"id": "4", "name": "mod"}})
+    state("GUILD_ROLE_UPDATE", {"guild_id": "1", "role": {"id": "1", "name": "@everyone", "color": 1}})
+    assert sorted(ids("roles")) == [1, 4]
+
+    state("GUILD_ROLE_DELETE", {"guild_id": "1", "role_id": "4"})
+    assert ids("roles") == [1]
+
+
+def test_evicted_guilds_take_their_channels():
+    state = pudding.State(limits={"guilds": 1})
+    state("GUILD_CREATE", {"id": "1", "channels": [{"id": "2"}], "emojis": [{"id": "3"}]})
+    state("GUILD_CREATE", {"id": "4", "channels": [{"id": "5"}]})
+
+    assert state.get_guild(1) is None
+    assert state.get_channel(2) is None
+    assert state.get_emoji(3) is None
+    assert state.get_channel(5) is not None
+
+    # a guild sent again loses the channels it no longer has
+    state("GUILD_CREATE", {"id": "4", "channels": [{"id": "6"}]})
+    assert state.get_channel(5) is None
+    assert state.get_channel(6) is not None
@@ -0,0 +1,48 @@
+import pytest
+
+from pudding import DiscordHTTPClient, DiscordWebSocket, errors
+from pudding.testing import FakeDiscord
+
+
+@pytest.mark.asyncio
+async def test_rest_rate_limits():
+    async with FakeDiscord(rate_limit=2, rate_limit_window=0.05) as fake:
+        http = DiscordHTTPClient(fake.token)
+
+        try:
+            guild = fake.add_guild(emojis=[{"id": "1", "name": "pudding"}])
+
+            for _ in range(5):
+                assert await http.get_guild_emoji(guild["id"], "1") == {"id": "1", "name": "pudding"}
+
+            assert fake.rate_limited == 0  # the client waited for the resets
+            assert fake.requests == 5
+
+            with pytest.raises(errors.NotFound) as info:
+                await http.get_guild_emoji(guild["id"], "2")
+
+            assert info.value.code == 10014
+        finally:
+            await http.close()
+
+
+@pytest.mark.asyncio
+async def test_gateway_session():
+    received = []
+
+    async with FakeDiscord(event_rate=200, heartbeat_interval=50) as fake:
+        http = DiscordHTTPClient(fake.token)
+        ws = DiscordWebSocket(fake.token, 0, await http.get_gateway(), lambda t, d: received.append(t))
+
+        try:
+            await ws.connect()
+
+            while len(received) < 10 or ws.keep_alive.latency is None:  # type: ignore
+                await ws.poll_event()
+
+            assert received[0] == "READY"
+            assert ws.session_id is not None
+            assert ws._seq == fake.events_sent
+        finally:
+            await ws.close()
+            await http.close()
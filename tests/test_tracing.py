@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from pudding import DiscordHTTPClient, DiscordWebSocket, Dispatcher, SpanRecorder
+from pudding.testing import FakeDiscord
+
+
+@pytest.mark.asyncio
+async def test_request_hooks():
+    tracer = SpanRecorder()
+
+    async with FakeDiscord() as fake:
+        http = DiscordHTTPClient(fake.token, tracer=tracer)
+
+        try:
+            await http.get_gateway()
+        finally:
+            await http.close()
+
+    trace_id = tracer.records[0][1]
+    hooks = tracer.trace(trace_id)
+
+    assert [hook for hook, _, _ in hooks] == [
+        "request_start", "ratelimit_wait", "response_headers", "response_decoded", "request_end",
+    ]
+    assert hooks[2][2] == {"status": 200}
+    assert hooks[-1][2] == {"error": None}
+
+    timestamps = [ts for _, ts, _ in hooks]
+    assert timestamps == sorted(timestamps)
+
+
+@pytest.mark.asyncio
+async def test_gateway_hooks_follow_the_frame_to_its_handler():
+    tracer = SpanRecorder()
+    dispatcher = Dispatcher(tracer=tracer)
+    handled = asyncio.Event()
+
+    @dispatcher.listen()
+    async def on_ready(_):
+        handled.set()
+
+    async with FakeDiscord() as fake:
+        http = DiscordHTTPClient(fake.token)
+        ws = DiscordWebSocket(fake.token, 0, await http.get_gateway(), dispatcher, tracer=tracer)
+
+        try:
+            await ws.connect()
+            await ws.poll_event()
+            await asyncio.wait_for(handled.wait(), 1)
+            await dispatcher.queue("READY").join()
+        finally:
+            dispatcher.close()
+            await ws.close()
+            await http.close()
+
+    trace_id = next(id for hook, id, _, fields in tracer.records if fields.get("event") == "READY")
+
+    assert [hook for hook, _, _ in tracer.trace(trace_id)] == [
+        "frame_received", "payload_decoded", "dispatched", "handler_finished",
+    ]
@@ -0,0 +1,28 @@
+import ast
+import sys
+import importlib
+import subprocess
+
+from pudding import types
+
+
+def test_exports_match_the_modules():
+    for module, names in types._EXPORTS.items():
+        assert tuple(importlib.import_module("pudding.types." + module).__all__) == names
+
+
+def test_gateway_payload_is_not_shadowed():
+    assert types.GatewayPayload.__module__ == "pudding.types.gateway"
+    assert types.Payload.__annotations__.keys() == {"op", "d", "s", "t"}
+
+
+def test_import_is_lazy():
+    code = (
+        "import sys, pudding\n"
+        "from pudding import Metrics, types\n"
+        "types.User\n"
+        "print(sorted(m for m in sys.modules if m == 'aiohttp' or m.startswith('pudding.types.')))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert ast.literal_eval(out.stdout) == ["pudding.types.snowflake", "pudding.types.user"]